@@ -0,0 +1,140 @@
+"""Free-block allocation inside a parent network.
+
+The index keeps one sorted list of free block addresses per prefix length
+(a buddy allocator), so finding the next available /N is a handful of list
+lookups instead of a walk over ``IPv4Network.subnets()``.
+"""
+
+from bisect import bisect_left, insort
+from ipaddress import IPv4Network
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+import cidrutil
+
+FIRST_FIT = "first"
+BEST_FIT = "best"
+
+
+class FreeSpaceIndex:
+    """Index of the unused CIDR blocks inside a parent network"""
+
+    def __init__(self, parent: IPv4Network, used: Iterable[str] = ()):
+        """Build the free-space index.
+
+        Args:
+            parent: Network to allocate from
+            used: CIDR keys already defined. Keys equal to or containing the
+                parent are treated as containers and do not take up space.
+        """
+        self.parent = parent
+        self._start = int(parent.network_address)
+        self._end = self._start + parent.num_addresses
+        self._free: List[List[int]] = [[] for _ in range(cidrutil.ADDRESS_BITS + 1)]
+
+        ranges = []
+        for key in used:
+            parsed = cidrutil.parse_cidr(key)
+            if parsed is None or parsed[1] <= parent.prefixlen:
+                continue
+            start, end = cidrutil.network_range(*parsed)
+            if start >= self._start and end <= self._end:
+                ranges.append((start, end))
+
+        # Free space is whatever the merged used ranges leave uncovered
+        cursor = self._start
+        for start, end in sorted(ranges):
+            if start > cursor:
+                self._add_range(cursor, start)
+            cursor = max(cursor, end)
+        self._add_range(cursor, self._end)
+
+    def _add_range(self, start: int, end: int):
+        for address, prefixlen in cidrutil.range_to_blocks(start, end):
+            insort(self._free[prefixlen], address)
+
+    def _candidate(self, prefixlen: int, fit: str) -> Optional[Tuple[int, int]]:
+        """Return the free (address, prefixlen) block to carve a /prefixlen from"""
+        if prefixlen < self.parent.prefixlen or prefixlen > cidrutil.ADDRESS_BITS:
+            return None
+        if fit == BEST_FIT:
+            # Smallest free block that is still large enough
+            for size in range(prefixlen, self.parent.prefixlen - 1, -1):
+                if self._free[size]:
+                    return self._free[size][0], size
+            return None
+        if fit != FIRST_FIT:
+            raise ValueError(f"Unknown fit strategy: {fit}")
+        best = None
+        for size in range(self.parent.prefixlen, prefixlen + 1):
+            if self._free[size] and (best is None or self._free[size][0] < best[0]):
+                best = (self._free[size][0], size)
+        return best
+
+    def find(self, prefixlen: int, fit: str = FIRST_FIT) -> Optional[IPv4Network]:
+        """Return the next available /prefixlen without reserving it"""
+        candidate = self._candidate(prefixlen, fit)
+        if candidate is None:
+            return None
+        return IPv4Network((candidate[0], prefixlen))
+
+    def allocate(self, prefixlen: int, fit: str = FIRST_FIT) -> Optional[IPv4Network]:
+        """Reserve and return the next available /prefixlen, or None if full"""
+        candidate = self._candidate(prefixlen, fit)
+        if candidate is None:
+            return None
+        address, size = candidate
+        free_list = self._free[size]
+        free_list.pop(bisect_left(free_list, address))
+        # Split the block in halves, keeping the low half each time
+        while size < prefixlen:
+            size += 1
+            insort(self._free[size], address + cidrutil.block_size(size))
+        return IPv4Network((address, prefixlen))
+
+    def allocate_many(
+        self, prefixlens: Iterable[int], fit: str = FIRST_FIT
+    ) -> List[Optional[IPv4Network]]:
+        """Allocate one block per requested prefix length, in the given order"""
+        return [self.allocate(prefixlen, fit) for prefixlen in prefixlens]
+
+    def free_blocks(self) -> Iterator[IPv4Network]:
+        """Yield all free blocks in address order"""
+        blocks = sorted(
+            (address, size)
+            for size, addresses in enumerate(self._free)
+            for address in addresses
+        )
+        for address, size in blocks:
+            yield IPv4Network((address, size))
+
+    def free_addresses(self) -> int:
+        """Total number of unallocated addresses"""
+        return sum(
+            len(addresses) * cidrutil.block_size(size)
+            for size, addresses in enumerate(self._free)
+        )
+
+
+def parse_sizes(text: str) -> List[int]:
+    """Parse a size list such as ``"26"`` or ``"/26, 27 28"`` into prefix lengths.
+
+    Raises:
+        ValueError: If any entry is not a prefix length between 0 and 32
+    """
+    sizes = []
+    for token in text.replace(",", " ").split():
+        prefixlen = int(token.lstrip("/"))
+        if not 0 <= prefixlen <= cidrutil.ADDRESS_BITS:
+            raise ValueError(f"Prefix length out of range: {token}")
+        sizes.append(prefixlen)
+    return sizes
+
+
+if __name__ == "__main__":
+    index = FreeSpaceIndex(
+        IPv4Network("10.0.0.0/16"), ["10.0.0.0/16", "10.0.0.0/25", "10.0.1.0/24"]
+    )
+    print(f"First fit /26: {index.find(26)}")
+    print(f"Best fit /26: {index.find(26, BEST_FIT)}")
+    print(f"Allocated: {index.allocate_many([26, 26, 24])}")
+    print(f"Free addresses left: {index.free_addresses():,}")
@@ -0,0 +1,147 @@
+"""Bulk edits of many networks at once.
+
+Networks are selected by the block that contains them or by a search, the
+same field edits are applied to each, and the results are written back to
+the store in one update so views refresh once and undo sees one step.
+"""
+
+import re
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+import cidrutil
+
+SET = "set"
+CLEAR = "clear"
+REPLACE = "replace"  # Regex substitution in the current value
+ACTIONS = (SET, CLEAR, REPLACE)
+
+
+class FieldEdit(NamedTuple):
+    field: str
+    action: str
+    value: str = ""  # New value for SET, replacement for REPLACE
+    pattern: str = ""  # Regex for REPLACE
+
+
+def select_within(networks, cidr: str) -> List[str]:
+    """Keys of all networks inside a block, the block itself included.
+
+    Raises:
+        ValueError: If cidr is not a valid network
+    """
+    parsed = cidrutil.parse_cidr(cidr)
+    if parsed is None:
+        raise ValueError(f"{cidr!r} is not a valid network")
+    if hasattr(networks, "keys_within"):
+        return networks.keys_within(*parsed)
+    start, end = cidrutil.network_range(*parsed)
+    keys = []
+    for key in networks.keys():
+        net = cidrutil.parse_cidr(key)
+        if net and net[1] >= parsed[1] and start <= net[0] < end:
+            keys.append(key)
+    return keys
+
+
+def select_matching(
+    networks,
+    text: str,
+    fields: Optional[Iterable[str]] = None,
+    keys: Optional[Iterable[str]] = None,
+):
+    """Keys of networks with a field value containing text, ignoring case.
+
+    With a columnar store each field is scanned once per distinct value.
+    Given keys, e.g. candidates from a database index, only those networks
+    are checked.
+    """
+    needle = text.lower()
+
+    def contains(value) -> bool:
+        return needle in str(value).lower()
+
+    if keys is not None:
+        records = ((key, networks.get(key)) for key in dict.fromkeys(keys))
+        return sorted(
+            key
+            for key, record in records
+            if record is not None
+            and any(
+                contains(value)
+                for field, value in record.items()
+                if fields is None or field in fields
+            )
+        )
+    if hasattr(networks, "scan"):
+        if fields is None:
+            fields = networks.field_names()
+        keys = set()
+        for field in fields:
+            keys.update(networks.scan(field, contains))
+        return sorted(keys)
+    return [
+        key
+        for key, record in networks.items()
+        if any(
+            contains(value)
+            for field, value in record.items()
+            if fields is None or field in fields
+        )
+    ]
+
+
+def compile_edits(edits: Iterable[FieldEdit]) -> List[tuple]:
+    """Validate edits and compile their patterns.
+
+    Raises:
+        ValueError: On an unknown action, an invalid regex or a replacement
+            that refers to a group the regex does not have
+    """
+    compiled = []
+    for edit in edits:
+        if edit.action not in ACTIONS:
+            raise ValueError(f"Unknown action {edit.action!r}")
+        pattern = None
+        if edit.action == REPLACE:
+            try:
+                pattern = re.compile(edit.pattern)
+            except re.error as e:
+                raise ValueError(f"Invalid pattern {edit.pattern!r}: {e}")
+            # The template is parsed even when nothing matches, so a bad
+            # one fails here rather than on the first record
+            try:
+                pattern.sub(edit.value, "")
+            except (re.error, IndexError) as e:
+                raise ValueError(f"Invalid replacement {edit.value!r}: {e}")
+        compiled.append((edit, pattern))
+    return compiled
+
+
+def apply_edits(record: dict, compiled: List[tuple]) -> Optional[dict]:
+    """Return the edited copy of a record, or None if nothing changed"""
+    new = dict(record)
+    for edit, pattern in compiled:
+        if edit.action == SET:
+            new[edit.field] = edit.value
+        elif edit.action == CLEAR:
+            new.pop(edit.field, None)
+        elif edit.field in new:
+            new[edit.field] = pattern.sub(edit.value, str(new[edit.field]))
+    return None if new == record else new
+
+
+def bulk_changes(networks, keys: Iterable[str], edits: Iterable[FieldEdit]):
+    """Work out the new records for keys; unchanged records are left out.
+
+    Raises:
+        ValueError: If an edit is invalid
+    """
+    compiled = compile_edits(edits)
+    changes: Dict[str, dict] = {}
+    for key in keys:
+        record = networks.get(key)
+        if record is not None:
+            new = apply_edits(record, compiled)
+            if new is not None:
+                changes[key] = new
+    return changes
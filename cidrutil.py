@@ -0,0 +1,93 @@
+"""Integer helpers for IPv4 CIDR keys.
+
+Building an ``IPv4Network`` for every key costs several microseconds, which
+adds up quickly on large datasets. These helpers work on plain integers.
+"""
+
+from socket import inet_aton, inet_ntoa
+from typing import Iterator, Optional, Tuple
+
+ADDRESS_BITS = 32
+ALL_ONES = (1 << ADDRESS_BITS) - 1
+MASKS = tuple(
+    (ALL_ONES << (ADDRESS_BITS - prefixlen)) & ALL_ONES
+    for prefixlen in range(ADDRESS_BITS + 1)
+)
+
+
+def parse_cidr(text: str) -> Optional[Tuple[int, int]]:
+    """Parse ``a.b.c.d/n`` into (address, prefixlen).
+
+    Host bits are kept as written so callers can tell canonical keys from
+    non-canonical ones. A missing prefix means /32, like ``IPv4Network``.
+
+    Returns:
+        Tuple of (address, prefixlen) or None if the text is not a valid CIDR
+
+    Example:
+        >>> parse_cidr("192.168.1.0/24")
+        (3232235776, 24)
+    """
+    try:
+        address_text, sep, prefix_text = text.partition("/")
+        packed = inet_aton(address_text)
+    except (AttributeError, OSError, UnicodeError, ValueError):
+        return None
+    # inet_aton also accepts short and octal forms; only allow dotted quads
+    if inet_ntoa(packed) != address_text:
+        return None
+    if sep:
+        if not prefix_text.isascii() or not prefix_text.isdigit():
+            return None
+        prefixlen = int(prefix_text)
+        if prefixlen > ADDRESS_BITS:
+            return None
+    else:
+        prefixlen = ADDRESS_BITS
+    return int.from_bytes(packed, "big"), prefixlen
+
+
+def netmask(prefixlen: int) -> int:
+    """Return the integer netmask for a prefix length"""
+    return MASKS[prefixlen]
+
+
+def block_size(prefixlen: int) -> int:
+    """Return the number of addresses in a block of this prefix length"""
+    return 1 << (ADDRESS_BITS - prefixlen)
+
+
+def network_range(address: int, prefixlen: int) -> Tuple[int, int]:
+    """Return the [start, end) address range of a block, ignoring host bits"""
+    start = address & netmask(prefixlen)
+    return start, start + block_size(prefixlen)
+
+
+def is_canonical(address: int, prefixlen: int) -> bool:
+    """True if the address has no host bits set"""
+    return (address & ~netmask(prefixlen) & ALL_ONES) == 0
+
+
+def format_address(address: int) -> str:
+    return inet_ntoa(address.to_bytes(4, "big"))
+
+
+def format_cidr(address: int, prefixlen: int) -> str:
+    """Format an (address, prefixlen) pair as ``a.b.c.d/n``"""
+    return f"{format_address(address)}/{prefixlen}"
+
+
+def range_to_blocks(start: int, end: int) -> Iterator[Tuple[int, int]]:
+    """Split the [start, end) range into maximal aligned CIDR blocks.
+
+    Example:
+        >>> list(range_to_blocks(0, 3))
+        [(0, 31), (2, 32)]
+    """
+    while start < end:
+        # Largest block aligned on start that still fits in the range
+        size = start & -start if start else 1 << ADDRESS_BITS
+        while size > end - start:
+            size >>= 1
+        yield start, ADDRESS_BITS - size.bit_length() + 1
+        start += size
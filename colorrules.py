@@ -0,0 +1,268 @@
+"""Colour rule evaluation for grid cells.
+
+A field's ``colorMap`` maps regex patterns to colours. A value takes the
+colour of the first pattern that matches it with ``re.match``. This module
+has no Qt dependency so grids can be coloured in worker processes too.
+
+Most patterns are plain text such as ``prod`` or ``New York|London``. With
+``re.match`` such a pattern matches exactly the values that start with one
+of its alternatives, so these are looked up by value prefix in a dict
+instead of being run as regexes. Only real regexes go through ``re``.
+
+Regexes that ``regexguard`` finds unsafe are never run, and a regex that
+is slow on a value is disabled; ``ColorEngine.disabled()`` lists both
+so the user can be warned.
+
+Field settings are shared between tabs and never changed in place: an edit
+replaces a field's settings dict with a new one. Tabs whose fields have
+equal content share one compiled ``ColorEngine`` through ``shared_engine``.
+"""
+
+import json
+import re
+import weakref
+from typing import Dict, List, Optional, Tuple
+
+import regexguard
+import tracing
+
+REGEX_SYNTAX = set(".^$*+?{}[]()|\\")
+CACHE_SIZE = 65536  # Distinct values remembered per field
+
+
+def literal_alternatives(pattern: str) -> Optional[List[str]]:
+    """Return the texts a pattern is an alternation of, or None for a regex.
+
+    ``a|b\\.c`` gives ``["a", "b.c"]``. A leading ``^`` is dropped since
+    ``re.match`` anchors at the start anyway.
+    """
+    alternatives = []
+    current = []
+    at_start = True
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\":
+            # Escaped punctuation is literal; \\d, \\w, \\1 etc. are not
+            if i + 1 >= len(pattern) or pattern[i + 1].isalnum():
+                return None
+            current.append(pattern[i + 1])
+            i += 2
+            at_start = False
+            continue
+        if char == "|":
+            alternatives.append("".join(current))
+            current = []
+            at_start = True
+        elif char == "^" and at_start:
+            at_start = False
+        elif char in REGEX_SYNTAX:
+            return None
+        else:
+            current.append(char)
+            at_start = False
+        i += 1
+    alternatives.append("".join(current))
+    return alternatives
+
+
+def check_colormap(colormap: Dict[str, str]) -> Dict[str, str]:
+    """Return {pattern: problem} for unsafe or invalid patterns in a colorMap.
+
+    Literal patterns are always safe. Regexes are analysed, and those that
+    pass are probed in a separate process, which takes up to a second or
+    two, so call this when rules are saved rather than when they are used.
+    """
+    regexes = [p for p in colormap if literal_alternatives(p) is None]
+    problems = {}
+    for pattern in regexes:
+        problem = regexguard.analyze(pattern)
+        if problem:
+            problems[pattern] = problem
+    to_probe = [p for p in regexes if p not in problems]
+    if to_probe:
+        problems.update(regexguard.probe(to_probe))
+    return problems
+
+
+class FieldRules:
+    """The ordered colour rules of one field.
+
+    Literal alternatives are kept in a dict of prefix to the index of the
+    first rule containing it, with the distinct prefix lengths, so a value
+    is checked with one lookup per length. Regex rules are only tried when
+    they come before the best literal match. Results are cached per value.
+    """
+
+    def __init__(self, colormap: Dict[str, str]):
+        self.colors: List[str] = []
+        self.literals: Dict[str, int] = {}
+        self.regexes: List[Tuple[int, regexguard.TimedPattern]] = []
+        self.patterns: Dict[int, str] = {}  # Regex rule index -> pattern text
+        self.rejected: Dict[str, str] = {}  # Pattern -> why it is never run
+        for index, (pattern, color) in enumerate(colormap.items()):
+            self.colors.append(color)
+            alternatives = literal_alternatives(pattern)
+            if alternatives is None:
+                problem = regexguard.analyze(pattern)
+                if problem:
+                    self.rejected[pattern] = problem
+                    continue
+                self.patterns[index] = pattern
+                self.regexes.append(
+                    (index, regexguard.TimedPattern(re.compile(pattern)))
+                )
+            else:
+                for text in alternatives:
+                    self.literals.setdefault(text, index)
+        self.lengths = sorted({len(text) for text in self.literals})
+        self._cache: Dict[str, Optional[str]] = {}
+
+    def match(self, value: str) -> Optional[str]:
+        """Return the colour of the first rule matching value, if any"""
+        try:
+            return self._cache[value]
+        except KeyError:
+            pass
+        best = len(self.colors)
+        literals = self.literals
+        for length in self.lengths:
+            if length > len(value):
+                break
+            index = literals.get(value[:length])
+            if index is not None and index < best:
+                best = index
+        for index, pattern in self.regexes:
+            if index >= best:
+                break
+            if pattern.match(value):
+                best = index
+                break
+        color = self.colors[best] if best < len(self.colors) else None
+        if len(self._cache) < CACHE_SIZE:
+            self._cache[value] = color
+        return color
+
+    def disabled(self) -> Dict[str, str]:
+        """{pattern: reason} for rules that are not being applied"""
+        disabled = dict(self.rejected)
+        for index, pattern in self.regexes:
+            if pattern.disabled:
+                disabled[self.patterns[index]] = pattern.disabled
+        return disabled
+
+
+class ColorEngine:
+    """Compiled colour rules for one field configuration"""
+
+    def __init__(self, fields: Dict[str, dict]):
+        # A copy, as the engine may outlive the tab's current fields
+        self.fields = dict(fields)
+        self.rules: Dict[str, FieldRules] = {}
+        self.weights: Dict[str, int] = {}
+        for field_name, field_data in fields.items():
+            colormap = field_data.get("colorMap") or {}
+            if colormap:
+                self.rules[field_name] = FieldRules(colormap)
+                self.weights[field_name] = field_data.get("colorWeight", 1) or 0
+
+    def fill_color(
+        self, field_name: str, value: str, current_color: str, current_weight: int
+    ) -> tuple:
+        """Return the (color, weight) a value gives, or the current pair.
+
+        The field's colour only wins over the current one when its
+        ``colorWeight`` is higher.
+        """
+        rules = self.rules.get(field_name)
+        if rules:
+            weight = self.weights[field_name]
+            if weight > current_weight:
+                color = rules.match(value)
+                if color is not None:
+                    return (color, weight)
+        return (current_color, current_weight)
+
+    def network_color(self, details: dict) -> Optional[str]:
+        """Return the colour the rules give a network's field values"""
+        color = None
+        for property, value in details.items():
+            color, weight = self.fill_color(property, str(value), color, 0)
+        return color
+
+    @tracing.traced("grid.colors")
+    def apply(self, data: List[List[dict]], networks) -> None:
+        """Copy shown field values into grid cells and colour them"""
+        if not networks:
+            return
+        for row in data:
+            for cell in row:
+                if cellNetwork := cell.get("network"):
+                    if networkdetails := networks.get(cellNetwork):
+                        self.apply_cell(cell, networkdetails)
+
+    def apply_cell(self, cell: dict, details: dict) -> None:
+        """Copy one network's shown values into its cell and colour it"""
+        for property, value in details.items():
+            field_info = self.fields.get(property, {})
+            if field_info.get("show", False):
+                cell[property] = value
+            cell["color"], weight = self.fill_color(
+                property, str(value), cell.get("color"), 0
+            )
+
+    def disabled(self) -> List[Tuple[str, str, str]]:
+        """(field, pattern, reason) for every rule that is not applied"""
+        return [
+            (field_name, pattern, reason)
+            for field_name, rules in self.rules.items()
+            for pattern, reason in rules.disabled().items()
+        ]
+
+    @staticmethod
+    def reset_cell(cell: dict) -> None:
+        """Remove the values and colour a cell got from its network"""
+        for key in [key for key in cell if key not in ("network", "spansize")]:
+            del cell[key]
+
+
+# Content key -> engine, kept while some tab still uses the engine
+_engines: "weakref.WeakValueDictionary[tuple, ColorEngine]" = (
+    weakref.WeakValueDictionary()
+)
+
+
+def settings_key(settings: dict) -> str:
+    """Text that is equal for field settings with equal content.
+
+    The order of ``colorMap`` is kept, since the first matching pattern
+    wins; other settings are compared regardless of order.
+    """
+    ordered = {
+        name: list(value.items()) if name == "colorMap" and value else value
+        for name, value in settings.items()
+    }
+    return json.dumps(ordered, sort_keys=True, default=str)
+
+
+def share_fields(fields: Dict[str, dict], pool: Dict[str, dict]) -> Dict[str, dict]:
+    """New field mapping whose settings are shared through pool.
+
+    Settings equal in content to ones already in pool are replaced by the
+    pooled dict, so tabs loaded with the same pool share their settings.
+    """
+    return {
+        name: pool.setdefault(settings_key(settings), settings)
+        for name, settings in fields.items()
+    }
+
+
+def shared_engine(fields: Dict[str, dict]) -> ColorEngine:
+    """Compiled engine for fields, shared with any tab whose fields are equal"""
+    key = tuple(
+        sorted((name, settings_key(settings)) for name, settings in fields.items())
+    )
+    engine = _engines.get(key)
+    if engine is None:
+        engine = _engines[key] = ColorEngine(fields)
+    return engine
@@ -0,0 +1,155 @@
+"""Streaming CSV interchange with other IPAM tools.
+
+A CSV file has one network per row: a CIDR column plus one column per
+field. Files are read in chunks of rows, so a load can report progress
+and be cancelled between them, and written row by row from a snapshot of
+the store.
+"""
+
+import csv
+import os
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+import cidrutil
+
+CHUNK_ROWS = 5000  # Rows read between progress reports
+CIDR_COLUMNS = ("cidr", "network", "subnet", "prefix")
+MAX_ERRORS = 1000  # Messages kept; further bad rows are only counted
+
+
+class Chunk(NamedTuple):
+    records: Dict[str, dict]
+    position: int  # Characters read so far
+    size: int  # Total file size in bytes
+
+
+class CsvSummary(NamedTuple):
+    rows: int
+    loaded: int
+    normalized: int  # Keys rewritten to their canonical form
+    invalid: int
+    errors: List[str]
+    fields: List[str]
+
+
+def _counted_lines(F1, counter: list) -> Iterator[str]:
+    """Yield lines while adding their length to counter[0]"""
+    for line in F1:
+        counter[0] += len(line)
+        yield line
+
+
+def normalize_cidr(text: str) -> Optional[str]:
+    """Return the canonical ``a.b.c.d/n`` form of a CIDR, or None"""
+    parsed = cidrutil.parse_cidr(text.strip())
+    if parsed is None:
+        return None
+    address, prefixlen = parsed
+    return cidrutil.format_cidr(address & cidrutil.netmask(prefixlen), prefixlen)
+
+
+def read_header(path: str) -> Tuple[int, List[str]]:
+    """Return (CIDR column index, field names) from a CSV header row.
+
+    The CIDR column is the first one named like CIDR or Network, otherwise
+    the first column.
+
+    Raises:
+        ValueError: If the file has no header row
+    """
+    with open(path, "r", newline="") as F1:
+        header = next(csv.reader(F1), None)
+    if not header:
+        raise ValueError("The CSV file has no header row")
+    header = [name.strip() for name in header]
+    lowered = [name.lower() for name in header]
+    cidr_column = next(
+        (lowered.index(name) for name in CIDR_COLUMNS if name in lowered), 0
+    )
+    fields = [name for i, name in enumerate(header) if i != cidr_column and name]
+    return cidr_column, fields
+
+
+def read_chunks(
+    path: str, summary: dict, chunk_rows: int = CHUNK_ROWS
+) -> Iterator[Chunk]:
+    """Yield chunks of normalised records from a CSV file.
+
+    Empty cells are left out of a record. Rows whose CIDR is invalid are
+    skipped and counted in ``summary``, which is filled in as rows are read.
+    """
+    cidr_column, fields = read_header(path)
+    summary.update(rows=0, loaded=0, normalized=0, invalid=0, errors=[])
+    summary["fields"] = fields
+    size = os.path.getsize(path)
+    counter = [0]
+    with open(path, "r", newline="") as F1:
+        reader = csv.reader(_counted_lines(F1, counter))
+        header = next(reader)
+        columns = [
+            (i, name.strip())
+            for i, name in enumerate(header)
+            if i != cidr_column and name.strip()
+        ]
+        records: Dict[str, dict] = {}
+        for line_number, row in enumerate(reader, start=2):
+            if not row:
+                continue
+            summary["rows"] += 1
+            text = row[cidr_column] if cidr_column < len(row) else ""
+            key = normalize_cidr(text)
+            if key is None:
+                summary["invalid"] += 1
+                if len(summary["errors"]) < MAX_ERRORS:
+                    summary["errors"].append(f"Line {line_number}: bad CIDR {text!r}")
+                continue
+            if key != text:
+                summary["normalized"] += 1
+            records[key] = {
+                name: row[i] for i, name in columns if i < len(row) and row[i] != ""
+            }
+            if len(records) >= chunk_rows:
+                summary["loaded"] += len(records)
+                yield Chunk(records, counter[0], size)
+                records = {}
+        if records:
+            summary["loaded"] += len(records)
+            yield Chunk(records, counter[0], size)
+
+
+def write_csv(
+    path: str,
+    networks,
+    fields: Optional[List[str]] = None,
+    progress: Optional[Callable[[int, int], None]] = None,
+    cancelled: Optional[Callable[[], bool]] = None,
+) -> int:
+    """Write networks as CSV row by row; returns the number of rows written.
+
+    Args:
+        path: Output file
+        networks: Mapping of CIDR keys to records
+        fields: Columns after CIDR, defaults to every field in use
+        progress: Optional callable(rows written, total rows)
+        cancelled: Optional callable returning True to stop early
+    """
+    if fields is None:
+        fields = networks.field_names() if hasattr(networks, "field_names") else []
+        if not fields:
+            fields = list(dict.fromkeys(f for r in networks.values() for f in r))
+    total = len(networks)
+    written = 0
+    with open(path, "w", newline="") as F1:
+        writer = csv.writer(F1)
+        writer.writerow(["CIDR"] + fields)
+        for key, record in networks.items():
+            writer.writerow([key] + [record.get(name, "") for name in fields])
+            written += 1
+            if written % CHUNK_ROWS == 0:
+                if progress:
+                    progress(written, total)
+                if cancelled and cancelled():
+                    break
+    if progress:
+        progress(written, total)
+    return written
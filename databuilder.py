@@ -1,6 +1,8 @@
 from ipaddress import IPv4Network
 from typing import Tuple, List, Dict, Any
 
+import tracing
+
 
 def check_cidr(cidr: IPv4Network, start_prefix: int) -> IPv4Network:
     """Adjust network prefix if start prefix is smaller than network prefix.
@@ -22,6 +24,7 @@ def check_cidr(cidr: IPv4Network, start_prefix: int) -> IPv4Network:
     return cidr
 
 
+@tracing.traced("grid.build")
 def build_display_list(
     cidr: IPv4Network, start_prefix: int, end_prefix: int
 ) -> Tuple[List[List[Dict[str, Any]]], List[Tuple[int, int, int]]]:
@@ -90,6 +93,29 @@ def build_display_list(
     return data, spans
 
 
+def cell_text(cell: Dict[str, Any]) -> str:
+    """Return the display text of a grid cell.
+
+    The network comes first, followed by one ``field: value`` line for
+    every field copied into the cell.
+    """
+    out = ""
+    for key, value in cell.items():
+        if key not in ["spansize", "color"]:
+            if key == "network":
+                out += f"{value}\n"
+            else:
+                out += f"{key}: {value}\n"
+    return out
+
+
+def column_headers(data: List[List[Dict[str, Any]]]) -> List[str]:
+    """Return a ``/prefix`` label for each column of a grid"""
+    if not data:
+        return []
+    return ["/" + cell["network"].split("/")[1] for cell in data[0]]
+
+
 def validate_network_range(
     cidr: IPv4Network, start_prefix: int, end_prefix: int
 ) -> Tuple[bool, str]:
@@ -2,17 +2,83 @@
 
 This module provides MS Access database backend functionality with
 the same capabilities as JSON file storage.
+
+``DatabaseSession`` keeps one connection open for as long as a database is
+the current file, reconnects when the connection drops, and reads networks
+in pages by address range so large databases open quickly. Each network row
+stores its address as an integer (``AddressKey``) and prefix length for
+that. ``SqliteDatabase`` speaks the same schema through the standard
+library's sqlite3 and stands in for Access where pyodbc or the Access
+driver is not available.
+
+A database may also be normalized: ``NetworkValues`` then holds one row
+per network field value, indexed by field and value, so searches, value
+counts and bulk-edit selections run as SQL instead of reading every
+network. The JSON in ``Networks.FieldValues`` stays the stored record;
+``normalize`` adds the table to an existing database.
 """
 
-import pyodbc
 import json
 import logging
-from typing import Dict, List, Any, Optional, Tuple
+import sqlite3
+from bisect import bisect_right
+from collections import OrderedDict
+from itertools import islice
+from typing import Callable, Dict, List, Any, Optional, Tuple
+
+try:
+    import pyodbc
+except ImportError:  # Access support is optional
+    pyodbc = None
+
+import cidrutil
+import validation
+
+ADDRESS_OFFSET = 1 << 31  # AddressKey = address - offset fits a signed LONG
+PAGE_ROWS = 5000  # Network rows read per page
+WINDOW_THRESHOLD = 200_000  # Larger databases are only read where viewed
+WINDOW_ROWS = 250_000  # Rows of viewed blocks kept before the oldest are dropped
+VALUE_LENGTH = 255  # Longer field values are indexed by their start only
+KEY_BATCH = 100  # Keys per IN (...) list when reading networks by key
+SQLITE_EXTENSIONS = (".sqlite", ".db")
+DATABASE_EXTENSIONS = (".accdb", ".mdb") + SQLITE_EXTENSIONS
+
+
+class DatabaseError(Exception):
+    """A database operation failed even after reconnecting"""
+
+
+def address_key(address: int) -> int:
+    return address - ADDRESS_OFFSET
+
+
+def address_columns(cidr: str) -> Tuple[Optional[int], Optional[int]]:
+    """(AddressKey, PrefixLen) for a CIDR, or (None, None) if unparseable"""
+    parsed = cidrutil.parse_cidr(cidr) if isinstance(cidr, str) else None
+    if parsed is None:
+        return None, None
+    return address_key(parsed[0]), parsed[1]
+
+
+def _chunks(networks: Dict[str, dict], size: int):
+    """Split a mapping into dicts of at most size items"""
+    items = iter(networks.items())
+    while chunk := dict(islice(items, size)):
+        yield chunk
+
+
+def value_text(value) -> str:
+    """A field value as stored in NetworkValues"""
+    text = value if isinstance(value, str) else str(value)
+    return text[:VALUE_LENGTH]
 
 
 class AccessDatabase:
     """MS Access database handler for qtIPvisual"""
 
+    # Driver exceptions that mean an operation or the connection failed
+    errors: tuple = (pyodbc.Error,) if pyodbc is not None else ()
+
     def __init__(self, db_path: str):
         """Initialize Access database connection.
 
@@ -22,6 +88,27 @@ class AccessDatabase:
         self.db_path = db_path
         self.conn = None
         self.cursor = None
+        self.normalized = False  # NetworkValues exists and is kept up to date
+
+    def _open(self):
+        """Return a new DB-API connection"""
+        if pyodbc is None:
+            raise DatabaseError("pyodbc is not installed")
+        # MS Access connection string
+        conn_str = (
+            r"DRIVER={Microsoft Access Driver (*.mdb, *.accdb)};"
+            f"DBQ={self.db_path};"
+        )
+        return pyodbc.connect(conn_str)
+
+    @classmethod
+    def available(cls) -> Tuple[bool, str]:
+        """(is_available, message) for the driver this backend needs"""
+        return is_access_available()
+
+    def create_database(self) -> bool:
+        """Create the database file with the required tables"""
+        return create_new_database(self.db_path)
 
     def connect(self) -> bool:
         """Establish connection to Access database.
@@ -30,19 +117,46 @@ class AccessDatabase:
             True if connection successful, False otherwise
         """
         try:
-            # MS Access connection string
-            conn_str = (
-                r"DRIVER={Microsoft Access Driver (*.mdb, *.accdb)};"
-                f"DBQ={self.db_path};"
-            )
-            self.conn = pyodbc.connect(conn_str)
+            self.conn = self._open()
             self.cursor = self.conn.cursor()
             logging.info(f"Connected to database: {self.db_path}")
             return True
-        except pyodbc.Error as e:
+        except self.errors + (DatabaseError,) as e:
             logging.error(f"Database connection failed: {e}")
             return False
 
+    # Dialect hooks, overridden by other backends
+
+    def _table_names(self) -> List[str]:
+        return [row.table_name for row in self.cursor.tables()]
+
+    def _column_names(self, table: str) -> List[str]:
+        return [row.column_name for row in self.cursor.columns(table=table)]
+
+    def _last_id(self) -> int:
+        self.cursor.execute("SELECT @@IDENTITY")
+        return self.cursor.fetchone()[0]
+
+    def _top(self, limit: int, columns: str, rest: str) -> str:
+        return f"SELECT TOP {limit} {columns} {rest}"
+
+    def _like(self, text: str) -> Tuple[str, str]:
+        """(condition, parameter) matching FieldValue containing text"""
+        for special in "[%_":
+            text = text.replace(special, f"[{special}]")
+        return "v.FieldValue LIKE ?", f"%{text}%"
+
+    ADDRESS_COLUMNS = ("AddressKey LONG", "PrefixLen INTEGER")
+    VALUES_TABLE = """
+        CREATE TABLE NetworkValues (
+            ValueID AUTOINCREMENT,
+            NetworkID LONG NOT NULL,
+            FieldName TEXT(255) NOT NULL,
+            FieldValue TEXT(255),
+            PRIMARY KEY (ValueID)
+        )
+    """
+
     def create_tables(self) -> bool:
         """Create required tables if they don't exist.
 
@@ -54,7 +168,7 @@ class AccessDatabase:
         """
         try:
             # Check if tables exist, create if not
-            tables = [row.table_name for row in self.cursor.tables()]
+            tables = self._table_names()
 
             if "Tabs" not in tables:
                 self.cursor.execute(
@@ -91,10 +205,17 @@ class AccessDatabase:
                         TabID INTEGER NOT NULL,
                         CIDR TEXT(50) NOT NULL,
                         FieldValues MEMO,
+                        AddressKey LONG,
+                        PrefixLen INTEGER,
                         PRIMARY KEY (NetworkID)
                     )
                 """
                 )
+                self.cursor.execute(
+                    "CREATE INDEX NetworksAddress ON Networks (AddressKey)"
+                )
+            else:
+                self._add_address_columns()
 
             if "ColorMappings" not in tables:
                 self.cursor.execute(
@@ -109,13 +230,63 @@ class AccessDatabase:
                 """
                 )
 
+            self.normalized = "NetworkValues" in tables
             self.conn.commit()
             logging.info("Database tables created/verified")
             return True
-        except pyodbc.Error as e:
+        except self.errors as e:
             logging.error(f"Table creation failed: {e}")
             return False
 
+    def _add_address_columns(self):
+        """Add and fill the integer address columns in older databases"""
+        if "AddressKey" in self._column_names("Networks"):
+            return
+        for column in self.ADDRESS_COLUMNS:
+            self.cursor.execute(f"ALTER TABLE Networks ADD COLUMN {column}")
+        self.cursor.execute("CREATE INDEX NetworksAddress ON Networks (AddressKey)")
+        self.cursor.execute("SELECT NetworkID, CIDR FROM Networks")
+        rows = self.cursor.fetchall()
+        updates = [address_columns(cidr) + (row_id,) for row_id, cidr in rows]
+        if updates:
+            self.cursor.executemany(
+                "UPDATE Networks SET AddressKey = ?, PrefixLen = ? WHERE NetworkID = ?",
+                updates,
+            )
+        logging.info(f"Added address columns to {len(updates)} networks")
+
+    def normalize(self):
+        """Add NetworkValues, filled from the JSON records, and commit.
+
+        Raises:
+            The driver's error type if any statement fails
+        """
+        if self.normalized:
+            return
+        self.cursor.execute(self.VALUES_TABLE)
+        self.cursor.execute(
+            "CREATE INDEX NetworkValuesField ON NetworkValues (FieldName, FieldValue)"
+        )
+        self.cursor.execute(
+            "CREATE INDEX NetworkValuesNetwork ON NetworkValues (NetworkID)"
+        )
+        self.cursor.execute("SELECT NetworkID, FieldValues FROM Networks")
+        rows = self.cursor.fetchall()
+        values = [
+            (row_id, field, value_text(value))
+            for row_id, field_values in rows
+            for field, value in json.loads(field_values).items()
+        ]
+        if values:
+            self.cursor.executemany(
+                """INSERT INTO NetworkValues (NetworkID, FieldName, FieldValue)
+                VALUES (?, ?, ?)""",
+                values,
+            )
+        self.conn.commit()
+        self.normalized = True
+        logging.info(f"Indexed {len(values)} field values of {len(rows)} networks")
+
     def save_data(self, tabs_data: List[Dict[str, Any]]) -> bool:
         """Save all tabs data to database.
 
@@ -126,113 +297,193 @@ class AccessDatabase:
             True if save successful, False otherwise
         """
         try:
-            # Clear existing data
-            self.cursor.execute("DELETE FROM ColorMappings")
-            self.cursor.execute("DELETE FROM Networks")
-            self.cursor.execute("DELETE FROM Fields")
-            self.cursor.execute("DELETE FROM Tabs")
-
-            for tab_data in tabs_data:
-                # Insert tab
-                self.cursor.execute(
-                    "INSERT INTO Tabs (TabName) VALUES (?)", (tab_data["name"],)
-                )
-                self.cursor.execute("SELECT @@IDENTITY")
-                tab_id = self.cursor.fetchone()[0]
-
-                # Insert fields
-                fields = tab_data.get("fields", {})
-                field_id_map = {}
-
-                for field_name, field_data in fields.items():
-                    self.cursor.execute(
-                        """INSERT INTO Fields
-                        (TabID, FieldName, ControlType, ColorWeight, ShowInCells)
-                        VALUES (?, ?, ?, ?, ?)""",
-                        (
-                            tab_id,
-                            field_name,
-                            field_data.get("controlType", "lineEdit"),
-                            field_data.get("colorWeight", 1),
-                            field_data.get("show", False),
-                        ),
-                    )
-                    self.cursor.execute("SELECT @@IDENTITY")
-                    field_id = self.cursor.fetchone()[0]
-                    field_id_map[field_name] = field_id
-
-                    # Insert color mappings
-                    color_map = field_data.get("colorMap", {})
-                    for pattern, color in color_map.items():
-                        self.cursor.execute(
-                            """INSERT INTO ColorMappings
-                            (FieldID, Pattern, Color) VALUES (?, ?, ?)""",
-                            (field_id, pattern, color),
-                        )
-
-                # Insert networks
-                networks = tab_data.get("networks", {})
-                for cidr, field_values in networks.items():
-                    # Store field values as JSON
-                    field_values_json = json.dumps(field_values)
-                    self.cursor.execute(
-                        """INSERT INTO Networks
-                        (TabID, CIDR, FieldValues) VALUES (?, ?, ?)""",
-                        (tab_id, cidr, field_values_json),
-                    )
-
-            self.conn.commit()
+            self.write_tabs(tabs_data)
             logging.info("Data saved to database successfully")
             return True
-        except pyodbc.Error as e:
+        except self.errors as e:
             logging.error(f"Save failed: {e}")
             self.conn.rollback()
             return False
 
-    def load_data(self) -> Optional[List[Dict[str, Any]]]:
-        """Load all tabs data from database.
+    def write_tabs(
+        self,
+        tabs_data: List[Dict[str, Any]],
+        progress: Optional[Callable[[int, int], None]] = None,
+    ):
+        """Replace the database contents with tabs data and commit.
 
-        Returns:
-            List of tab dictionaries or None if load failed
+        Args:
+            tabs_data: List of tab dictionaries with fields and networks
+            progress: Optional callable(rows written, total rows); an
+                exception it raises stops the write before the commit
+
+        Raises:
+            The driver's error type if any statement fails
         """
-        try:
-            tabs_data = []
+        total = sum(len(tab_data.get("networks", {})) for tab_data in tabs_data)
+        written = 0
+        # Clear existing data
+        self.cursor.execute("DELETE FROM ColorMappings")
+        if self.normalized:
+            self.cursor.execute("DELETE FROM NetworkValues")
+        self.cursor.execute("DELETE FROM Networks")
+        self.cursor.execute("DELETE FROM Fields")
+        self.cursor.execute("DELETE FROM Tabs")
 
-            # Get all tabs
-            self.cursor.execute("SELECT TabID, TabName FROM Tabs ORDER BY TabID")
-            tabs = self.cursor.fetchall()
+        for tab_data in tabs_data:
+            # Insert tab
+            self.cursor.execute(
+                "INSERT INTO Tabs (TabName) VALUES (?)", (tab_data["name"],)
+            )
+            tab_id = self._last_id()
+            self._write_fields(tab_id, tab_data.get("fields", {}))
+            for chunk in _chunks(tab_data.get("networks", {}), PAGE_ROWS):
+                self._write_networks(tab_id, chunk)
+                written += len(chunk)
+                if progress:
+                    progress(written, total)
 
-            for tab_id, tab_name in tabs:
-                tab_data = {"name": tab_name, "fields": {}, "networks": {}}
+        self.conn.commit()
 
-                # Get fields for this tab
+    def _write_fields(self, tab_id: int, fields: Dict[str, dict]):
+        for field_name, field_data in fields.items():
+            self.cursor.execute(
+                """INSERT INTO Fields
+                (TabID, FieldName, ControlType, ColorWeight, ShowInCells)
+                VALUES (?, ?, ?, ?, ?)""",
+                (
+                    tab_id,
+                    field_name,
+                    field_data.get("controlType", "lineEdit"),
+                    field_data.get("colorWeight", 1),
+                    field_data.get("show", False),
+                ),
+            )
+            field_id = self._last_id()
+
+            # Insert color mappings
+            color_map = field_data.get("colorMap", {})
+            for pattern, color in color_map.items():
                 self.cursor.execute(
-                    """SELECT FieldID, FieldName, ControlType,
-                    ColorWeight, ShowInCells FROM Fields WHERE TabID = ?""",
-                    (tab_id,),
+                    """INSERT INTO ColorMappings
+                    (FieldID, Pattern, Color) VALUES (?, ?, ?)""",
+                    (field_id, pattern, color),
                 )
-                fields = self.cursor.fetchall()
-
-                for field_id, field_name, ctrl_type, weight, show in fields:
-                    field_data = {
-                        "controlType": ctrl_type,
-                        "colorWeight": weight,
-                        "show": bool(show),
-                        "colorMap": {},
-                    }
-
-                    # Get color mappings for this field
-                    self.cursor.execute(
-                        """SELECT Pattern, Color FROM ColorMappings
-                        WHERE FieldID = ?""",
-                        (field_id,),
-                    )
-                    color_mappings = self.cursor.fetchall()
 
-                    for pattern, color in color_mappings:
-                        field_data["colorMap"][pattern] = color
+    def _write_networks(self, tab_id: int, networks: Dict[str, dict]):
+        if self.normalized:
+            self._write_normalized(tab_id, networks)
+            return
+        rows = [
+            # Store field values as JSON, and the address as integers
+            (tab_id, cidr, json.dumps(field_values)) + address_columns(cidr)
+            for cidr, field_values in networks.items()
+        ]
+        if rows:
+            self.cursor.executemany(
+                """INSERT INTO Networks
+                (TabID, CIDR, FieldValues, AddressKey, PrefixLen)
+                VALUES (?, ?, ?, ?, ?)""",
+                rows,
+            )
+
+    def _write_normalized(self, tab_id: int, networks: Dict[str, dict]):
+        """Insert networks one by one, since their values need the NetworkID"""
+        values = []
+        for cidr, field_values in networks.items():
+            self.cursor.execute(
+                """INSERT INTO Networks
+                (TabID, CIDR, FieldValues, AddressKey, PrefixLen)
+                VALUES (?, ?, ?, ?, ?)""",
+                (tab_id, cidr, json.dumps(field_values)) + address_columns(cidr),
+            )
+            row_id = self._last_id()
+            values.extend(
+                (row_id, field, value_text(value))
+                for field, value in field_values.items()
+            )
+        if values:
+            self.cursor.executemany(
+                """INSERT INTO NetworkValues (NetworkID, FieldName, FieldValue)
+                VALUES (?, ?, ?)""",
+                values,
+            )
+
+    def write_changes(
+        self, tabs_data: List[Dict[str, Any]], changes: Dict[str, Optional[dict]]
+    ):
+        """Save tab settings and only the networks that changed, and commit.
+
+        Existing tabs keep their TabID so unchanged network rows stay
+        valid. A changed network is stored once, under the last tab, which
+        wins when tabs are merged on loading.
+
+        Args:
+            tabs_data: Tabs with names and fields; networks are ignored
+            changes: {key: new record, or None if deleted}
+
+        Raises:
+            The driver's error type if any statement fails
+        """
+        if not tabs_data:
+            raise DatabaseError("Nothing to save: there are no tabs")
+        self.cursor.execute("SELECT TabID FROM Tabs ORDER BY TabID")
+        old_ids = [row[0] for row in self.cursor.fetchall()]
+        self.cursor.execute("DELETE FROM ColorMappings")
+        self.cursor.execute("DELETE FROM Fields")
+
+        tab_ids = []
+        for i, tab_data in enumerate(tabs_data):
+            if i < len(old_ids):
+                tab_id = old_ids[i]
+                self.cursor.execute(
+                    "UPDATE Tabs SET TabName = ? WHERE TabID = ?",
+                    (tab_data["name"], tab_id),
+                )
+            else:
+                self.cursor.execute(
+                    "INSERT INTO Tabs (TabName) VALUES (?)", (tab_data["name"],)
+                )
+                tab_id = self._last_id()
+            tab_ids.append(tab_id)
+            self._write_fields(tab_id, tab_data.get("fields", {}))
+
+        # Networks of closed tabs move to the last tab rather than vanish
+        for tab_id in old_ids[len(tabs_data) :]:
+            self.cursor.execute(
+                "UPDATE Networks SET TabID = ? WHERE TabID = ?", (tab_ids[-1], tab_id)
+            )
+            self.cursor.execute("DELETE FROM Tabs WHERE TabID = ?", (tab_id,))
+
+        for cidr in changes:
+            key, _ = address_columns(cidr)
+            if key is None:
+                condition, parameters = "AddressKey IS NULL AND CIDR = ?", (cidr,)
+            else:
+                condition, parameters = "AddressKey = ? AND CIDR = ?", (key, cidr)
+            if self.normalized:
+                self.cursor.execute(
+                    f"""DELETE FROM NetworkValues WHERE NetworkID IN
+                    (SELECT NetworkID FROM Networks WHERE {condition})""",
+                    parameters,
+                )
+            self.cursor.execute(f"DELETE FROM Networks WHERE {condition}", parameters)
+        self._write_networks(
+            tab_ids[-1],
+            {cidr: record for cidr, record in changes.items() if record is not None},
+        )
+        self.conn.commit()
 
-                    tab_data["fields"][field_name] = field_data
+    def load_data(self) -> Optional[List[Dict[str, Any]]]:
+        """Load all tabs data from database.
+
+        Returns:
+            List of tab dictionaries or None if load failed
+        """
+        try:
+            tabs_data = []
+            for tab_id, tab_name, fields in self.read_tabs():
+                tab_data = {"name": tab_name, "fields": fields, "networks": {}}
 
                 # Get networks for this tab
                 self.cursor.execute(
@@ -248,10 +499,198 @@ class AccessDatabase:
 
             logging.info(f"Loaded {len(tabs_data)} tabs from database")
             return tabs_data
-        except pyodbc.Error as e:
+        except self.errors as e:
             logging.error(f"Load failed: {e}")
             return None
 
+    def read_tabs(self) -> List[Tuple[int, str, Dict[str, dict]]]:
+        """(TabID, name, field configurations) of every tab, without networks.
+
+        Raises:
+            The driver's error type if a query fails
+        """
+        self.cursor.execute("SELECT TabID, TabName FROM Tabs ORDER BY TabID")
+        tabs = [(tab_id, tab_name, {}) for tab_id, tab_name in self.cursor.fetchall()]
+        by_id = {tab[0]: tab[2] for tab in tabs}
+
+        self.cursor.execute(
+            """SELECT FieldID, TabID, FieldName, ControlType,
+            ColorWeight, ShowInCells FROM Fields ORDER BY FieldID"""
+        )
+        field_rows = self.cursor.fetchall()
+        self.cursor.execute(
+            "SELECT FieldID, Pattern, Color FROM ColorMappings ORDER BY MappingID"
+        )
+        color_maps: Dict[int, Dict[str, str]] = {}
+        for field_id, pattern, color in self.cursor.fetchall():
+            color_maps.setdefault(field_id, {})[pattern] = color
+
+        for field_id, tab_id, field_name, ctrl_type, weight, show in field_rows:
+            if tab_id in by_id:
+                by_id[tab_id][field_name] = {
+                    "controlType": ctrl_type,
+                    "colorWeight": weight,
+                    "show": bool(show),
+                    "colorMap": color_maps.get(field_id, {}),
+                }
+        return tabs
+
+    def read_networks(self, first: int, last: int) -> List[tuple]:
+        """(TabID, CIDR, record) rows of networks with addresses in
+        [first, last], in address then tab order.
+
+        Raises:
+            The driver's error type if a query fails
+        """
+        self.cursor.execute(
+            """SELECT TabID, CIDR, FieldValues FROM Networks
+            WHERE AddressKey >= ? AND AddressKey <= ?
+            ORDER BY AddressKey, TabID, NetworkID""",
+            (address_key(first), address_key(last)),
+        )
+        return [(tab, cidr, json.loads(values)) for tab, cidr, values in self.cursor.fetchall()]
+
+    def read_unaddressed(self) -> List[tuple]:
+        """(TabID, CIDR, record) rows of keys that are not a CIDR"""
+        self.cursor.execute(
+            """SELECT TabID, CIDR, FieldValues FROM Networks
+            WHERE AddressKey IS NULL ORDER BY TabID, NetworkID"""
+        )
+        return [(tab, cidr, json.loads(values)) for tab, cidr, values in self.cursor.fetchall()]
+
+    def read_page(self, first: int, limit: int) -> Tuple[List[tuple], Optional[int]]:
+        """Read about ``limit`` network rows from address first upwards.
+
+        Returns:
+            (rows, last) where every network with an address in
+            [first, last] has been read, or last is None at the end of the
+            table. Rows sharing the boundary address are read together.
+        """
+        self.cursor.execute(
+            self._top(
+                limit,
+                "AddressKey",
+                """FROM Networks WHERE AddressKey >= ?
+                ORDER BY AddressKey""",
+            ),
+            (address_key(first),),
+        )
+        keys = [row[0] for row in self.cursor.fetchall()]
+        if len(keys) < limit:
+            return self.read_networks(first, cidrutil.ALL_ONES), None
+        last = keys[-1] + ADDRESS_OFFSET
+        return self.read_networks(first, last), last
+
+    def count_networks(self) -> int:
+        self.cursor.execute("SELECT COUNT(*) FROM Networks")
+        return self.cursor.fetchone()[0]
+
+    def read_keys(self, cidrs: List[str]) -> List[tuple]:
+        """(TabID, CIDR, record) rows of the given CIDR keys, in address
+        then tab order. Keys that are not a CIDR are skipped.
+
+        Raises:
+            The driver's error type if a query fails
+        """
+        wanted = set(cidrs)
+        keys = sorted({k for k, _ in map(address_columns, wanted) if k is not None})
+        rows = []
+        for i in range(0, len(keys), KEY_BATCH):
+            batch = keys[i : i + KEY_BATCH]
+            self.cursor.execute(
+                f"""SELECT TabID, CIDR, FieldValues FROM Networks
+                WHERE AddressKey IN ({", ".join("?" * len(batch))})
+                ORDER BY AddressKey, TabID, NetworkID""",
+                batch,
+            )
+            rows.extend(
+                (tab, cidr, json.loads(values))
+                for tab, cidr, values in self.cursor.fetchall()
+                if cidr in wanted
+            )
+        return rows
+
+    def _value_filter(
+        self,
+        field: Optional[str],
+        value: Optional[str],
+        contains: Optional[str],
+        first: int,
+        last: int,
+    ) -> Tuple[str, list]:
+        """FROM and WHERE clauses joining networks to their field values"""
+        if not self.normalized:
+            raise DatabaseError("The database has no field value index")
+        conditions, parameters = [], []
+        if field is not None:
+            conditions.append("v.FieldName = ?")
+            parameters.append(field)
+        if value is not None:
+            conditions.append("v.FieldValue = ?")
+            parameters.append(value_text(value))
+        if contains:
+            condition, pattern = self._like(contains)
+            conditions.append(condition)
+            parameters.append(pattern)
+        if first > 0 or last < cidrutil.ALL_ONES:
+            # Keys that are not a CIDR have no address and are left out
+            conditions.append("n.AddressKey >= ? AND n.AddressKey <= ?")
+            parameters.extend((address_key(first), address_key(last)))
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        return (
+            f"""FROM NetworkValues AS v INNER JOIN Networks AS n
+            ON v.NetworkID = n.NetworkID {where}""",
+            parameters,
+        )
+
+    def find_networks(
+        self,
+        field: Optional[str] = None,
+        value: Optional[str] = None,
+        contains: Optional[str] = None,
+        first: int = 0,
+        last: int = cidrutil.ALL_ONES,
+    ) -> List[str]:
+        """CIDR keys of networks with a matching field value, from the index.
+
+        Args:
+            field: Only look at this field, any field if None
+            value: Value equal to this
+            contains: Value containing this text, ignoring case
+            first: Lowest network address
+            last: Highest network address
+
+        Any tab's row may match, and values are indexed by their first
+        VALUE_LENGTH characters, so callers check the merged records.
+
+        Raises:
+            DatabaseError: If the database is not normalized
+            The driver's error type if a query fails
+        """
+        rest, parameters = self._value_filter(field, value, contains, first, last)
+        self.cursor.execute(f"SELECT DISTINCT n.CIDR {rest}", parameters)
+        return [row[0] for row in self.cursor.fetchall()]
+
+    def value_counts(
+        self, field: str, first: int = 0, last: int = cidrutil.ALL_ONES
+    ) -> Dict[str, int]:
+        """{value: number of networks} for one field, from the index.
+
+        A network whose tabs disagree is counted under each of its values.
+
+        Raises:
+            DatabaseError: If the database is not normalized
+            The driver's error type if a query fails
+        """
+        rest, parameters = self._value_filter(field, None, None, first, last)
+        self.cursor.execute(
+            f"""SELECT d.FieldValue, COUNT(*) FROM
+            (SELECT DISTINCT v.FieldValue, n.CIDR {rest}) AS d
+            GROUP BY d.FieldValue""",
+            parameters,
+        )
+        return {value: count for value, count in self.cursor.fetchall()}
+
     def close(self):
         """Close database connection"""
         if self.conn:
@@ -268,6 +707,516 @@ class AccessDatabase:
         self.close()
 
 
+class SqliteDatabase(AccessDatabase):
+    """The same schema in a SQLite file, through the standard library.
+
+    Used where no Access driver is installed, and as a local stand-in for
+    Access when testing the session and paging logic.
+    """
+
+    errors = (sqlite3.Error,)
+    ADDRESS_COLUMNS = ("AddressKey INTEGER", "PrefixLen INTEGER")
+    VALUES_TABLE = """
+        CREATE TABLE NetworkValues (
+            ValueID INTEGER PRIMARY KEY AUTOINCREMENT,
+            NetworkID INTEGER NOT NULL,
+            FieldName TEXT NOT NULL,
+            FieldValue TEXT
+        )
+    """
+
+    @classmethod
+    def available(cls) -> Tuple[bool, str]:
+        return True, f"SQLite {sqlite3.sqlite_version}"
+
+    def create_database(self) -> bool:
+        # Connecting creates the file; the session creates the tables
+        return True
+
+    def _open(self):
+        return sqlite3.connect(self.db_path)
+
+    def _table_names(self) -> List[str]:
+        self.cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+        return [row[0] for row in self.cursor.fetchall()]
+
+    def _column_names(self, table: str) -> List[str]:
+        self.cursor.execute(f"PRAGMA table_info({table})")
+        return [row[1] for row in self.cursor.fetchall()]
+
+    def _last_id(self) -> int:
+        return self.cursor.lastrowid
+
+    def _top(self, limit: int, columns: str, rest: str) -> str:
+        return f"SELECT {columns} {rest} LIMIT {limit}"
+
+    def _like(self, text: str) -> Tuple[str, str]:
+        for special in "\\%_":
+            text = text.replace(special, "\\" + special)
+        return "v.FieldValue LIKE ? ESCAPE '\\'", f"%{text}%"
+
+    def create_tables(self) -> bool:
+        try:
+            self.cursor.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS Tabs (
+                    TabID INTEGER PRIMARY KEY AUTOINCREMENT,
+                    TabName TEXT NOT NULL,
+                    CreatedDate TEXT
+                );
+                CREATE TABLE IF NOT EXISTS Fields (
+                    FieldID INTEGER PRIMARY KEY AUTOINCREMENT,
+                    TabID INTEGER NOT NULL,
+                    FieldName TEXT NOT NULL,
+                    ControlType TEXT,
+                    ColorWeight INTEGER,
+                    ShowInCells INTEGER
+                );
+                CREATE TABLE IF NOT EXISTS Networks (
+                    NetworkID INTEGER PRIMARY KEY AUTOINCREMENT,
+                    TabID INTEGER NOT NULL,
+                    CIDR TEXT NOT NULL,
+                    FieldValues TEXT
+                );
+                CREATE TABLE IF NOT EXISTS ColorMappings (
+                    MappingID INTEGER PRIMARY KEY AUTOINCREMENT,
+                    FieldID INTEGER NOT NULL,
+                    Pattern TEXT,
+                    Color TEXT
+                );
+                """
+            )
+            self._add_address_columns()
+            self.normalized = "NetworkValues" in self._table_names()
+            self.conn.commit()
+            return True
+        except self.errors as e:
+            logging.error(f"Table creation failed: {e}")
+            return False
+
+
+class LoadedRanges:
+    """Address ranges already read from a database, as merged intervals"""
+
+    def __init__(self):
+        self.starts: List[int] = []
+        self.ends: List[int] = []
+
+    def add(self, first: int, last: int):
+        i = bisect_right(self.ends, first - 2)  # First interval touching
+        j = bisect_right(self.starts, last + 1)  # Past the last touching
+        if i < j:
+            first = min(first, self.starts[i])
+            last = max(last, self.ends[j - 1])
+        self.starts[i:j] = [first]
+        self.ends[i:j] = [last]
+
+    def remove(self, first: int, last: int):
+        """Forget [first, last], e.g. after its networks were dropped"""
+        i = bisect_right(self.ends, first - 1)  # First interval reaching first
+        j = bisect_right(self.starts, last)  # Past the last starting by last
+        if i >= j:
+            return
+        starts, ends = [], []
+        if self.starts[i] < first:
+            starts.append(self.starts[i])
+            ends.append(first - 1)
+        if self.ends[j - 1] > last:
+            starts.append(last + 1)
+            ends.append(self.ends[j - 1])
+        self.starts[i:j] = starts
+        self.ends[i:j] = ends
+
+    def missing(self, first: int, last: int) -> List[Tuple[int, int]]:
+        """Sub-ranges of [first, last] not yet read"""
+        gaps = []
+        i = bisect_right(self.ends, first - 1)
+        while first <= last:
+            if i >= len(self.starts) or self.starts[i] > last:
+                gaps.append((first, last))
+                break
+            if self.starts[i] > first:
+                gaps.append((first, self.starts[i] - 1))
+            first = self.ends[i] + 1
+            i += 1
+        return gaps
+
+    def contains(self, address: int) -> bool:
+        i = bisect_right(self.starts, address) - 1
+        return i >= 0 and address <= self.ends[i]
+
+    def complete(self) -> bool:
+        return self.starts == [0] and self.ends == [cidrutil.ALL_ONES]
+
+
+class DatabaseSession:
+    """A database kept open while it is the current file.
+
+    Tab field configurations are read when the session is opened. Networks
+    are read on demand by address range, for the block a view shows, or in
+    pages by ``load_next_page`` to fill in the rest in the background.
+    Ranges already read are remembered and never read twice.
+
+    Databases with more than ``window_threshold`` networks are windowed:
+    nothing is read in the background, and once the blocks read for views
+    hold more than ``window_rows`` networks the least recently used blocks
+    are handed back by ``blocks_to_drop`` so their networks can be dropped
+    from memory and read again when next needed. Keys changed since the
+    last save are tracked in ``dirty``; they are never dropped or
+    overwritten by reads, and ``save_changes`` writes only them.
+
+    Every operation reconnects and retries once if the driver fails, e.g.
+    after a network share dropped the connection. Operations that touch the
+    database are meant for one I/O thread; ``note_changes`` and
+    ``take_changes`` are called from the thread that edits networks.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        backend=None,
+        page_rows: int = PAGE_ROWS,
+        window_threshold: int = WINDOW_THRESHOLD,
+        window_rows: int = WINDOW_ROWS,
+    ):
+        """
+        Args:
+            path: Database file
+            backend: AccessDatabase or a subclass, backend_for(path) by
+                default
+            page_rows: Network rows read per background page
+            window_threshold: Network count above which only viewed blocks
+                are read
+            window_rows: Networks from viewed blocks kept when windowed
+        """
+        self.path = path
+        self.db = (backend or backend_for(path))(path)
+        self.page_rows = page_rows
+        self.window_threshold = window_threshold
+        self.window_rows = window_rows
+        self.windowed = False
+        self.blocks: OrderedDict = OrderedDict()  # (start, prefixlen) -> rows
+        self.dirty: set = set()  # Keys changed since the last save
+        self.saving: set = set()  # Keys being written by save_changes
+        self.loaded = LoadedRanges()
+        self.tab_names: Dict[int, str] = {}
+        self.conflicts: List[validation.Issue] = []  # Found since last taken
+        self._next_page = 0  # First address not yet read by load_next_page
+        self._connected = False
+
+    def _connect(self):
+        if not self.db.connect():
+            raise DatabaseError(f"Failed to connect to {self.path}")
+        if not self.db.create_tables():
+            raise DatabaseError(f"Failed to prepare tables in {self.path}")
+        self._connected = True
+
+    def _reconnect(self):
+        try:
+            self.db.close()
+        except self.db.errors:
+            pass
+        self._connected = False
+        self._connect()
+
+    def run(self, operation: Callable[[AccessDatabase], Any]) -> Any:
+        """Call operation(db), reconnecting and retrying once on failure.
+
+        Raises:
+            DatabaseError: If the retry fails as well
+        """
+        if not self._connected:
+            self._connect()
+        try:
+            return operation(self.db)
+        except self.db.errors as e:
+            logging.warning(f"Database operation failed, reconnecting: {e}")
+            self._rollback()
+        except Exception:
+            # e.g. cancelled from a progress callback: undo the partial write
+            self._rollback()
+            raise
+        self._reconnect()
+        try:
+            return operation(self.db)
+        except self.db.errors as e:
+            raise DatabaseError(str(e)) from e
+
+    def _rollback(self):
+        try:
+            self.db.conn.rollback()
+        except (self.db.errors + (AttributeError,)):
+            pass
+
+    def open(self) -> List[Dict[str, Any]]:
+        """Connect and return the tabs with their fields and no networks.
+
+        Networks whose key is not a CIDR cannot be paged by address and
+        are returned with the first tab.
+        """
+        tabs = self.run(lambda db: db.read_tabs())
+        self.windowed = self.run(lambda db: db.count_networks()) > self.window_threshold
+        self.tab_names = {tab_id: name for tab_id, name, _ in tabs}
+        unaddressed = self._merge(self.run(lambda db: db.read_unaddressed()))
+        tabs_data = [
+            {"name": name, "fields": fields, "networks": {}} for _, name, fields in tabs
+        ]
+        if tabs_data:
+            tabs_data[0]["networks"] = unaddressed
+        return tabs_data
+
+    def _merge(self, rows: List[tuple]) -> Dict[str, dict]:
+        """Merge rows of all tabs, the last tab winning as in a full load,
+        and note keys whose tabs disagree"""
+        by_tab: Dict[int, Dict[str, dict]] = {}
+        for tab_id, cidr, record in rows:
+            by_tab.setdefault(tab_id, {})[cidr] = record
+        tabs_data = [
+            {"name": self.tab_names.get(tab_id, "Subnet"), "networks": by_tab[tab_id]}
+            for tab_id in sorted(by_tab)
+        ]
+        if len(tabs_data) > 1:
+            self.conflicts.extend(validation.find_tab_conflicts(tabs_data))
+        merged: Dict[str, dict] = {}
+        for tab_data in tabs_data:
+            merged.update(tab_data["networks"])
+        # Keys edited or deleted in memory since the last save win
+        for key in (self.dirty | self.saving).intersection(merged):
+            del merged[key]
+        return merged
+
+    def take_conflicts(self) -> List[validation.Issue]:
+        """Tab conflicts found in networks read since the last call"""
+        conflicts, self.conflicts = self.conflicts, []
+        return conflicts
+
+    def load_range(self, first: int, last: int) -> Dict[str, dict]:
+        """Networks with addresses in [first, last] not already read"""
+        networks: Dict[str, dict] = {}
+        for gap_first, gap_last in self.loaded.missing(first, last):
+            networks.update(
+                self._merge(self.run(lambda db: db.read_networks(gap_first, gap_last)))
+            )
+            self.loaded.add(gap_first, gap_last)
+        return networks
+
+    def load_block(
+        self, address: int, prefixlen: int, prefetch: bool = False
+    ) -> Dict[str, dict]:
+        """Networks inside a block not already read, noting the block as used.
+
+        Args:
+            address: Any address in the block
+            prefixlen: Block prefix length
+            prefetch: True when read ahead of need, so the block counts as
+                least rather than most recently used
+        """
+        start, end = cidrutil.network_range(address, prefixlen)
+        networks = self.load_range(start, end - 1)
+        rows = len(networks)
+        mask = cidrutil.netmask(prefixlen)
+        for other in list(self.blocks):
+            # Blocks inside this one are now accounted for by it
+            if other[1] >= prefixlen and other[0] & mask == start:
+                rows += self.blocks.pop(other)
+        key = (start, prefixlen)
+        if key in self.blocks:
+            self.blocks[key] += rows
+        else:
+            self.blocks[key] = rows
+        self.blocks.move_to_end(key, last=not prefetch)
+        return networks
+
+    def blocks_to_drop(self) -> List[Tuple[int, int]]:
+        """Least recently used blocks to drop to stay within window_rows.
+
+        Their ranges are forgotten, so they are read again when next used.
+        Only windowed sessions drop blocks, and never the last one used.
+        """
+        dropped = []
+        while (
+            self.windowed
+            and len(self.blocks) > 1
+            and sum(self.blocks.values()) > self.window_rows
+        ):
+            (start, prefixlen), rows = self.blocks.popitem(last=False)
+            container = next(
+                (
+                    other
+                    for other in self.blocks
+                    if other[1] <= prefixlen
+                    and start & cidrutil.netmask(other[1]) == other[0]
+                ),
+                None,
+            )
+            if container is not None:
+                # Still in use as part of a larger block
+                self.blocks[container] += rows
+                continue
+            self.loaded.remove(start, start + cidrutil.block_size(prefixlen) - 1)
+            dropped.append((start, prefixlen))
+        return dropped
+
+    def load_next_page(self) -> Dict[str, dict]:
+        """The next page of networks not read yet, {} once all are read"""
+        while not self.complete():
+            first = self._next_page
+            if self.loaded.contains(first):
+                gaps = self.loaded.missing(first, cidrutil.ALL_ONES)
+                if not gaps:
+                    break
+                first = gaps[0][0]
+            rows, last = self.run(lambda db: db.read_page(first, self.page_rows))
+            if last is None:
+                last = cidrutil.ALL_ONES
+            # Skip networks in ranges read on demand meanwhile
+            fresh = self._merge(
+                [
+                    row
+                    for row in rows
+                    if not self.loaded.contains(cidrutil.parse_cidr(row[1])[0])
+                ]
+            )
+            self.loaded.add(first, last)
+            self._next_page = last + 1
+            if fresh:
+                return fresh
+        return {}
+
+    def load_rest(
+        self,
+        networks: Dict[str, dict],
+        progress: Optional[Callable[[int, int], None]] = None,
+        cancelled: Optional[Callable[[], bool]] = None,
+    ):
+        """Read all networks not read yet into networks, page by page.
+
+        Pages read before a failure or cancellation are kept in networks.
+
+        Args:
+            networks: Dict to add the networks to
+            progress: Optional callable(networks read, 0)
+            cancelled: Optional callable returning True to stop early
+        """
+        while not self.complete() and not (cancelled and cancelled()):
+            networks.update(self.load_next_page())
+            if progress:
+                progress(len(networks), 0)
+
+    def complete(self) -> bool:
+        return self.loaded.complete()
+
+    def note_changes(self, keys):
+        """Remember keys edited in memory so they are saved and kept"""
+        self.dirty.update(keys)
+
+    @property
+    def normalized(self) -> bool:
+        return self.db.normalized
+
+    def normalize(self):
+        """Index field values so searches run in the database.
+
+        Raises:
+            DatabaseError: If it fails after reconnecting
+        """
+        self.run(lambda db: db.normalize())
+
+    def find(self, contains: str, field: Optional[str] = None) -> List[str]:
+        """Keys that may have a field value containing text, ignoring case.
+
+        Keys edited since the last save are included, since the database
+        does not know their current values; check the records themselves.
+
+        Raises:
+            DatabaseError: If the query fails after reconnecting
+        """
+        keys = self.run(lambda db: db.find_networks(field, contains=contains))
+        return list(dict.fromkeys(keys + sorted(self.dirty)))
+
+    def value_counts(self, field: str) -> Dict[str, int]:
+        """{value: networks} of one field as last saved
+
+        Raises:
+            DatabaseError: If the query fails after reconnecting
+        """
+        return self.run(lambda db: db.value_counts(field))
+
+    def load_keys(self, keys) -> Dict[str, dict]:
+        """Networks with the given keys not already read.
+
+        They are read outside any block, so a windowed session does not
+        count or drop them.
+        """
+        wanted = [
+            key
+            for key in keys
+            if key not in self.dirty
+            and (parsed := cidrutil.parse_cidr(key)) is not None
+            and not self.loaded.contains(parsed[0])
+        ]
+        if not wanted:
+            return {}
+        return self._merge(self.run(lambda db: db.read_keys(wanted)))
+
+    def save(
+        self,
+        tabs_data: List[Dict[str, Any]],
+        progress: Optional[Callable[[int, int], None]] = None,
+    ):
+        """Replace the database contents; everything counts as read after.
+
+        Raises:
+            DatabaseError: If saving fails after reconnecting
+        """
+        self.run(lambda db: db.write_tabs(tabs_data, progress))
+        self.loaded.add(0, cidrutil.ALL_ONES)
+        self.dirty.clear()
+
+    def take_changes(self, networks) -> Dict[str, Optional[dict]]:
+        """Records of the keys changed since the last save, for save_changes.
+
+        Call from the thread that edits networks. The keys move from dirty
+        to saving, so edits made while they are written are noted afresh.
+        """
+        changes = {key: networks.get(key) for key in self.dirty}
+        self.saving.update(changes)
+        self.dirty.difference_update(changes)
+        return changes
+
+    def save_changes(
+        self, tabs_data: List[Dict[str, Any]], changes: Dict[str, Optional[dict]]
+    ):
+        """Save tab settings and changes taken with take_changes.
+
+        If saving fails the keys count as changed again.
+
+        Raises:
+            DatabaseError: If saving fails after reconnecting
+        """
+        try:
+            self.run(lambda db: db.write_changes(tabs_data, changes))
+        except BaseException:
+            self.restore_changes(changes)
+            raise
+        self.saving.difference_update(changes)
+
+    def restore_changes(self, changes: Dict[str, Optional[dict]]):
+        """Count changes taken with take_changes as unsaved again"""
+        self.dirty.update(changes)
+        self.saving.difference_update(changes)
+
+    def close(self):
+        if self._connected:
+            self.db.close()
+            self._connected = False
+
+
+def backend_for(path: str):
+    """SqliteDatabase for .sqlite and .db files, AccessDatabase otherwise"""
+    return SqliteDatabase if path.lower().endswith(SQLITE_EXTENSIONS) else AccessDatabase
+
+
 def create_new_database(db_path: str) -> bool:
     """Create a new Access database file with required tables.
 
@@ -333,6 +1282,8 @@ def is_access_available() -> Tuple[bool, str]:
     Returns:
         Tuple of (is_available, message)
     """
+    if pyodbc is None:
+        return False, "pyodbc is not installed. Install pyodbc and the ACE driver."
     try:
         drivers = [d for d in pyodbc.drivers() if "Access" in d]
         if drivers:
@@ -0,0 +1,103 @@
+"""Picking up changes other people saved to the open file.
+
+The file as last read or written is remembered as a ``FileBase``: its size
+and modification time, a digest of every record and each tab's fields.
+When the file changes on disk it is parsed again and compared with the
+base, so only the records and fields that changed there are applied. A
+change that meets a local edit made since the base is a conflict.
+"""
+
+import os
+from typing import Dict, List, NamedTuple, Optional
+
+import iojobs
+
+
+class FileBase(NamedTuple):
+    stamp: Optional[tuple]  # (mtime_ns, size) as last read or written
+    digests: Dict[str, int]  # key -> record_digest of the record
+    tabs: List[dict]  # name and fields of each tab
+
+
+class FileChanges(NamedTuple):
+    base: FileBase  # The file as now on disk
+    changed: Dict[str, dict]  # Records new or different on disk
+    removed: List[str]  # Keys no longer on disk
+    tabs: List[dict]  # name and fields of each tab on disk
+
+
+def file_stamp(path: str) -> Optional[tuple]:
+    try:
+        status = os.stat(path)
+    except OSError:
+        return None
+    return status.st_mtime_ns, status.st_size
+
+
+def record_digest(record: Optional[dict]) -> Optional[int]:
+    """Hash of a record's contents, None for a missing record"""
+    if record is None:
+        return None
+    try:
+        return hash(frozenset(record.items()))
+    except TypeError:  # Unhashable values such as lists
+        return hash(repr(sorted(record.items(), key=repr)))
+
+
+def make_base(
+    stamp: Optional[tuple], tabs: List[dict], networks: Dict[str, dict]
+) -> FileBase:
+    """Base for a file just read or written; call in the I/O thread.
+
+    Each tab's field mapping is copied, as views add and replace fields in
+    theirs; the settings themselves are never changed in place.
+    """
+    return FileBase(
+        stamp,
+        {key: record_digest(record) for key, record in networks.items()},
+        [
+            {"name": tab["name"], "fields": dict(tab["fields"])}
+            for tab in tabs
+        ],
+    )
+
+
+def read_changes(path: str, base: FileBase, job) -> Optional[FileChanges]:
+    """Parse the file again and compare it with base.
+
+    Returns None if the file has not changed since base was taken.
+    """
+    stamp = file_stamp(path)
+    if stamp is None or stamp == base.stamp:
+        return None
+    loaded = iojobs.load_yaml(path, job)
+    new = make_base(stamp, loaded.tabs or [], loaded.networks)
+    old = base.digests
+    changed = {
+        key: record
+        for key, record in loaded.networks.items()
+        if old.get(key) != new.digests[key]
+    }
+    removed = [key for key in old if key not in new.digests]
+    return FileChanges(new, changed, removed, new.tabs)
+
+
+def field_changes(base: dict, disk: dict, local: dict) -> tuple:
+    """Three-way merge of one tab's fields.
+
+    Returns:
+        ({name: settings, or None to remove} to apply, [conflicting names])
+    """
+    apply, conflicts = {}, []
+    for name in base.keys() | disk.keys():
+        old, new = base.get(name), disk.get(name)
+        if old == new:
+            continue
+        mine = local.get(name)
+        if mine == new:
+            continue
+        if mine != old:
+            conflicts.append(name)
+        else:
+            apply[name] = new
+    return apply, sorted(conflicts)
@@ -0,0 +1,80 @@
+"""Least-recently-used cache of generated grids shared by all tabs.
+
+A grid is stored under the tab and the block it shows. Alongside it the
+field-configuration and networks versions it was built from are kept, so a
+lookup only hits when neither has changed since. The cache holds at most
+``budget`` bytes by a rough size estimate; older grids are dropped first.
+"""
+
+import sys
+from collections import OrderedDict
+from typing import Hashable, List, Optional, Tuple
+
+DEFAULT_BUDGET = 256 * 1024 * 1024
+
+
+def estimate_size(data: List[List[dict]]) -> int:
+    """Rough number of bytes held by a grid's rows, cells and cell values"""
+    size = sys.getsizeof(data)
+    for row in data:
+        size += sys.getsizeof(row)
+        for cell in row:
+            size += sys.getsizeof(cell)
+            for value in cell.values():
+                if isinstance(value, str):
+                    size += sys.getsizeof(value)
+    return size
+
+
+class GridCache:
+    """Grids keyed by (owner, network, start, end) and checked by version"""
+
+    def __init__(self, budget: int = DEFAULT_BUDGET):
+        self.budget = budget
+        self.used = 0
+        self._entries = OrderedDict()  # key -> (versions, data, spans, size)
+
+    def get(self, key: Hashable, versions: Tuple) -> Optional[tuple]:
+        """Return (data, spans) if cached for these versions, else None"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] != versions:
+            self._drop(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry[1], entry[2]
+
+    def put(self, key: Hashable, versions: Tuple, data, spans):
+        """Store a grid, evicting the least recently used ones to fit"""
+        self._drop(key)
+        size = estimate_size(data)
+        if size > self.budget:
+            return
+        while self._entries and self.used + size > self.budget:
+            self._drop(next(iter(self._entries)))
+        self._entries[key] = (versions, data, spans, size)
+        self.used += size
+
+    def update_versions(self, key: Hashable, versions: Tuple):
+        """Re-tag a grid that was updated in place to match new versions"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries[key] = (versions,) + entry[1:]
+
+    def discard_owner(self, owner: Hashable):
+        """Drop every grid of one owner, e.g. when its tab is closed"""
+        for key in [key for key in self._entries if key[0] == owner]:
+            self._drop(key)
+
+    def clear(self):
+        self._entries.clear()
+        self.used = 0
+
+    def _drop(self, key: Hashable):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.used -= entry[3]
+
+    def __len__(self) -> int:
+        return len(self._entries)
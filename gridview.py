@@ -0,0 +1,246 @@
+"""Custom-painted subnet grid.
+
+Column ``c`` of a grid with ``n`` columns holds blocks spanning
+``2 ** (n - 1 - c)`` rows, so the merged cell containing any (row, column)
+is found arithmetically. Only cells intersecting the viewport are painted
+and no per-span bookkeeping is needed, unlike ``QTableView.setSpan``.
+"""
+
+from PyQt6 import QtCore, QtWidgets
+from PyQt6.QtCore import Qt, QRect
+from PyQt6.QtGui import QPainter, QPen
+
+import tracing
+
+
+class SubnetGridView(QtWidgets.QAbstractScrollArea):
+    """Scrollable view of a TableModel grid with hierarchical merged cells"""
+
+    clicked = QtCore.pyqtSignal(QtCore.QModelIndex)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._model = None
+        self._current = None  # (row, column) of the selected merged cell
+        self.column_width = 170
+        self.row_height = self.fontMetrics().height() + 8
+        self.header_height = self.fontMetrics().height() + 10
+        self.setFocusPolicy(Qt.FocusPolicy.StrongFocus)
+        self.verticalScrollBar().setSingleStep(self.row_height)
+        self.horizontalScrollBar().setSingleStep(self.column_width // 4)
+
+    # Model handling
+
+    def setModel(self, model):
+        if self._model is not None:
+            self._model.layoutChanged.disconnect(self._model_changed)
+            self._model.modelReset.disconnect(self._model_changed)
+            self._model.dataChanged.disconnect(self._cells_changed)
+        self._model = model
+        self._current = None
+        if model is not None:
+            model.layoutChanged.connect(self._model_changed)
+            model.modelReset.connect(self._model_changed)
+            model.dataChanged.connect(self._cells_changed)
+        self._model_changed()
+
+    def model(self):
+        return self._model
+
+    def _model_changed(self, *args):
+        if self._current and self._current[0] >= self.row_count():
+            self._current = None
+        self._update_scrollbars()
+        self.viewport().update()
+
+    def _cells_changed(self, top_left, bottom_right, roles=()):
+        """Repaint only the merged cells in a changed range"""
+        top, left = self.cell_at(top_left.row(), top_left.column())
+        rect = self.cell_rect(top, left).united(
+            self.cell_rect(*self.cell_at(bottom_right.row(), bottom_right.column()))
+        )
+        self.viewport().update(rect)
+
+    def row_count(self) -> int:
+        if self._model is None:
+            return 0
+        return self._model.rowCount(QtCore.QModelIndex())
+
+    def column_count(self) -> int:
+        if self._model is None or self.row_count() == 0:
+            return 0
+        return self._model.columnCount(QtCore.QModelIndex())
+
+    # Geometry
+
+    def span(self, column: int) -> int:
+        """Number of rows covered by each block in a column"""
+        return 1 << (self.column_count() - 1 - column)
+
+    def cell_at(self, row: int, column: int) -> tuple:
+        """Return the (top row, column) of the merged cell containing a cell"""
+        return row - row % self.span(column), column
+
+    def cell_rect(self, row: int, column: int) -> QRect:
+        """Viewport rectangle of the merged cell starting at row"""
+        x = column * self.column_width - self.horizontalScrollBar().value()
+        y = (
+            self.header_height
+            + row * self.row_height
+            - self.verticalScrollBar().value()
+        )
+        return QRect(x, y, self.column_width, self.span(column) * self.row_height)
+
+    def grid_size(self) -> QtCore.QSize:
+        """Size of the whole grid including the header"""
+        return QtCore.QSize(
+            self.column_count() * self.column_width,
+            self.header_height + self.row_count() * self.row_height,
+        )
+
+    def _update_scrollbars(self):
+        size = self.grid_size()
+        viewport = self.viewport().size()
+        self.horizontalScrollBar().setPageStep(viewport.width())
+        self.horizontalScrollBar().setRange(
+            0, max(0, size.width() - viewport.width())
+        )
+        self.verticalScrollBar().setPageStep(viewport.height())
+        self.verticalScrollBar().setRange(
+            0, max(0, size.height() - viewport.height())
+        )
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._update_scrollbars()
+
+    def scrollContentsBy(self, dx, dy):
+        self.viewport().update()
+
+    # Painting
+
+    def paintEvent(self, event):
+        painter = QPainter(self.viewport())
+        painter.fillRect(event.rect(), self.palette().base())
+        columns = self.column_count()
+        if columns:
+            self.paint_cells(painter, event.rect())
+            self.paint_header(painter)
+        painter.end()
+
+    @tracing.traced("grid.paint")
+    def paint_cells(self, painter, clip: QRect):
+        """Paint every merged cell intersecting clip"""
+        model = self._model
+        grid_pen = QPen(self.palette().mid().color())
+        rows = self.row_count()
+        scroll_y = self.verticalScrollBar().value()
+        top = clip.top() - self.header_height + scroll_y
+        bottom = clip.bottom() - self.header_height + scroll_y
+        first_row = max(0, top // self.row_height)
+        last_row = min(rows - 1, bottom // self.row_height)
+        scroll_x = self.horizontalScrollBar().value()
+        first_col = max(0, (clip.left() + scroll_x) // self.column_width)
+        last_col = min(
+            self.column_count() - 1, (clip.right() + scroll_x) // self.column_width
+        )
+
+        # Keep labels of tall merged cells on screen while scrolling
+        visible = QRect(
+            0,
+            self.header_height,
+            self.viewport().width(),
+            self.viewport().height() - self.header_height,
+        )
+
+        for column in range(first_col, last_col + 1):
+            span = self.span(column)
+            row = first_row - first_row % span
+            while row <= last_row:
+                rect = self.cell_rect(row, column)
+                index = model.index(row, column)
+                if background := model.data(index, Qt.ItemDataRole.BackgroundRole):
+                    painter.fillRect(rect, background)
+                painter.setPen(grid_pen)
+                painter.drawRect(rect.adjusted(0, 0, -1, -1))
+
+                foreground = model.data(index, Qt.ItemDataRole.ForegroundRole)
+                painter.setPen(foreground or self.palette().text().color())
+                text = model.data(index, Qt.ItemDataRole.DisplayRole) or ""
+                painter.drawText(
+                    rect.intersected(visible).adjusted(4, 2, -4, -2),
+                    Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignTop,
+                    text.rstrip("\n"),
+                )
+
+                if self._current == (row, column):
+                    painter.setPen(QPen(self.palette().highlight().color(), 2))
+                    painter.drawRect(rect.adjusted(1, 1, -2, -2))
+                row += span
+
+    def paint_header(self, painter):
+        """Paint the column header strip, which does not scroll vertically"""
+        painter.setPen(self.palette().text().color())
+        for column in range(self.column_count()):
+            x = column * self.column_width - self.horizontalScrollBar().value()
+            rect = QRect(x, 0, self.column_width, self.header_height)
+            painter.fillRect(rect, self.palette().button())
+            painter.drawRect(rect.adjusted(0, 0, -1, -1))
+            label = self._model.headerData(
+                column, Qt.Orientation.Horizontal, Qt.ItemDataRole.DisplayRole
+            )
+            painter.drawText(rect, Qt.AlignmentFlag.AlignCenter, str(label or ""))
+
+    # Selection
+
+    def selectedIndexes(self) -> list:
+        if self._model is None or self._current is None:
+            return []
+        return [self._model.index(*self._current)]
+
+    def select(self, row: int, column: int):
+        """Select the merged cell containing (row, column) and emit clicked"""
+        self._current = self.cell_at(row, column)
+        self.ensure_visible(*self._current)
+        self.viewport().update()
+        self.clicked.emit(self._model.index(*self._current))
+
+    def ensure_visible(self, row: int, column: int):
+        """Scroll so the top of the merged cell at (row, column) is visible"""
+        scrollbar = self.verticalScrollBar()
+        visible = self.viewport().height() - self.header_height
+        top = row * self.row_height
+        bottom = top + self.span(column) * self.row_height
+        if top < scrollbar.value():
+            scrollbar.setValue(top)
+        elif bottom > scrollbar.value() + visible:
+            scrollbar.setValue(min(top, bottom - visible))
+
+    def mousePressEvent(self, event):
+        position = event.position().toPoint()
+        if self._model is None or position.y() < self.header_height:
+            return super().mousePressEvent(event)
+        row = (
+            position.y() - self.header_height + self.verticalScrollBar().value()
+        ) // self.row_height
+        column = (
+            position.x() + self.horizontalScrollBar().value()
+        ) // self.column_width
+        if 0 <= row < self.row_count() and 0 <= column < self.column_count():
+            self.select(row, column)
+
+    def keyPressEvent(self, event):
+        if self._current is None:
+            return super().keyPressEvent(event)
+        row, column = self._current
+        key = event.key()
+        if key == Qt.Key.Key_Up and row > 0:
+            self.select(row - 1, column)
+        elif key == Qt.Key.Key_Down and row + self.span(column) < self.row_count():
+            self.select(row + self.span(column), column)
+        elif key == Qt.Key.Key_Left and column > 0:
+            self.select(row, column - 1)
+        elif key == Qt.Key.Key_Right and column + 1 < self.column_count():
+            self.select(row, column + 1)
+        else:
+            super().keyPressEvent(event)
@@ -0,0 +1,265 @@
+"""Hilbert-curve overview of a supernet.
+
+Each pixel is one block at the chosen resolution prefix, laid out along a
+Hilbert curve so that neighbouring addresses stay close together. An aligned
+run of 4**j pixels on the curve is always a 2**j square, so every network
+is painted as one or two rectangle fills instead of pixel by pixel.
+"""
+
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from PyQt6 import QtCore, QtWidgets
+from PyQt6.QtCore import QRect
+from PyQt6.QtGui import QColor, QImage, QPainter
+
+import cidrutil
+
+MAX_ORDER = 12  # 4096 x 4096 pixels
+
+# Curve orientations are (swap, flip) pairs: optionally swap x and y, then
+# optionally mirror both. Digit d of the base curve lands in BASE[d] and its
+# sub-curve is transformed by SUB[d].
+BASE = ((0, 0), (0, 1), (1, 1), (1, 0))
+SUB = ((1, 0), (0, 0), (0, 0), (1, 1))
+
+
+def _orient(state: int, x: int, y: int) -> Tuple[int, int]:
+    swap, flip = state >> 1, state & 1
+    if swap:
+        x, y = y, x
+    if flip:
+        x, y = 1 - x, 1 - y
+    return x, y
+
+
+def _build_tables(digits: int):
+    """Map (state, chunk of digits) to (x bits, y bits, next state)"""
+    table = []
+    for state in range(4):
+        for chunk in range(4**digits):
+            x = y = 0
+            current = state
+            for shift in range(digits - 1, -1, -1):
+                digit = (chunk >> (2 * shift)) & 3
+                bx, by = _orient(current, *BASE[digit])
+                x, y = (x << 1) | bx, (y << 1) | by
+                swap, flip = SUB[digit]
+                current ^= (swap << 1) | flip
+            table.append((x, y, current))
+    return table
+
+
+_STEP1 = _build_tables(1)
+_STEP4 = _build_tables(4)
+
+
+def d2xy(order: int, d: int) -> Tuple[int, int]:
+    """Return the (x, y) pixel of position d on a Hilbert curve of this order"""
+    x = y = state = 0
+    digits = order
+    while digits % 4:
+        digits -= 1
+        bx, by, state = _STEP1[state * 4 + ((d >> (2 * digits)) & 3)]
+        x, y = (x << 1) | bx, (y << 1) | by
+    while digits:
+        digits -= 4
+        bx, by, state = _STEP4[state * 256 + ((d >> (2 * digits)) & 255)]
+        x, y = (x << 4) | bx, (y << 4) | by
+    return x, y
+
+
+def xy2d(order: int, x: int, y: int) -> int:
+    """Return the curve position of pixel (x, y), the inverse of d2xy"""
+    d = state = 0
+    for shift in range(order - 1, -1, -1):
+        bx, by = (x >> shift) & 1, (y >> shift) & 1
+        for digit in range(4):
+            if _orient(state, *BASE[digit]) == (bx, by):
+                break
+        d = (d << 2) | digit
+        swap, flip = SUB[digit]
+        state ^= (swap << 1) | flip
+    return d
+
+
+class HeatmapLayout:
+    """Maps addresses inside a supernet to Hilbert-curve pixels"""
+
+    def __init__(self, supernet_address: int, supernet_prefix: int, resolution: int):
+        """
+        Args:
+            supernet_address: First address of the supernet
+            supernet_prefix: Prefix length of the supernet
+            resolution: Prefix length represented by one pixel. It is rounded
+                up to keep the image square and capped at MAX_ORDER.
+        """
+        resolution = max(resolution, supernet_prefix)
+        if (resolution - supernet_prefix) % 2:
+            resolution += 1
+        resolution = min(
+            resolution, supernet_prefix + 2 * MAX_ORDER, cidrutil.ADDRESS_BITS
+        )
+        if (resolution - supernet_prefix) % 2:
+            resolution -= 1
+        self.start, self.end = cidrutil.network_range(
+            supernet_address, supernet_prefix
+        )
+        self.prefix = supernet_prefix
+        self.resolution = resolution
+        self.order = (resolution - supernet_prefix) // 2
+        self.side = 1 << self.order
+        self.pixel_bits = cidrutil.ADDRESS_BITS - resolution
+
+    def block_rects(self, start: int, prefixlen: int) -> Iterable[QRect]:
+        """Yield the pixel rectangles covered by a block of at least one pixel"""
+        count = 1 << (self.resolution - prefixlen)
+        d = (start - self.start) >> self.pixel_bits
+        level = (self.resolution - prefixlen) // 2
+        size = 1 << level
+        # An odd prefix difference gives two squares of 4**level pixels
+        for offset in range(0, count, size * size):
+            x, y = d2xy(self.order, d + offset)
+            mask = ~(size - 1)
+            yield QRect(x & mask, y & mask, size, size)
+
+    def pixel_network(self, x: int, y: int) -> Tuple[int, int]:
+        """Return the (address, prefixlen) block shown by a pixel"""
+        d = xy2d(self.order, x, y)
+        return self.start + (d << self.pixel_bits), self.resolution
+
+
+def _networks_inside(layout: HeatmapLayout, networks) -> list:
+    """Return (start, prefixlen, key) for networks within the supernet.
+
+    A network store finds them by bisecting its sorted keys; other
+    mappings are scanned.
+    """
+    if hasattr(networks, "keys_within"):
+        keys = networks.keys_within(layout.start, layout.prefix)
+    else:
+        keys = networks.keys()
+    inside = []
+    for key in keys:
+        parsed = cidrutil.parse_cidr(key)
+        if parsed is None or parsed[1] < layout.prefix:
+            continue
+        start = parsed[0] & cidrutil.netmask(parsed[1])
+        if layout.start <= start < layout.end:
+            inside.append((start, parsed[1], key))
+    return inside
+
+
+def render_colors(
+    layout: HeatmapLayout,
+    networks,
+    color_for: Callable[[dict], Optional[str]],
+    background: str = "white",
+) -> QImage:
+    """Render networks coloured by a rule function, smaller networks on top"""
+    image = QImage(layout.side, layout.side, QImage.Format.Format_RGB32)
+    image.fill(QColor(background))
+    painter = QPainter(image)
+    for start, prefixlen, key in sorted(
+        _networks_inside(layout, networks), key=lambda item: item[1]
+    ):
+        color = color_for(networks.get(key) or {})
+        if not color:
+            continue
+        color = QColor(color)
+        if prefixlen > layout.resolution:
+            # Smaller than a pixel: colour the pixel that contains it
+            start >>= layout.pixel_bits
+            start <<= layout.pixel_bits
+            prefixlen = layout.resolution
+        for rect in layout.block_rects(start, prefixlen):
+            painter.fillRect(rect, color)
+    painter.end()
+    return image
+
+
+def render_utilization(layout: HeatmapLayout, networks) -> QImage:
+    """Render the fraction of each pixel's addresses covered by any network"""
+    image = QImage(layout.side, layout.side, QImage.Format.Format_RGB32)
+    image.fill(QColor("white"))
+
+    # Merge networks into disjoint covered ranges
+    ranges = []
+    for start, prefixlen, key in sorted(_networks_inside(layout, networks)):
+        end = start + cidrutil.block_size(prefixlen)
+        if ranges and start <= ranges[-1][1]:
+            ranges[-1][1] = max(ranges[-1][1], end)
+        else:
+            ranges.append([start, end])
+
+    full = QColor(180, 0, 0)
+    partial: Dict[int, int] = {}
+    pixel_size = 1 << layout.pixel_bits
+    painter = QPainter(image)
+    for start, end in ranges:
+        first_full = -(-start // pixel_size) * pixel_size
+        last_full = end // pixel_size * pixel_size
+        if first_full > last_full:
+            # The whole range sits inside one pixel
+            pixel = start // pixel_size
+            partial[pixel] = partial.get(pixel, 0) + end - start
+            continue
+        if start < first_full:
+            pixel = start // pixel_size
+            partial[pixel] = partial.get(pixel, 0) + first_full - start
+        if end > last_full:
+            pixel = last_full // pixel_size
+            partial[pixel] = partial.get(pixel, 0) + end - last_full
+        for address, prefixlen in cidrutil.range_to_blocks(first_full, last_full):
+            for rect in layout.block_rects(address, prefixlen):
+                painter.fillRect(rect, full)
+    painter.end()
+
+    for pixel, used in partial.items():
+        fraction = min(1.0, used / pixel_size)
+        x, y = d2xy(layout.order, pixel - (layout.start >> layout.pixel_bits))
+        shade = int(255 - 255 * fraction)
+        image.setPixelColor(x, y, QColor(255 - int(75 * fraction), shade, shade))
+    return image
+
+
+class HeatmapView(QtWidgets.QWidget):
+    """Shows a heatmap image scaled to fit and reports clicked blocks"""
+
+    blockClicked = QtCore.pyqtSignal(str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.image = None
+        self.layout_info = None
+        self.setMinimumSize(256, 256)
+
+    def set_image(self, image: QImage, layout: HeatmapLayout):
+        self.image = image
+        self.layout_info = layout
+        self.update()
+
+    def _target_rect(self) -> QRect:
+        side = min(self.width(), self.height())
+        return QRect(
+            (self.width() - side) // 2, (self.height() - side) // 2, side, side
+        )
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), self.palette().window())
+        if self.image is not None:
+            painter.drawImage(self._target_rect(), self.image)
+        painter.end()
+
+    def mousePressEvent(self, event):
+        if self.image is None:
+            return
+        target = self._target_rect()
+        position = event.position().toPoint()
+        if not target.contains(position):
+            return
+        side = self.layout_info.side
+        x = (position.x() - target.left()) * side // target.width()
+        y = (position.y() - target.top()) * side // target.height()
+        address, prefixlen = self.layout_info.pixel_network(x, y)
+        self.blockClicked.emit(cidrutil.format_cidr(address, prefixlen))
@@ -0,0 +1,245 @@
+"""Undo and redo for network and field edits.
+
+A history step holds only what is needed to reverse it: the previous record
+of every network key it touched and the previous settings of every field it
+changed. Network records and field settings are replaced as a whole rather
+than mutated, so a step keeps references to the old values instead of
+copies and costs memory in proportion to the change, never to the dataset.
+
+Undoing a step applies its old values and records the values they replace
+as the matching redo step.
+
+Undo and redo steps share one memory budget. When it is exceeded the redo
+steps furthest from the present go first, then the oldest undo steps. A
+step bigger than the whole budget is not kept, and as nothing before it
+can be undone correctly either, the history is cleared.
+"""
+
+import sys
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional, Tuple
+
+from netstore import MISSING, NetworkStore
+
+DEFAULT_DEPTH = 100
+DEFAULT_MEMORY = 64 * 1024 * 1024
+
+
+def _sizeof(value) -> int:
+    """Rough size of a record or field setting and its direct contents"""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        for key, item in value.items():
+            size += sys.getsizeof(key) + sys.getsizeof(item)
+    return size
+
+
+class Step:
+    """Old values of everything one user action changed"""
+
+    def __init__(self, label: str):
+        self.label = label
+        self.networks: Dict[str, object] = {}  # key -> old record or MISSING
+        self.fields: Dict[Tuple[object, str], object] = {}  # (owner, name) -> old
+        self.size = 0
+
+    def __bool__(self) -> bool:
+        return bool(self.networks or self.fields)
+
+    def measure(self) -> int:
+        self.size = sys.getsizeof(self.networks) + sys.getsizeof(self.fields)
+        for key, old in self.networks.items():
+            self.size += sys.getsizeof(key)
+            if old is not MISSING:
+                self.size += _sizeof(old)
+        for old in self.fields.values():
+            if old is not MISSING:
+                self.size += _sizeof(old)
+        return self.size
+
+
+class History:
+    """Undo and redo stacks for a network store and per-tab field settings.
+
+    Field owners are objects with a ``fields`` dict and a ``fields_restored()``
+    method called after undo or redo changed their fields.
+    """
+
+    def __init__(
+        self,
+        store: NetworkStore,
+        max_depth: int = DEFAULT_DEPTH,
+        max_memory: int = DEFAULT_MEMORY,
+        on_change: Optional[Callable[[], None]] = None,
+        on_too_large: Optional[Callable[[str], None]] = None,
+    ):
+        """
+        Args:
+            store: Network store whose changes are recorded
+            max_depth: Most undo steps kept
+            max_memory: Most bytes, by estimate, kept across all steps
+            on_change: Called whenever what can be undone or redone changes
+            on_too_large: Called with a step's label when the step alone
+                exceeds max_memory and so cannot be undone
+        """
+        self.store = store
+        self.max_depth = max_depth
+        self.max_memory = max_memory
+        self.on_change = on_change
+        self.on_too_large = on_too_large
+        self._undo: deque = deque()
+        self._redo: deque = deque()
+        self._open: Optional[Step] = None
+        self._depth = 0
+        self._replaying = False
+        store.recorder = self._record_network
+
+    # Recording
+
+    @contextmanager
+    def step(self, label: str):
+        """Record every change made inside the block as one undo step"""
+        if self._depth == 0:
+            self._open = Step(label)
+        self._depth += 1
+        try:
+            with self.store.batch():
+                yield
+        finally:
+            self._depth -= 1
+            if self._depth == 0:
+                step, self._open = self._open, None
+                self._push(step)
+
+    def _record_network(self, key: Optional[str], old):
+        if key is None:
+            # Wholesale replacement, e.g. loading a file, is not undoable
+            self.clear()
+            return
+        if self._open is None:
+            with self.step("Edit network"):
+                self._open.networks.setdefault(key, old)
+        else:
+            self._open.networks.setdefault(key, old)
+
+    def record_field(self, owner, name: str, label: str = "Change field"):
+        """Remember a field's settings before they are replaced"""
+        old = owner.fields.get(name, MISSING)
+        if self._open is None:
+            with self.step(label):
+                self._open.fields.setdefault((owner, name), old)
+        else:
+            self._open.fields.setdefault((owner, name), old)
+
+    def _push(self, step: Step):
+        if not step or self._replaying:
+            return
+        step.measure()
+        self._redo.clear()
+        if step.size > self.max_memory:
+            # Older steps cannot be undone past a change that was not kept
+            self._undo.clear()
+            if self.on_too_large:
+                self.on_too_large(step.label)
+        else:
+            self._undo.append(step)
+            self._trim()
+        self._changed()
+
+    def _trim(self):
+        """Drop the furthest redo steps, then the oldest undo steps, until
+        both limits are met"""
+        used = self.memory_used()
+        while self._redo and used > self.max_memory:
+            used -= self._redo.popleft().size
+        while self._undo and (
+            len(self._undo) > self.max_depth or used > self.max_memory
+        ):
+            used -= self._undo.popleft().size
+
+    def _changed(self):
+        if self.on_change:
+            self.on_change()
+
+    # Undo and redo
+
+    def can_undo(self) -> bool:
+        return bool(self._undo)
+
+    def can_redo(self) -> bool:
+        return bool(self._redo)
+
+    def undo_label(self) -> Optional[str]:
+        return self._undo[-1].label if self._undo else None
+
+    def redo_label(self) -> Optional[str]:
+        return self._redo[-1].label if self._redo else None
+
+    def undo(self) -> Optional[str]:
+        """Reverse the latest step; returns its label, or None if none"""
+        if not self._undo:
+            return None
+        step = self._undo.pop()
+        self._redo.append(self._apply(step))
+        self._trim()
+        self._changed()
+        return step.label
+
+    def redo(self) -> Optional[str]:
+        """Re-apply the latest undone step; returns its label, or None"""
+        if not self._redo:
+            return None
+        step = self._redo.pop()
+        self._undo.append(self._apply(step))
+        self._trim()
+        self._changed()
+        return step.label
+
+    def _apply(self, step: Step) -> Step:
+        """Restore a step's old values and return the step reversing that"""
+        inverse = Step(step.label)
+        self._open, self._depth, self._replaying = inverse, 1, True
+        try:
+            with self.store.batch():
+                for key, old in step.networks.items():
+                    if old is MISSING:
+                        self.store.pop(key, None)
+                    else:
+                        self.store[key] = old
+            owners = []
+            for (owner, name), old in step.fields.items():
+                self.record_field(owner, name)
+                if old is MISSING:
+                    owner.fields.pop(name, None)
+                else:
+                    owner.fields[name] = old
+                if owner not in owners:
+                    owners.append(owner)
+        finally:
+            self._open, self._depth, self._replaying = None, 0, False
+        for owner in owners:
+            owner.fields_restored()
+        inverse.measure()
+        return inverse
+
+    def forget(self, owner):
+        """Drop field changes of an owner that no longer exists"""
+        for stack in (self._undo, self._redo):
+            for step in stack:
+                for key in [key for key in step.fields if key[0] is owner]:
+                    del step.fields[key]
+            for step in [step for step in stack if not step]:
+                stack.remove(step)
+        self._changed()
+
+    def memory_used(self) -> int:
+        """Estimated bytes held by the undo and redo steps"""
+        return sum(step.size for step in self._undo) + sum(
+            step.size for step in self._redo
+        )
+
+    def clear(self):
+        self._undo.clear()
+        self._redo.clear()
+        self._changed()
@@ -0,0 +1,199 @@
+"""Import and merge many data files into the current session.
+
+Files are parsed concurrently in a process pool, so an import takes about
+as long as its slowest file. The parsed files are then merged into the
+network store in the order they were given, one file after another, and
+every key whose record differs from the one already present is resolved
+by a conflict policy and reported.
+"""
+
+import os
+from typing import Dict, List, NamedTuple, Optional
+
+import yaml
+from PyQt6 import QtCore
+
+import dbops
+import workers
+
+KEEP = "keep"  # Keep the existing record
+OVERWRITE = "overwrite"  # Take the imported record
+FLAG = "flag"  # Keep the existing record and report it for review
+POLICIES = (KEEP, OVERWRITE, FLAG)
+
+ACCESS_EXTENSIONS = (".accdb", ".mdb")
+
+# The C loader is several times faster when PyYAML was built with libyaml
+_Loader = getattr(yaml, "CFullLoader", yaml.FullLoader)
+
+
+class Conflict(NamedTuple):
+    key: str
+    source: str  # File the incoming record came from
+    existing: dict
+    incoming: dict
+    resolution: str  # KEEP, OVERWRITE or FLAG
+
+
+class ImportResult(NamedTuple):
+    changes: Dict[str, dict]  # Records to add or replace
+    fields: Dict[str, dict]  # Field configurations not yet known
+    conflicts: List[Conflict]
+    errors: List[str]  # "path: message" for files that could not be read
+    files: int
+
+
+def read_file(path: str) -> List[dict]:
+    """Parse one file into tab dicts with name, fields and networks.
+
+    Multi-tab YAML saves, legacy single-view YAML snapshots (``data`` and
+    ``fields``) and Access databases are understood.
+
+    Raises:
+        ValueError: If the file cannot be read
+    """
+    if path.lower().endswith(ACCESS_EXTENSIONS):
+        available, msg = dbops.is_access_available()
+        if not available:
+            raise ValueError(msg)
+        with dbops.AccessDatabase(path) as db:
+            tabs_data = db.load_data()
+        if tabs_data is None:
+            raise ValueError("Failed to load data from database")
+        return tabs_data
+
+    with open(path, "r") as F1:
+        saveData = yaml.load(F1, Loader=_Loader)
+    if not isinstance(saveData, dict):
+        raise ValueError("Not a saved IP-Visualizer file")
+    if "tabs" in saveData:
+        return saveData["tabs"]
+    return [
+        {
+            "name": os.path.basename(path),
+            "fields": saveData.get("fields") or {},
+            "networks": saveData.get("data") or {},
+        }
+    ]
+
+
+def merge(
+    networks,
+    known_fields: Dict[str, dict],
+    files: List[tuple],
+    policy: str = FLAG,
+) -> ImportResult:
+    """Work out what importing parsed files would change.
+
+    Nothing is modified; the caller applies ``changes`` and ``fields`` so
+    the whole import can be one undoable step.
+
+    Args:
+        networks: Current networks mapping
+        known_fields: Field configurations already in the session
+        files: (path, tabs) pairs in the order they should be applied
+        policy: KEEP, OVERWRITE or FLAG for keys that already exist
+    """
+    if policy not in POLICIES:
+        raise ValueError(f"Unknown conflict policy {policy!r}")
+    changes: Dict[str, dict] = {}
+    fields: Dict[str, dict] = {}
+    conflicts: List[Conflict] = []
+    for path, tabs in files:
+        source = os.path.basename(path)
+        for tab_data in tabs:
+            for name, field_data in (tab_data.get("fields") or {}).items():
+                if name not in known_fields and name not in fields:
+                    fields[name] = field_data
+            for key, record in (tab_data.get("networks") or {}).items():
+                record = record or {}
+                existing = changes.get(key)
+                if existing is None:
+                    existing = networks.get(key)
+                if existing is None:
+                    changes[key] = record
+                elif existing != record:
+                    conflicts.append(Conflict(key, source, existing, record, policy))
+                    if policy == OVERWRITE:
+                        changes[key] = record
+    return ImportResult(changes, fields, conflicts, [], len(files))
+
+
+def import_files(
+    paths: List[str],
+    networks,
+    known_fields: Dict[str, dict],
+    policy: str = FLAG,
+    max_workers=None,
+    progress=None,
+) -> ImportResult:
+    """Parse files in a process pool and merge them in the given order"""
+    parsed: List[Optional[List[dict]]] = [None] * len(paths)
+    errors = []
+    with workers.spawn_pool(max_workers) as pool:
+        arguments = [(path,) for path in paths]
+        for index, future in workers.run_all(pool, read_file, arguments, progress):
+            if future.exception() is None:
+                parsed[index] = future.result()
+            else:
+                errors.append(f"{paths[index]}: {future.exception()}")
+    files = [(path, tabs) for path, tabs in zip(paths, parsed) if tabs is not None]
+    result = merge(networks, known_fields, files, policy)
+    return result._replace(errors=errors)
+
+
+def format_report(result: ImportResult, limit: int = 500) -> str:
+    """Plain text conflict and error report for display or saving"""
+    lines = [
+        f"Imported {result.files} files: {len(result.changes)} networks added or "
+        f"replaced, {len(result.fields)} new fields, "
+        f"{len(result.conflicts)} conflicts, {len(result.errors)} errors"
+    ]
+    lines.extend(f"Error: {error}" for error in result.errors)
+    for conflict in result.conflicts[:limit]:
+        lines.append(
+            f"{conflict.key} ({conflict.source}, {conflict.resolution}): "
+            f"{conflict.existing} -> {conflict.incoming}"
+        )
+    if len(result.conflicts) > limit:
+        lines.append(f"... {len(result.conflicts) - limit} more conflicts")
+    return "\n".join(lines)
+
+
+class ImportWorker(QtCore.QObject):
+    """Runs import_files from a QThread so the GUI stays responsive.
+
+    The merge reads a snapshot of the networks taken on the GUI thread,
+    never the live store, and the GUI applies the result.
+    """
+
+    progress = QtCore.pyqtSignal(int, int)
+    finished = QtCore.pyqtSignal(object)
+    failed = QtCore.pyqtSignal(str)
+
+    def __init__(self, paths, networks, known_fields, policy):
+        """
+        Args:
+            paths: Files to import
+            networks: Plain dict snapshot of the networks, e.g. to_dict()
+            known_fields: Field settings already defined
+            policy: FLAG, KEEP or OVERWRITE
+        """
+        super().__init__()
+        self.paths = paths
+        self.networks = networks
+        self.known_fields = known_fields
+        self.policy = policy
+
+    def run(self):
+        try:
+            result = import_files(
+                self.paths,
+                self.networks,
+                self.known_fields,
+                self.policy,
+                progress=self.progress.emit,
+            )
+            self.finished.emit(result)
+        except Exception as e:
+            self.failed.emit(str(e))
@@ -0,0 +1,250 @@
+"""Background jobs for loading and saving files and databases.
+
+The main window runs all of its file and database I/O through one
+``JobRunner``, which lives in its own thread and runs jobs one at a time
+in the order they were submitted. Reads and writes of the same file never
+overlap, and a database connection is only ever used from that thread.
+
+A ``Job`` reports progress in bytes or rows, can be cancelled between
+steps, and hands its result back to the GUI thread through its signals,
+where only the final swap into the model happens.
+"""
+
+import logging
+import os
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+import yaml
+from PyQt6 import QtCore
+
+import csvio
+import tracing
+import validation
+
+READ_CHARS = 1 << 20  # Characters read between progress reports
+REPORT_CHARS = 1 << 20  # Characters written between progress reports
+
+# The C loader is several times faster when PyYAML was built with libyaml
+_Loader = getattr(yaml, "CFullLoader", yaml.FullLoader)
+
+
+class _Dumper(yaml.Dumper):
+    """Writes settings shared between tabs out in full under each tab"""
+
+    def ignore_aliases(self, data):
+        return True
+
+
+class Cancelled(Exception):
+    """Raised inside a job once it has been cancelled"""
+
+
+class Job(QtCore.QObject):
+    """One unit of background I/O.
+
+    ``function(job)`` runs in the runner's thread. It calls ``report`` as
+    it goes, which raises Cancelled once the job is cancelled; its return
+    value is emitted with ``finished``.
+    """
+
+    progress = QtCore.pyqtSignal(int, int)  # done, total (0 if unknown)
+    finished = QtCore.pyqtSignal(object)
+    failed = QtCore.pyqtSignal(str)
+    cancelled = QtCore.pyqtSignal()
+
+    def __init__(
+        self,
+        function: Callable[["Job"], object],
+        name: Optional[str] = None,
+        args: Optional[dict] = None,
+    ):
+        """
+        Args:
+            function: Callable(job) doing the I/O
+            name: Optional tracing span name, e.g. "file.load"
+            args: Optional details recorded with the span
+        """
+        super().__init__()
+        self.function = function
+        self.name = name
+        self.args = args
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def is_cancelled(self) -> bool:
+        return self._cancelled
+
+    def check(self):
+        """Raise Cancelled if the job has been cancelled"""
+        if self._cancelled:
+            raise Cancelled()
+
+    def report(self, done: int, total: int = 0):
+        self.check()
+        self.progress.emit(done, total)
+
+
+class JobRunner(QtCore.QObject):
+    """Runs submitted jobs one at a time in the thread it is moved to"""
+
+    _submitted = QtCore.pyqtSignal(object)
+
+    def __init__(self):
+        super().__init__()
+        self._submitted.connect(self._run)
+
+    def submit(self, job: Job) -> Job:
+        """Queue a job; safe to call from any thread"""
+        self._submitted.emit(job)
+        return job
+
+    # A decorated slot runs in the runner's thread even though it was
+    # connected before the runner was moved there
+    @QtCore.pyqtSlot(object)
+    def _run(self, job: Job):
+        if job.is_cancelled():
+            job.cancelled.emit()
+            return
+        try:
+            if job.name:
+                with tracing.span(job.name, job.args):
+                    result = job.function(job)
+            else:
+                result = job.function(job)
+        except Cancelled:
+            job.cancelled.emit()
+        except Exception as e:
+            logging.exception(f"Background job {job.name or job.function} failed")
+            job.failed.emit(str(e))
+        else:
+            job.finished.emit(result)
+
+
+def start_runner(parent: QtCore.QObject) -> tuple:
+    """Return (runner, thread) with the runner's thread started"""
+    thread = QtCore.QThread(parent)
+    runner = JobRunner()
+    runner.moveToThread(thread)
+    thread.start()
+    return runner, thread
+
+
+class LoadedFile(NamedTuple):
+    tabs: Optional[List[dict]]  # name and fields of each tab; None if legacy
+    fields: Dict[str, dict]  # Field configurations of a legacy single-view file
+    networks: Dict[str, dict]  # Networks of all tabs, the last tab winning
+    issues: list  # Conflicts between tabs
+
+
+def read_text(path: str, job: Job) -> str:
+    """Read a text file in pieces, reporting characters read"""
+    size = os.path.getsize(path)
+    pieces = []
+    done = 0
+    with open(path, "r") as F1:
+        while piece := F1.read(READ_CHARS):
+            pieces.append(piece)
+            done += len(piece)
+            job.report(done, size)
+    return "".join(pieces)
+
+
+def load_csv(path: str, job: Job) -> tuple:
+    """Read a CSV file chunk by chunk into a plain dict.
+
+    Returns:
+        (networks, csvio.CsvSummary)
+
+    Raises:
+        ValueError: If the file has no header row
+    """
+    networks: Dict[str, dict] = {}
+    summary: dict = {}
+    for chunk in csvio.read_chunks(path, summary):
+        networks.update(chunk.records)
+        job.report(chunk.position, chunk.size)
+    return networks, csvio.CsvSummary(**summary)
+
+
+def load_yaml(path: str, job: Job) -> LoadedFile:
+    """Read and parse a saved YAML file, merging the networks of its tabs
+
+    Raises:
+        ValueError: If the file is not a saved IP-Visualizer file
+    """
+    saveData = yaml.load(read_text(path, job), Loader=_Loader)
+    job.check()
+    if not isinstance(saveData, dict):
+        raise ValueError("Not a saved IP-Visualizer file")
+    if "tabs" not in saveData:
+        # Legacy single view format
+        return LoadedFile(None, saveData["fields"], saveData.get("data") or {}, [])
+    networks = {}
+    for tab_data in saveData["tabs"]:
+        networks.update(tab_data.get("networks") or {})
+    tabs = [
+        {"name": tab_data.get("name", "Subnet"), "fields": tab_data["fields"]}
+        for tab_data in saveData["tabs"]
+    ]
+    return LoadedFile(
+        tabs, {}, networks, validation.find_tab_conflicts(saveData["tabs"])
+    )
+
+
+class _CountingWriter:
+    """File wrapper reporting characters written to a job"""
+
+    def __init__(self, stream, job: Job):
+        self.stream = stream
+        self.job = job
+        self.written = 0
+        self.reported = 0
+
+    def write(self, text: str):
+        self.stream.write(text)
+        self.written += len(text)
+        if self.written - self.reported >= REPORT_CHARS:
+            self.reported = self.written
+            self.job.report(self.written)
+
+
+def _replace(path: str, write: Callable[[str], object], job: Job) -> str:
+    """Call write(temporary path), then rename the result over path.
+
+    A cancelled or failed save leaves the previous file as it was.
+    """
+    temporary = f"{path}.saving"
+    try:
+        write(temporary)
+        job.check()
+        os.replace(temporary, path)
+    except BaseException:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+    return path
+
+
+def save_yaml(path: str, tabs_data: List[dict], job: Job) -> str:
+    """Write tabs to a YAML file; returns the path"""
+
+    def write(temporary):
+        with open(temporary, "w") as F1:
+            yaml.dump({"tabs": tabs_data}, _CountingWriter(F1, job), Dumper=_Dumper)
+
+    return _replace(path, write, job)
+
+
+def save_csv(
+    path: str, networks: Dict[str, dict], fields: List[str], job: Job
+) -> str:
+    """Write a snapshot of the networks to a CSV file; returns the path"""
+    return _replace(
+        path,
+        lambda temporary: csvio.write_csv(
+            temporary, networks, fields, progress=job.report
+        ),
+        job,
+    )
@@ -1,7 +1,8 @@
-import yaml
-import re
+import bisect
 import copy
+import itertools
 import logging
+import os
 from ipaddress import IPv4Network
 from PyQt6 import QtCore, QtWidgets
 from PyQt6.QtCore import Qt, QRegularExpression
@@ -10,41 +11,100 @@ from PyQt6.QtGui import (
     QAction,
     QIcon,
     QColor,
+    QKeySequence,
     QIntValidator,
     QRegularExpressionValidator,
-    QPainter,
 )
+import allocator
+import bulkedit
+import cidrutil
+import colorrules
 import databuilder
 import dbops
+import filesync
+import gridcache
+import gridview
+import heatmap
+import history
+import importer
+import iojobs
+import memreport
+import netstore
+import printing
+import reports
+import tracing
+import treeview
+import validation
 
 logging.basicConfig(level=logging.INFO)
 
+WAIT_DIALOG_MS = 500  # A wait for background I/O shows a dialog after this
+RELOAD_DELAY_MS = 300  # Quiet time after the open file changes before rereading
+
 
 class TableModel(QtCore.QAbstractTableModel):
-    def __init__(self, data):
+    def __init__(self, data, issue_lookup=None):
         super().__init__()
         self._data = data
+        # Callable returning validation issues for a CIDR, used for markers
+        self.issue_lookup = issue_lookup
 
+    @tracing.traced("model.data", event=False)
     def data(self, index, role):
         item = self._data[index.row()][index.column()]
 
         if role == Qt.ItemDataRole.DisplayRole:
-            out = ""
-            for key, value in item.items():
-                if key not in ["spansize", "color"]:
-                    if key == "network":
-                        logging.debug(f"Network is {value}")
-                        out += f"{value}\n"
-                    else:
-                        out += f"{key}: {value}\n"
-            return out
+            return databuilder.cell_text(item)
 
         if role == Qt.ItemDataRole.BackgroundRole:
-            value = self._data[index.row()][index.column()]
             if clr := item.get("color"):
-                logging.debug(f"color = {clr}")
                 return QColor(clr)
 
+        if role in (Qt.ItemDataRole.ToolTipRole, Qt.ItemDataRole.ForegroundRole):
+            if self.issue_lookup and (network := item.get("network")):
+                if issues := self.issue_lookup(network):
+                    if role == Qt.ItemDataRole.ForegroundRole:
+                        return QColor("red")
+                    return "\n".join(issue.message for issue in issues)
+
+    def headerData(self, section, orientation, role):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal and self._data:
+            # Column headers name the prefix length of the column
+            if network := self._data[0][section].get("network"):
+                return "/" + network.split("/")[1]
+        return str(section + 1)
+
+    def cell_position(self, cidr: str):
+        """Return the (row, column) of the cell showing a network, or None"""
+        parsed = cidrutil.parse_cidr(cidr)
+        if parsed is None or not self._data:
+            return None
+        address, prefixlen = parsed
+        base, start = cidrutil.parse_cidr(self._data[0][0]["network"])
+        column = prefixlen - start
+        columns = len(self._data[0])
+        if not 0 <= column < columns or address < base:
+            return None
+        row = (address - base) >> (cidrutil.ADDRESS_BITS - (start + columns - 1))
+        if row >= len(self._data) or self._data[row][column].get("network") != cidr:
+            return None
+        return row, column
+
+    def refresh_networks(self, keys, fill):
+        """Refill the cells showing changed networks and emit dataChanged.
+
+        Args:
+            keys: Changed CIDR keys
+            fill: Callable(cell, key) that rebuilds a cell from its network
+        """
+        for key in keys:
+            if position := self.cell_position(key):
+                fill(self._data[position[0]][position[1]], key)
+                index = self.index(*position)
+                self.dataChanged.emit(index, index)
+
     def rowCount(self, index):
         return len(self._data)
 
@@ -62,6 +122,7 @@ class SubnetView(QtWidgets.QWidget):
         r"2[0-4][0-9]|25[0-5])(\/(3[0-2]|[1-2][0-9]|[0-9]))$"
     )
     _cidr_validator = None
+    _cache_ids = itertools.count()  # Grid cache owner ids, never reused
 
     @classmethod
     def get_cidr_validator(cls):
@@ -78,13 +139,17 @@ class SubnetView(QtWidgets.QWidget):
         self.auto_update = True
 
         self.fields = {}
+        self.fields_version = 0  # Bumped whenever color rules are recompiled
+        self.cache_id = next(self._cache_ids)
+        self.grid_state = None  # (cache key, versions) of the shown grid
         # Networks are now global - stored in parent_window.networks
         self.uFieldsCntrls = {}
         self.data = []
         self.model = None
-        self.compiled_patterns = {}  # Cache for compiled regex patterns
+        self.color_engine = colorrules.ColorEngine({})  # Compiled color rules
+        self.reported_rules = set()  # Disabled color rules already warned about
         self.span_info = []  # Cache for span positions
-        self.view_mode = "table"  # "table" or "list"
+        self.view_mode = "table"  # "table", "list", "heatmap" or "tree"
 
         self.setup_ui()
 
@@ -95,8 +160,8 @@ class SubnetView(QtWidgets.QWidget):
 
     def setup_ui(self):
         """Setup the UI components for this subnet view"""
-        # Table view
-        self.table = QtWidgets.QTableView()
+        # Grid view
+        self.table = gridview.SubnetGridView()
         self.table.clicked.connect(self.show_selection)
 
         # Network list table for showing all subnets with details
@@ -114,10 +179,30 @@ class SubnetView(QtWidgets.QWidget):
         self.network_list_table.setAlternatingRowColors(True)
         self.network_list_table.hide()  # Hidden by default
 
+        # Hilbert-curve overview of the whole network
+        self.heatmap_view = heatmap.HeatmapView()
+        self.heatmap_view.blockClicked.connect(self.zoom_to_block)
+        self.heatmap_mode = QtWidgets.QComboBox()
+        self.heatmap_mode.addItems(["Color rules", "Utilization"])
+        self.heatmap_mode.currentIndexChanged.connect(self.render_heatmap)
+        heatmap_panel = QtWidgets.QWidget()
+        heatmap_layout = QtWidgets.QVBoxLayout()
+        heatmap_layout.addWidget(self.heatmap_mode)
+        heatmap_layout.addWidget(self.heatmap_view, 1)
+        heatmap_panel.setLayout(heatmap_layout)
+
+        # Networks nested under the networks containing them, built lazily
+        self.tree_model = treeview.NetworkTreeModel(self.networks, self.network_color)
+        self.network_tree = treeview.NetworkTreeView()
+        self.network_tree.setModel(self.tree_model)
+        self.network_tree.networkActivated.connect(self.select_network)
+
         # Stacked widget to switch between views
         self.view_stack = QtWidgets.QStackedWidget()
         self.view_stack.addWidget(self.table)  # Index 0
         self.view_stack.addWidget(self.network_list_table)  # Index 1
+        self.view_stack.addWidget(heatmap_panel)  # Index 2
+        self.view_stack.addWidget(self.network_tree)  # Index 3
 
         # Network Configuration Group
         network_group = QtWidgets.QGroupBox("Network Configuration")
@@ -146,6 +231,21 @@ class SubnetView(QtWidgets.QWidget):
         self.btnToggleView = QtWidgets.QPushButton("Show List View")
         self.btnToggleView.clicked.connect(self.toggle_view_mode)
 
+        self.btnAllocate = QtWidgets.QPushButton("Allocate")
+        self.btnAllocate.clicked.connect(self.show_allocate_dialog)
+
+        self.btnHeatmap = QtWidgets.QPushButton("Show Heatmap")
+        self.btnHeatmap.setToolTip("Overview of the network, one pixel per End Prefix")
+        self.btnHeatmap.clicked.connect(self.show_heatmap)
+
+        self.btnBulkEdit = QtWidgets.QPushButton("Bulk Edit")
+        self.btnBulkEdit.setToolTip("Edit all networks in a block or matching a search")
+        self.btnBulkEdit.clicked.connect(self.show_bulk_edit_dialog)
+
+        self.btnTree = QtWidgets.QPushButton("Show Tree")
+        self.btnTree.setToolTip("Defined networks nested by containment")
+        self.btnTree.clicked.connect(self.show_tree)
+
         network_layout.addWidget(self.labelNetwork, 0, 0)
         network_layout.addWidget(self.displayNetwork, 0, 1, 1, 2)
         network_layout.addWidget(self.labelStart, 1, 0)
@@ -154,6 +254,10 @@ class SubnetView(QtWidgets.QWidget):
         network_layout.addWidget(self.displayEnd, 1, 3)
         network_layout.addWidget(self.btnGenerate, 2, 0, 1, 2)
         network_layout.addWidget(self.btnToggleView, 2, 2, 1, 2)
+        network_layout.addWidget(self.btnAllocate, 3, 0, 1, 2)
+        network_layout.addWidget(self.btnHeatmap, 3, 2, 1, 2)
+        network_layout.addWidget(self.btnTree, 4, 0, 1, 2)
+        network_layout.addWidget(self.btnBulkEdit, 4, 2, 1, 2)
         network_group.setLayout(network_layout)
 
         # Selected Subnet Group
@@ -233,17 +337,34 @@ class SubnetView(QtWidgets.QWidget):
 
     def compile_field_patterns(self):
         """Compile regex patterns for all fields for better performance"""
-        self.compiled_patterns = {}
-        for field_name, field_data in self.fields.items():
-            colormap = field_data.get("colorMap", {})
-            if colormap:
-                self.compiled_patterns[field_name] = {
-                    pattern: re.compile(pattern) for pattern in colormap.keys()
-                }
+        self.color_engine = colorrules.shared_engine(self.fields)
+        self.fields_version += 1
+        self.reported_rules = set()
+        self.warn_disabled_rules()
+
+    def warn_disabled_rules(self):
+        """Tell the user about color rules that are being skipped"""
+        disabled = [
+            rule
+            for rule in self.color_engine.disabled()
+            if rule[:2] not in self.reported_rules
+        ]
+        if not disabled:
+            return
+        for field_name, pattern, reason in disabled:
+            self.reported_rules.add((field_name, pattern))
+            logging.warning(f"Color rule {pattern!r} on {field_name} disabled: {reason}")
+        field_name, pattern, reason = disabled[0]
+        more = f" (and {len(disabled) - 1} more)" if len(disabled) > 1 else ""
+        self.parent_window.statusBar().showMessage(
+            f"Color rule {pattern!r} on {field_name} disabled: {reason}{more}"
+        )
 
-    def check_field(self, cidr: dict):
+    def check_field(self, fieldnames):
+        """Add default settings for fields this tab lacks; returns their names"""
         logging.debug("check_field()")
-        for fieldname in self.networks.get(cidr).keys():
+        added = []
+        for fieldname in fieldnames:
             if fieldname not in self.fields.keys():
                 entry = {
                     fieldname: {
@@ -253,29 +374,32 @@ class SubnetView(QtWidgets.QWidget):
                     }
                 }
                 self.fields.update(entry)
+                added.append(fieldname)
+        return added
 
     def find_fields(self):
         logging.debug("find_fields()")
-        for cidr in self.networks.keys():
-            self.check_field(cidr)
+        # The store counts field use as records change, so this does not
+        # depend on the number of networks
+        return self.check_field(self.networks.field_names())
 
     def update_networks_data(self):
         logging.debug("update_networks_data()")
         if self.cidr:
             net = self.cidr.text()
-            logging.debug(f"update_networks_data: updating {net}")
-            self.networks[net] = {}
+            logging.debug("update_networks_data: updating %s", net)
+            # Build the record first; the store notifies views when it is set
+            record = {}
             logging.debug("update_networks_data: iterating over form fields")
             for fldname, val in self.uFieldsCntrls.items():
-                newvalue = val.text()
-                logging.debug(f"newvalue is {newvalue}")
-                logging.debug(f"update_networks_data: {fldname} is {newvalue}")
                 if self.fields[fldname]["controlType"] == "lineEdit":
-                    self.networks[net][fldname] = newvalue
-                    logging.debug(f" networks is now: {self.networks}")
+                    newvalue = val.text()
+                    logging.debug("update_networks_data: %s is %s", fldname, newvalue)
+                    record[fldname] = newvalue
                 elif self.fields[fldname]["controlType"] == "checkbox":
                     if val.checkState() == Qt.CheckState.Checked:
-                        self.fields[net][fldname] = True
+                        record[fldname] = True
+            self.networks[net] = record
 
     def add_user_field(self):
         logging.debug("add_user_fields()")
@@ -287,12 +411,13 @@ class SubnetView(QtWidgets.QWidget):
                 "colorWeight": 1,
                 "show": False,
             }
+            self.parent_window.history.record_field(self, newName, "Add field")
             self.fields[newName] = fieldData
-            logging.debug(f"self.fields is now {self.fields}")
+            logging.debug("self.fields is now %s", self.fields)
             self.uFieldsCntrls[newName] = QtWidgets.QLineEdit()
             self.fieldlayout.addRow(newName, self.uFieldsCntrls[newName])
             self.uFieldsCntrls[newName].editingFinished.connect(self.autoUpdate)
-            logging.debug(f"fields[{newName}] is {self.fields[newName]}")
+            logging.debug("fields[%s] is %s", newName, self.fields[newName])
             # Recompile patterns when field added
             self.compile_field_patterns()
 
@@ -328,8 +453,8 @@ class SubnetView(QtWidgets.QWidget):
         cellValue = self.getcellvalue()
         self.cidr.setText(cellValue)
         data = self.networks.get(cellValue, {})
-        logging.debug(f"show_selection: Populating user fields with {data}")
-        logging.debug(f"Into these user fields {self.uFieldsCntrls.keys()}")
+        logging.debug("show_selection: Populating user fields with %s", data)
+        logging.debug("Into these user fields %s", list(self.uFieldsCntrls))
         for name in data:
             if type(self.uFieldsCntrls.get(name)) == QtWidgets.QLineEdit:
                 text = data.get(name, "")
@@ -341,25 +466,9 @@ class SubnetView(QtWidgets.QWidget):
     def setFillcolor(
         self, fieldName: str, value_in: str, currentColor: str, currentWeight: int
     ) -> tuple:
-        logging.debug("setFillcolor()")
-        logging.debug(f"inbound color and weight is {currentColor} {currentWeight}")
-        logging.debug(f"Getting color for {fieldName}")
-        color = ""
-        weight = 0
-        colormap = self.fields[fieldName]["colorMap"]
-        for pattern in colormap.keys():
-            if re.match(rf"{pattern}", value_in):
-                logging.debug(f"match on {pattern}")
-                color = self.fields[fieldName]["colorMap"].get(pattern)
-                logging.debug(f"color is {color}")
-                weight = self.fields[fieldName].get("colorWeight")
-                logging.debug(f"weight is {weight}")
-            if color and (weight > currentWeight):
-                logging.debug(f"color and weight are now {color} {weight}")
-                return (color, weight)
-        else:
-            logging.debug(f"color and weight remain {currentColor} {weight}")
-            return (currentColor, currentWeight)
+        return self.color_engine.fill_color(
+            fieldName, value_in, currentColor, currentWeight
+        )
 
     def getCidrDetails(self, cidr, cell) -> dict:
         return cell.get("network", {})
@@ -372,27 +481,14 @@ class SubnetView(QtWidgets.QWidget):
 
     def updateCell(self):
         """Update cells with network data and colors"""
-        # Early exit if no network data
-        if not self.networks:
-            return
-
-        for row in self.data:
-            for cell in row:
-                # Use walrus operator for efficiency
-                if cellNetwork := cell.get("network"):
-                    if networkdetails := self.networks.get(cellNetwork):
-                        for property, value in networkdetails.items():
-                            # Cache field lookup
-                            field_info = self.fields.get(property, {})
-                            if field_info.get("show", False):
-                                cell[property] = value
-                            self.setCellColor(property, value, cell)
+        self.color_engine.apply(self.data, self.networks)
 
     def toggle_view_mode(self):
         """Toggle between table view and list view"""
         if self.view_mode == "table":
             # Switch to list view
             self.view_mode = "list"
+            self.parent_window.finish_loading()
             self.populate_list_view()
             self.view_stack.setCurrentIndex(1)
             self.btnToggleView.setText("Show Table View")
@@ -402,6 +498,62 @@ class SubnetView(QtWidgets.QWidget):
             self.view_stack.setCurrentIndex(0)
             self.btnToggleView.setText("Show List View")
 
+    def show_heatmap(self):
+        """Switch to the Hilbert-curve overview of the current network"""
+        self.view_mode = "heatmap"
+        self.render_heatmap()
+        self.view_stack.setCurrentIndex(2)
+        self.btnToggleView.setText("Show Table View")
+
+    def show_tree(self):
+        """Switch to the tree of networks nested by containment"""
+        self.view_mode = "tree"
+        self.parent_window.finish_loading()
+        if not self.tree_model.is_loaded():
+            self.tree_model.load()
+        self.view_stack.setCurrentIndex(3)
+        self.btnToggleView.setText("Show Table View")
+
+    def network_color(self, details: dict):
+        """Return the fill color the color rules give a network, if any"""
+        return self.color_engine.network_color(details)
+
+    def render_heatmap(self):
+        """Render the heatmap of the displayed network at End Prefix resolution"""
+        try:
+            net = IPv4Network(self.displayNetwork.text(), strict=False)
+            resolution = int(self.displayEnd.text())
+        except ValueError as e:
+            logging.error(f"Cannot render heatmap: {e}")
+            return
+        self.parent_window.ensure_networks(str(net), wait=True)
+        layout = heatmap.HeatmapLayout(
+            int(net.network_address), net.prefixlen, resolution
+        )
+        if self.heatmap_mode.currentText() == "Utilization":
+            image = heatmap.render_utilization(layout, self.networks)
+        else:
+            image = heatmap.render_colors(layout, self.networks, self.network_color)
+        self.heatmap_view.set_image(image, layout)
+        self.parent_window.statusBar().showMessage(
+            f"Heatmap of {net}: one pixel per /{layout.resolution}"
+        )
+
+    def zoom_to_block(self, cidr: str):
+        """Open the grid around a block clicked on the heatmap"""
+        block = IPv4Network(cidr)
+        top = IPv4Network(self.displayNetwork.text(), strict=False)
+        zoom = block.supernet(new_prefix=max(top.prefixlen, block.prefixlen - 8))
+        self.displayNetwork.setText(str(zoom))
+        self.displayStart.setText(str(zoom.prefixlen))
+        self.displayEnd.setText(str(block.prefixlen))
+        self.toggle_view_mode()
+        self.generate()
+        row = (int(block.network_address) - int(zoom.network_address)) >> (
+            32 - block.prefixlen
+        )
+        self.table.select(row, block.prefixlen - zoom.prefixlen)
+
     def populate_list_view(self):
         """Populate network list table with ALL subnets and key fields"""
         self.network_list_table.clear()
@@ -419,14 +571,10 @@ class SubnetView(QtWidgets.QWidget):
 
         # Determine columns to show - CIDR plus common fields
         common_fields = ["Name", "Location", "Department", "Status", "Owner", "VLAN"]
-        available_fields = []
 
         # Check which common fields exist in the networks
-        for field in common_fields:
-            for network_data in self.networks.values():
-                if field in network_data:
-                    available_fields.append(field)
-                    break
+        used_fields = self.networks.field_names()
+        available_fields = [field for field in common_fields if field in used_fields]
 
         # Setup columns
         columns = ["CIDR"] + available_fields
@@ -472,17 +620,20 @@ class SubnetView(QtWidgets.QWidget):
 
         if cidr_text == "No subnets defined":
             return
+        self.select_network(cidr_text)
 
+    def select_network(self, cidr_text):
+        """Show the grid of a network picked from the list or the tree"""
         try:
             # Parse the selected CIDR
             network = IPv4Network(cidr_text, strict=False)
             prefix = network.prefixlen
 
             # Ensure this tab has all necessary fields from global networks
-            self.find_fields()
-            self.clear_user_layout()
-            self.add_user_fields_to_form()
-            self.compile_field_patterns()
+            if self.find_fields():
+                self.clear_user_layout()
+                self.add_user_fields_to_form()
+                self.compile_field_patterns()
 
             # Set network and prefix values on current view
             self.displayNetwork.setText(str(network))
@@ -517,34 +668,168 @@ class SubnetView(QtWidgets.QWidget):
         end = int(self.displayEnd.text())
         net = IPv4Network(self.displayNetwork.text(), strict=False)
         net = databuilder.check_cidr(net, start)
+        with tracing.span("generate", {"network": str(net), "end": end}):
+            self.show_grid(str(net), start, end)
+        if tracing.enabled:
+            self.parent_window.statusBar().showMessage(
+                tracing.summary(["generate", "grid.build", "grid.colors", "grid.paint"])
+            )
 
-        # Get data and span info from optimized builder
-        self.data, self.span_info = databuilder.build_display_list(net, start, end)
-        self.updateCell()
+    def show_grid(self, network: str, start: int, end: int):
+        """Show the grid of a block, reusing the cached one if still current"""
+        self.parent_window.ensure_networks(network)
+        key = (self.cache_id, network, start, end)
+        versions = (self.fields_version, self.networks.version)
+        cache = self.parent_window.grid_cache
+        cached = cache.get(key, versions)
+        if cached is None:
+            # Get data and span info from optimized builder
+            self.data, self.span_info = databuilder.build_display_list(
+                IPv4Network(network), start, end
+            )
+            self.updateCell()
+            self.warn_disabled_rules()
+            cache.put(key, versions, self.data, self.span_info)
+        else:
+            self.data, self.span_info = cached
+        self.grid_state = (key, versions)
 
-        # Update model in place instead of recreating
+        # Update model in place instead of recreating. The grid view derives
+        # merged cells from the column position, so span_info needs no setup.
         if self.model is None:
-            self.model = TableModel(self.data)
+            self.model = TableModel(
+                self.data, self.parent_window.validator.issues_for_network
+            )
             self.table.setModel(self.model)
         else:
             self.model._data = self.data
             self.model.layoutChanged.emit()
 
-        # Clear and set spans using cached info
-        self.table.clearSpans()
-        for row, col, span in self.span_info:
-            self.table.setSpan(row, col, span, 1)
+    def refresh(self):
+        """Rebuild the shown grid only if networks or color rules changed"""
+        if self.grid_state is None:
+            return
+        key, versions = self.grid_state
+        if versions != (self.fields_version, self.networks.version):
+            self.show_grid(*key[1:])
+
+    def networks_updated(self, keys):
+        """Update the shown grid after the network store changed.
+
+        Changed networks have their cells refilled in place. A full reset,
+        or a grid that was already out of date, is rebuilt instead, but only
+        for the visible tab; other tabs refresh when they are shown. The tree
+        follows the store while shown and is dropped otherwise.
+        """
+        if self.view_mode == "tree":
+            self.tree_model.networks_changed(keys)
+        else:
+            # Indexed again when the tree is next shown
+            self.tree_model.release()
+        if self.grid_state is None or self.model is None:
+            return
+        key, versions = self.grid_state
+        current = (self.fields_version, self.networks.version)
+        if keys is None or versions != (current[0], current[1] - 1):
+            if self is self.parent_window.get_current_view():
+                self.refresh()
+            return
+        self.model.refresh_networks(keys, self.fill_cell)
+        self.warn_disabled_rules()
+        self.grid_state = (key, current)
+        self.parent_window.grid_cache.update_versions(key, current)
+
+    def fill_cell(self, cell: dict, key: str):
+        """Rebuild a grid cell's values and colour from its network"""
+        colorrules.ColorEngine.reset_cell(cell)
+        if details := self.networks.get(key):
+            self.color_engine.apply_cell(cell, details)
+
+    def show_network(self, cidr: str):
+        """Generate the grid for a single network and select it"""
+        network = IPv4Network(cidr, strict=False)
+        self.displayNetwork.setText(str(network))
+        self.displayStart.setText(str(network.prefixlen))
+        self.displayEnd.setText(str(network.prefixlen))
+        if self.view_mode != "table":
+            self.toggle_view_mode()
+        self.generate()
+
+    def allocate_blocks(
+        self,
+        parent: IPv4Network,
+        prefixlens: list,
+        fit: str = allocator.FIRST_FIT,
+        reserve: bool = False,
+        name: str = "Reserved",
+    ) -> list:
+        """Find free blocks inside parent, optionally reserving them.
+
+        Returns one IPv4Network (or None when there is no room) per
+        requested prefix length.
+        """
+        self.parent_window.ensure_networks(str(parent), wait=True)
+        # Only networks inside parent matter; the store finds them by bisecting
+        used = self.networks.keys_within(int(parent.network_address), parent.prefixlen)
+        index = allocator.FreeSpaceIndex(parent, used)
+        blocks = index.allocate_many(prefixlens, fit)
+        if reserve:
+            reserved = [block.with_prefixlen for block in blocks if block is not None]
+            with self.parent_window.history.step("Reserve blocks"):
+                for key in reserved:
+                    self.networks[key] = {"Name": name}
+            self.find_fields()
+        return blocks
+
+    def bulk_edit(self, keys, edits) -> int:
+        """Apply field edits to many networks as one undoable step.
+
+        Returns:
+            Number of networks changed
+
+        Raises:
+            ValueError: If an edit is invalid
+        """
+        changes = bulkedit.bulk_changes(self.networks, keys, edits)
+        if changes:
+            # One store update, so every view refreshes once
+            with self.parent_window.history.step(f"Bulk edit {len(changes)}"):
+                self.networks.update(changes)
+            self.find_fields()
+        return len(changes)
+
+    def show_bulk_edit_dialog(self):
+        dialog = BulkEditDialog(self, self)
+        dialog.exec()
+
+    def show_allocate_dialog(self):
+        dialog = AllocateDialog(self, self)
+        dialog.exec()
 
-    def load_data(self, fields):
-        """Load field configuration into this view"""
+    def load_data(self, fields, pool=None):
+        """Load field configuration into this view
+
+        Args:
+            fields: {field name: settings}
+            pool: Optional colorrules.share_fields pool shared by the tabs
+                being loaded together
+        """
         self.clear_user_layout()
-        # Use deepcopy to ensure each tab has independent field config
-        self.fields = copy.deepcopy(fields)
+        # Settings are replaced rather than changed, so tabs can share them
+        self.fields = colorrules.share_fields(fields, {} if pool is None else pool)
         self.find_fields()
         self.add_user_fields_to_form()
         # Compile patterns after loading for performance
         self.compile_field_patterns()
 
+    def fields_restored(self):
+        """Rebuild the form and colors after undo or redo changed fields"""
+        self.clear_user_layout()
+        self.uFieldsCntrls = {}
+        self.add_user_fields_to_form()
+        self.compile_field_patterns()
+        self.refresh()
+
     def get_data(self):
         """Return the current field configuration"""
         return {"fields": self.fields}
@@ -556,6 +841,7 @@ class FieldColorSettingsDialog(QtWidgets.QDialog):
     def __init__(self, subnet_view, parent=None):
         super().__init__(parent)
         self.subnet_view = subnet_view
+        self.check_job = None  # Background check of the patterns being saved
         self.setWindowTitle("Field & Color Settings")
         self.setMinimumSize(700, 500)
         self.setup_ui()
@@ -587,9 +873,11 @@ class FieldColorSettingsDialog(QtWidgets.QDialog):
         self.show_checkbox = QtWidgets.QCheckBox()
         self.weight_spin = QtWidgets.QSpinBox()
         self.weight_spin.setRange(0, 100)
+        self.usage_label = QtWidgets.QLabel()
 
         props_layout.addRow("Show in cells:", self.show_checkbox)
         props_layout.addRow("Color weight:", self.weight_spin)
+        props_layout.addRow("Used by:", self.usage_label)
         props_group.setLayout(props_layout)
 
         # Color mapping group
@@ -627,6 +915,9 @@ class FieldColorSettingsDialog(QtWidgets.QDialog):
         )
         button_box.accepted.connect(self.save_and_accept)
         button_box.rejected.connect(self.reject)
+        self.ok_button = button_box.button(
+            QtWidgets.QDialogButtonBox.StandardButton.Ok
+        )
 
         # Add all to main layout
         layout.addWidget(field_group)
@@ -650,6 +941,11 @@ class FieldColorSettingsDialog(QtWidgets.QDialog):
         # Load properties
         self.show_checkbox.setChecked(field_data.get("show", False))
         self.weight_spin.setValue(field_data.get("colorWeight", 1))
+        window = self.subnet_view.parent_window
+        self.usage_label.setText(
+            f"{window.networks.field_count(field_name)} networks; "
+            f"tabs: {', '.join(window.field_tabs(field_name))}"
+        )
 
         # Load color mappings
         self.color_table.setRowCount(0)
@@ -657,6 +953,18 @@ class FieldColorSettingsDialog(QtWidgets.QDialog):
 
         for pattern, color in colormap.items():
             self.add_color_row(pattern, color)
+        rules = self.subnet_view.color_engine.rules.get(field_name)
+        self.mark_problems(rules.disabled() if rules else {})
+
+    def mark_problems(self, problems):
+        """Highlight pattern cells that are unsafe or have been disabled"""
+        for row in range(self.color_table.rowCount()):
+            pattern_widget = self.color_table.cellWidget(row, 0)
+            if not pattern_widget:
+                continue
+            problem = problems.get(pattern_widget.text().strip())
+            pattern_widget.setStyleSheet("background-color: #ffcccc;" if problem else "")
+            pattern_widget.setToolTip(problem or "")
 
     def add_color_row(self, pattern="", color=""):
         """Add a row to the color mapping table"""
@@ -709,6 +1017,9 @@ class FieldColorSettingsDialog(QtWidgets.QDialog):
                 return
 
             # Create new field
+            self.subnet_view.parent_window.history.record_field(
+                self.subnet_view, field_name, "Add field"
+            )
             self.subnet_view.fields[field_name] = {
                 "controlType": "lineEdit",
                 "colorMap": {},
@@ -727,14 +1038,7 @@ class FieldColorSettingsDialog(QtWidgets.QDialog):
             self.accept()
             return
 
-        # Save current field settings
-        field_data = self.subnet_view.fields[current_field]
-
-        # Save properties
-        field_data["show"] = self.show_checkbox.isChecked()
-        field_data["colorWeight"] = self.weight_spin.value()
-
-        # Save color mappings
+        # Collect color mappings
         colormap = {}
         for row in range(self.color_table.rowCount()):
             pattern_widget = self.color_table.cellWidget(row, 0)
@@ -747,11 +1051,338 @@ class FieldColorSettingsDialog(QtWidgets.QDialog):
                 if pattern and color and color != "Choose Color":
                     colormap[pattern] = color
 
-        field_data["colorMap"] = colormap
+        # Refuse patterns that could freeze the grid while it is colored.
+        # Probing runs them in a separate process, so wait in the background
+        self.ok_button.setEnabled(False)
+        self.ok_button.setText("Checking...")
+        job = self.subnet_view.parent_window.run_io(
+            lambda running: colorrules.check_colormap(colormap),
+            lambda problems: self.patterns_checked(
+                job, current_field, colormap, problems
+            ),
+            lambda error: self.patterns_checked(
+                job, current_field, colormap, {"": f"could not be checked: {error}"}
+            ),
+        )
+        self.check_job = job
+
+    def done(self, result):
+        # A check still running must not reach a closed dialog
+        if self.check_job is not None:
+            self.check_job.cancel()
+            self.check_job = None
+        super().done(result)
+
+    def patterns_checked(self, job, current_field, colormap, problems):
+        """Save the field settings if the background check found no problems"""
+        if job is not self.check_job:
+            return  # The dialog was closed meanwhile
+        self.check_job = None
+        self.ok_button.setEnabled(True)
+        self.ok_button.setText("OK")
+        self.mark_problems(problems)
+        if problems:
+            QtWidgets.QMessageBox.warning(
+                self,
+                "Unsafe Pattern",
+                "These patterns cannot be used:\n"
+                + "\n".join(f"{p}: {problem}" for p, problem in problems.items()),
+            )
+            return
+
+        # Save current field settings
+        self.subnet_view.parent_window.history.record_field(
+            self.subnet_view, current_field, "Change field settings"
+        )
+        # Settings may be shared with other tabs, so replace them
+        self.subnet_view.fields[current_field] = {
+            **self.subnet_view.fields[current_field],
+            "show": self.show_checkbox.isChecked(),
+            "colorWeight": self.weight_spin.value(),
+            "colorMap": colormap,
+        }
 
         self.accept()
 
 
+class AllocateDialog(QtWidgets.QDialog):
+    """Dialog for finding and reserving free blocks inside a network"""
+
+    def __init__(self, subnet_view, parent=None):
+        super().__init__(parent)
+        self.subnet_view = subnet_view
+        self.setWindowTitle("Allocate Free Blocks")
+        self.setMinimumSize(400, 350)
+        self.setup_ui()
+
+    def setup_ui(self):
+        """Setup the allocation dialog UI"""
+        layout = QtWidgets.QVBoxLayout()
+
+        form = QtWidgets.QFormLayout()
+        self.parent_edit = QtWidgets.QLineEdit(self.subnet_view.displayNetwork.text())
+        self.parent_edit.setValidator(SubnetView.get_cidr_validator())
+        self.sizes_edit = QtWidgets.QLineEdit("26")
+        self.sizes_edit.setToolTip("One or more prefix lengths, e.g. 26 or 26, 27, 28")
+        self.fit_combo = QtWidgets.QComboBox()
+        self.fit_combo.addItem("First fit", allocator.FIRST_FIT)
+        self.fit_combo.addItem("Best fit", allocator.BEST_FIT)
+        self.reserve_checkbox = QtWidgets.QCheckBox()
+        self.name_edit = QtWidgets.QLineEdit("Reserved")
+
+        form.addRow("Parent network:", self.parent_edit)
+        form.addRow("Prefix lengths:", self.sizes_edit)
+        form.addRow("Strategy:", self.fit_combo)
+        form.addRow("Reserve blocks:", self.reserve_checkbox)
+        form.addRow("Reserve as Name:", self.name_edit)
+
+        find_btn = QtWidgets.QPushButton("Find")
+        find_btn.clicked.connect(self.find_blocks)
+
+        self.results = QtWidgets.QListWidget()
+
+        button_box = QtWidgets.QDialogButtonBox(
+            QtWidgets.QDialogButtonBox.StandardButton.Close
+        )
+        button_box.rejected.connect(self.reject)
+
+        layout.addLayout(form)
+        layout.addWidget(find_btn)
+        layout.addWidget(self.results, 1)
+        layout.addWidget(button_box)
+        self.setLayout(layout)
+
+    def find_blocks(self):
+        """Run the allocator and list the resulting blocks"""
+        try:
+            parent = IPv4Network(self.parent_edit.text(), strict=False)
+            sizes = allocator.parse_sizes(self.sizes_edit.text())
+        except ValueError as e:
+            QtWidgets.QMessageBox.warning(self, "Invalid Input", str(e))
+            return
+
+        blocks = self.subnet_view.allocate_blocks(
+            parent,
+            sizes,
+            self.fit_combo.currentData(),
+            self.reserve_checkbox.isChecked(),
+            self.name_edit.text() or "Reserved",
+        )
+
+        self.results.clear()
+        for prefixlen, block in zip(sizes, blocks):
+            if block is None:
+                self.results.addItem(f"/{prefixlen}: no free block in {parent}")
+            else:
+                self.results.addItem(block.with_prefixlen)
+
+
+class BulkEditDialog(QtWidgets.QDialog):
+    """Dialog for editing fields of every network in a block or search"""
+
+    ACTION_LABELS = {
+        "Set to": bulkedit.SET,
+        "Clear": bulkedit.CLEAR,
+        "Regex replace": bulkedit.REPLACE,
+    }
+
+    def __init__(self, subnet_view, parent=None):
+        super().__init__(parent)
+        self.subnet_view = subnet_view
+        self.setWindowTitle("Bulk Edit")
+        self.setMinimumSize(520, 380)
+        self.setup_ui()
+
+    def setup_ui(self):
+        """Setup the bulk edit dialog UI"""
+        layout = QtWidgets.QVBoxLayout()
+
+        scope = QtWidgets.QFormLayout()
+        self.block_radio = QtWidgets.QRadioButton("Networks inside")
+        self.block_radio.setChecked(True)
+        self.block_edit = QtWidgets.QLineEdit(
+            self.subnet_view.cidr.text() or self.subnet_view.displayNetwork.text()
+        )
+        self.block_edit.setValidator(SubnetView.get_cidr_validator())
+        self.search_radio = QtWidgets.QRadioButton("Networks containing")
+        self.search_edit = QtWidgets.QLineEdit()
+        self.search_edit.setPlaceholderText("Text in any field")
+        scope.addRow(self.block_radio, self.block_edit)
+        scope.addRow(self.search_radio, self.search_edit)
+
+        # One row per field edit: field, action, value, pattern
+        self.edit_table = QtWidgets.QTableWidget(0, 4)
+        self.edit_table.setHorizontalHeaderLabels(
+            ["Field", "Action", "Value / Replacement", "Pattern"]
+        )
+        self.edit_table.horizontalHeader().setStretchLastSection(True)
+        add_btn = QtWidgets.QPushButton("Add Edit")
+        add_btn.clicked.connect(self.add_edit_row)
+
+        self.summary = QtWidgets.QLabel()
+
+        preview_btn = QtWidgets.QPushButton("Preview")
+        preview_btn.clicked.connect(self.preview)
+        button_box = QtWidgets.QDialogButtonBox(
+            QtWidgets.QDialogButtonBox.StandardButton.Apply
+            | QtWidgets.QDialogButtonBox.StandardButton.Close
+        )
+        button_box.button(
+            QtWidgets.QDialogButtonBox.StandardButton.Apply
+        ).clicked.connect(self.apply)
+        button_box.rejected.connect(self.reject)
+
+        layout.addLayout(scope)
+        layout.addWidget(self.edit_table, 1)
+        layout.addWidget(add_btn)
+        layout.addWidget(self.summary)
+        layout.addWidget(preview_btn)
+        layout.addWidget(button_box)
+        self.setLayout(layout)
+        self.add_edit_row()
+
+    def add_edit_row(self):
+        row = self.edit_table.rowCount()
+        self.edit_table.insertRow(row)
+        field_combo = QtWidgets.QComboBox()
+        field_combo.setEditable(True)
+        field_combo.addItems(list(self.subnet_view.fields))
+        action_combo = QtWidgets.QComboBox()
+        action_combo.addItems(list(self.ACTION_LABELS))
+        self.edit_table.setCellWidget(row, 0, field_combo)
+        self.edit_table.setCellWidget(row, 1, action_combo)
+        self.edit_table.setCellWidget(row, 2, QtWidgets.QLineEdit())
+        self.edit_table.setCellWidget(row, 3, QtWidgets.QLineEdit())
+
+    def edits(self) -> list:
+        edits = []
+        for row in range(self.edit_table.rowCount()):
+            field = self.edit_table.cellWidget(row, 0).currentText().strip()
+            if not field:
+                continue
+            edits.append(
+                bulkedit.FieldEdit(
+                    field,
+                    self.ACTION_LABELS[
+                        self.edit_table.cellWidget(row, 1).currentText()
+                    ],
+                    self.edit_table.cellWidget(row, 2).text(),
+                    self.edit_table.cellWidget(row, 3).text(),
+                )
+            )
+        return edits
+
+    def selected_keys(self) -> list:
+        """Keys in scope; raises ValueError for an invalid block"""
+        window = self.subnet_view.parent_window
+        if self.block_radio.isChecked():
+            window.ensure_networks(self.block_edit.text(), wait=True)
+            return bulkedit.select_within(
+                self.subnet_view.networks, self.block_edit.text()
+            )
+        return window.search_networks(self.search_edit.text())
+
+    def preview(self):
+        try:
+            keys = self.selected_keys()
+            changes = bulkedit.bulk_changes(
+                self.subnet_view.networks, keys, self.edits()
+            )
+        except ValueError as e:
+            QtWidgets.QMessageBox.warning(self, "Invalid Input", str(e))
+            return
+        self.summary.setText(
+            f"{len(keys)} networks selected, {len(changes)} would change"
+        )
+
+    def apply(self):
+        try:
+            changed = self.subnet_view.bulk_edit(self.selected_keys(), self.edits())
+        except ValueError as e:
+            QtWidgets.QMessageBox.warning(self, "Invalid Input", str(e))
+            return
+        self.summary.setText(f"{changed} networks changed")
+        self.subnet_view.parent_window.statusBar().showMessage(
+            f"Bulk edit changed {changed} networks"
+        )
+
+
+class ReportDialog(QtWidgets.QDialog):
+    """Dialog for choosing report formats, sources and output directory"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Export Reports")
+        self.setMinimumSize(400, 300)
+        self.setup_ui()
+
+    def setup_ui(self):
+        """Setup the report export dialog UI"""
+        layout = QtWidgets.QVBoxLayout()
+
+        formats = QtWidgets.QHBoxLayout()
+        self.format_checkboxes = {}
+        for name in reports.FORMATS:
+            checkbox = QtWidgets.QCheckBox(name.upper())
+            checkbox.setChecked(True)
+            self.format_checkboxes[name] = checkbox
+            formats.addWidget(checkbox)
+
+        self.all_tabs_radio = QtWidgets.QRadioButton("All tabs")
+        self.all_tabs_radio.setChecked(True)
+        self.spec_radio = QtWidgets.QRadioButton("Networks listed below")
+        self.spec_edit = QtWidgets.QPlainTextEdit()
+        self.spec_edit.setPlaceholderText("One per line, e.g. 10.0.0.0/16 16-24")
+        self.spec_edit.setEnabled(False)
+        self.spec_radio.toggled.connect(self.spec_edit.setEnabled)
+
+        directory = QtWidgets.QHBoxLayout()
+        self.directory_edit = QtWidgets.QLineEdit()
+        browse_btn = QtWidgets.QPushButton("Browse")
+        browse_btn.clicked.connect(self.choose_directory)
+        directory.addWidget(self.directory_edit)
+        directory.addWidget(browse_btn)
+
+        button_box = QtWidgets.QDialogButtonBox(
+            QtWidgets.QDialogButtonBox.StandardButton.Ok
+            | QtWidgets.QDialogButtonBox.StandardButton.Cancel
+        )
+        button_box.accepted.connect(self.accept)
+        button_box.rejected.connect(self.reject)
+
+        layout.addWidget(QtWidgets.QLabel("Formats:"))
+        layout.addLayout(formats)
+        layout.addWidget(self.all_tabs_radio)
+        layout.addWidget(self.spec_radio)
+        layout.addWidget(self.spec_edit, 1)
+        layout.addWidget(QtWidgets.QLabel("Output directory:"))
+        layout.addLayout(directory)
+        layout.addWidget(button_box)
+        self.setLayout(layout)
+
+    def choose_directory(self):
+        directory = QtWidgets.QFileDialog.getExistingDirectory(
+            self, "Report Directory", self.directory_edit.text()
+        )
+        if directory:
+            self.directory_edit.setText(directory)
+
+    def formats(self) -> list:
+        return [
+            name
+            for name, checkbox in self.format_checkboxes.items()
+            if checkbox.isChecked()
+        ]
+
+    def specs(self) -> list:
+        """Parse the spec lines, raising ValueError on the first bad one"""
+        return [
+            reports.parse_spec(line)
+            for line in self.spec_edit.toPlainText().splitlines()
+            if line.strip()
+        ]
+
+
 class MainWindow(QtWidgets.QMainWindow):
     def __init__(self):
         super().__init__()
@@ -760,8 +1391,41 @@ class MainWindow(QtWidgets.QMainWindow):
         self.openfile = ""
         self.autoSave = True
         self.backend_type = "json"  # "json" or "access"
-        self.db_connection = None
-        self.networks = {}  # Global networks dictionary shared across all tabs
+        self.db_session = None  # dbops.DatabaseSession of the open database
+        # All file and database I/O runs in this thread, one job at a time
+        self.io_jobs, self.io_thread = iojobs.start_runner(self)
+        self.io_pending = set()  # Jobs submitted and not ended, kept alive
+        self.shown_job = None  # Job whose progress the status bar shows
+        self.paging = False  # True while database pages are read in turn
+        self.save_job = None
+        self.queued_save = None  # File to save once save_job ends
+        self.edited_while_saving = set()  # Keys edited during save_job, None for all
+        # The open YAML file is watched and changes on disk are merged in
+        self.file_base = None  # filesync.FileBase of the watched file
+        self.file_watcher = QtCore.QFileSystemWatcher(self)
+        self.file_watcher.fileChanged.connect(self.file_changed)
+        self.reload_timer = QtCore.QTimer(self)
+        self.reload_timer.setSingleShot(True)
+        self.reload_timer.setInterval(RELOAD_DELAY_MS)
+        self.reload_timer.timeout.connect(self.reload_file)
+        self._syncing = False  # True while database reads change the store
+        # Global networks shared across all tabs; views subscribe to changes
+        self.networks = netstore.NetworkStore()
+        self.networks.subscribe(self.networks_changed)
+        self.history = history.History(
+            self.networks,
+            on_change=self.history_changed,
+            on_too_large=lambda label: self.statusBar().showMessage(
+                f"{label} is too large to undo; the undo history was cleared"
+            ),
+        )
+        self.grid_cache = gridcache.GridCache()
+        self.validator = validation.NetworkValidator()
+        self.load_issues = []  # Conflicts between tabs found while loading
+        self.shown_load_issues = None  # load_issues at the top of the panel
+        self.issue_keys = []  # Sorted keys with validator issues in the panel
+        self.issue_items = {}  # key -> its panel items
+        self.memory_snapshot = None  # Last memory report, for deltas
 
         # Create central widget and tab widget
         central_widget = QtWidgets.QWidget()
@@ -770,6 +1434,7 @@ class MainWindow(QtWidgets.QMainWindow):
         self.tabWidget = QtWidgets.QTabWidget()
         self.tabWidget.setTabsClosable(True)
         self.tabWidget.tabCloseRequested.connect(self.close_tab)
+        self.tabWidget.currentChanged.connect(self.tab_changed)
 
         # Enable context menu on tab bar for renaming
         self.tabWidget.tabBar().setContextMenuPolicy(
@@ -798,6 +1463,10 @@ class MainWindow(QtWidgets.QMainWindow):
         loadAction.setStatusTip("Load Data!")
         loadAction.triggered.connect(self.load_save_data)
 
+        importAction = QAction("Import", self)
+        importAction.setStatusTip("Merge networks from several files")
+        importAction.triggered.connect(self.import_files)
+
         saveicon = QIcon("icons/disk-return.png")
         saveAction = QAction(saveicon, "Save", self)
         saveAction.setStatusTip("save data to file")
@@ -813,10 +1482,50 @@ class MainWindow(QtWidgets.QMainWindow):
         printAction.setStatusTip("Print current tab")
         printAction.triggered.connect(self.print)
 
+        exportIcon = QIcon("icons/camera.png")
+        exportAction = QAction(exportIcon, "Export", self)
+        exportAction.setStatusTip("Export current tab to PDF or SVG")
+        exportAction.triggered.connect(self.export_grid)
+
+        reportAction = QAction("Reports", self)
+        reportAction.setStatusTip("Export CSV, HTML and PDF reports for many grids")
+        reportAction.triggered.connect(self.export_reports)
+
+        self.undoAction = QAction("Undo", self)
+        self.undoAction.setShortcut(QKeySequence.StandardKey.Undo)
+        self.undoAction.setStatusTip("Undo the last change")
+        self.undoAction.triggered.connect(self.undo)
+
+        self.redoAction = QAction("Redo", self)
+        self.redoAction.setShortcut(QKeySequence.StandardKey.Redo)
+        self.redoAction.setStatusTip("Redo the last undone change")
+        self.redoAction.triggered.connect(self.redo)
+
         aboutIcon = QIcon("icons/question-button.png")
         aboutAction = QAction(aboutIcon, "About", self)
         aboutAction.setStatusTip("Not Implemented")
 
+        validateAction = QAction("Validate", self)
+        validateAction.setStatusTip("Check networks for overlaps and duplicates")
+        validateAction.triggered.connect(self.show_validation)
+
+        self.traceAction = QAction("Trace", self)
+        self.traceAction.setCheckable(True)
+        self.traceAction.setStatusTip("Time grid building, painting, loading and saving")
+        self.traceAction.toggled.connect(self.toggle_tracing)
+
+        memoryAction = QAction("Memory", self)
+        memoryAction.setStatusTip("Show memory used by grids, networks and caches")
+        memoryAction.triggered.connect(self.memory_report)
+
+        exportTraceAction = QAction("Export Trace", self)
+        exportTraceAction.setStatusTip("Save recorded timings as a Chrome trace file")
+        exportTraceAction.triggered.connect(self.export_trace)
+
+        indexAction = QAction("Index Fields", self)
+        indexAction.setStatusTip("Index the open database's field values for searching")
+        indexAction.triggered.connect(self.index_database)
+
         settingsIcon = QIcon("icons/wheel.png")
         settingsAction = QAction(settingsIcon, "Settings", self)
         settingsAction.setStatusTip("Settings")
@@ -825,13 +1534,40 @@ class MainWindow(QtWidgets.QMainWindow):
         toolbar.addAction(newAction)
         toolbar.addAction(newTabAction)
         toolbar.addAction(loadAction)
+        toolbar.addAction(importAction)
         toolbar.addAction(saveAction)
         toolbar.addAction(saveAsAction)
+        toolbar.addAction(self.undoAction)
+        toolbar.addAction(self.redoAction)
         toolbar.addAction(printAction)
+        toolbar.addAction(exportAction)
+        toolbar.addAction(reportAction)
+        toolbar.addAction(validateAction)
+        toolbar.addAction(indexAction)
+        toolbar.addAction(self.traceAction)
+        toolbar.addAction(exportTraceAction)
+        toolbar.addAction(memoryAction)
         toolbar.addAction(settingsAction)
         toolbar.addAction(aboutAction)
 
         self.setStatusBar(QtWidgets.QStatusBar(self))
+        self.job_progress = QtWidgets.QProgressBar()
+        self.job_progress.setMaximumWidth(200)
+        self.job_cancel = QtWidgets.QPushButton("Cancel")
+        self.job_cancel.clicked.connect(self.cancel_job)
+        self.statusBar().addPermanentWidget(self.job_progress)
+        self.statusBar().addPermanentWidget(self.job_cancel)
+        self.job_progress.hide()
+        self.job_cancel.hide()
+
+        # Validation results panel
+        self.issues_list = QtWidgets.QListWidget()
+        self.issues_list.itemDoubleClicked.connect(self.issue_selected)
+        self.issues_dock = QtWidgets.QDockWidget("Validation", self)
+        self.issues_dock.setWidget(self.issues_list)
+        self.addDockWidget(Qt.DockWidgetArea.BottomDockWidgetArea, self.issues_dock)
+        self.issues_dock.hide()
+        self.history_changed()
 
         # Setup default fields before creating tabs
         self.defaultFields = {
@@ -870,10 +1606,16 @@ class MainWindow(QtWidgets.QMainWindow):
         # Clear all tabs
         while self.tabWidget.count() > 0:
             self.tabWidget.removeTab(0)
+        self.grid_cache.clear()
+        self.history.clear()
+        self.close_database()
+        self.unwatch_file()
 
         # Reset file state
         self.openfile = ""
         self.setWindowTitle("IP-Visualizer")
+        self.load_issues = []
+        self.revalidate()
 
         # Create a fresh tab
         self.new_tab()
@@ -883,8 +1625,8 @@ class MainWindow(QtWidgets.QMainWindow):
         logging.debug("new_tab()")
         tab_count = self.tabWidget.count()
         subnet_view = SubnetView(self, f"Subnet {tab_count + 1}")
-        # Use deepcopy to prevent shared field references
-        subnet_view.fields = copy.deepcopy(self.defaultFields)
+        # Settings are shared; the tab gets its own mapping of them
+        subnet_view.fields = dict(self.defaultFields)
         subnet_view.add_user_fields_to_form()
         subnet_view.compile_field_patterns()  # Compile patterns for new tab
         self.tabWidget.addTab(subnet_view, f"Subnet {tab_count + 1}")
@@ -893,6 +1635,8 @@ class MainWindow(QtWidgets.QMainWindow):
     def close_tab(self, index):
         """Close a tab at the given index"""
         if self.tabWidget.count() > 1:
+            self.grid_cache.discard_owner(self.tabWidget.widget(index).cache_id)
+            self.history.forget(self.tabWidget.widget(index))
             self.tabWidget.removeTab(index)
         else:
             QtWidgets.QMessageBox.warning(
@@ -924,6 +1668,14 @@ class MainWindow(QtWidgets.QMainWindow):
         """Get the currently active SubnetView"""
         return self.tabWidget.currentWidget()
 
+    def field_tabs(self, field_name):
+        """Names of the tabs with settings for a field"""
+        return [
+            self.tabWidget.tabText(i)
+            for i in range(self.tabWidget.count())
+            if field_name in self.tabWidget.widget(i).fields
+        ]
+
     def load_save_data(self):
         """Loads file from JSON or Access database"""
         logging.debug("load_save_data()")
@@ -933,7 +1685,7 @@ class MainWindow(QtWidgets.QMainWindow):
             self,
             "Choose file",
             "",
-            "All Supported (*.yaml *.yml *.accdb *.mdb);;YAML Files (*.yaml *.yml);;Access Database (*.accdb *.mdb)",
+            "All Supported (*.yaml *.yml *.accdb *.mdb *.sqlite *.db *.csv);;YAML Files (*.yaml *.yml);;Access Database (*.accdb *.mdb);;SQLite Database (*.sqlite *.db);;CSV Files (*.csv)",
         )
 
         if not file:
@@ -941,114 +1693,739 @@ class MainWindow(QtWidgets.QMainWindow):
             return
 
         # Determine backend type from extension
-        if file.lower().endswith((".accdb", ".mdb")):
+        if file.lower().endswith(dbops.DATABASE_EXTENSIONS):
             self._load_from_access(file)
+        elif file.lower().endswith(".csv"):
+            self._load_from_csv(file)
         else:
             self._load_from_yaml(file)
 
-    def _load_from_yaml(self, filepath):
-        """Load data from YAML file"""
-        try:
-            with open(filepath, "r") as F1:
-                saveData = yaml.load(F1, Loader=yaml.FullLoader)
-
-                # Check if it's multi-tab format or legacy single view
-                if "tabs" in saveData:
-                    # Multi-tab format
-                    # Clear existing tabs
-                    while self.tabWidget.count() > 0:
-                        self.tabWidget.removeTab(0)
-
-                    # Merge all networks from all tabs into global networks
-                    self.networks = {}
-                    for tab_data in saveData["tabs"]:
-                        tab_networks = tab_data.get("networks", {})
-                        self.networks.update(tab_networks)
-
-                    # Load each tab with its field configuration
-                    for tab_data in saveData["tabs"]:
-                        subnet_view = SubnetView(self, tab_data.get("name", "Subnet"))
-                        subnet_view.load_data(tab_data["fields"])
-                        tab_name = tab_data.get("name", "Subnet")
-                        self.tabWidget.addTab(subnet_view, tab_name)
-                else:
-                    # Legacy single view format
-                    self.networks = saveData.get("data", {})
-                    current_view = self.get_current_view()
-                    if current_view:
-                        current_view.load_data(saveData["fields"])
-
-                self.openfile = filepath
-                self.backend_type = "json"
-                self.setWindowTitle(f"IP-Visualizer {filepath}")
-                self.statusBar().showMessage(f"Loaded from YAML: {filepath}")
-        except Exception as e:
-            QtWidgets.QMessageBox.critical(
-                self, "Load Error", f"Failed to load YAML file:\n{e}"
+    def run_io(
+        self,
+        function,
+        finished=None,
+        failed=None,
+        cancelled=None,
+        name=None,
+        args=None,
+        show=False,
+    ) -> iojobs.Job:
+        """Run function(job) in the I/O thread.
+
+        Args:
+            function: Callable(job) doing the I/O
+            finished: Optional callable(result), called in the GUI thread
+            failed: Optional callable(error message)
+            cancelled: Optional callable()
+            name: Optional tracing span name
+            args: Optional details recorded with the span
+            show: True to show progress and Cancel in the status bar
+        """
+        job = iojobs.Job(function, name, args)
+        self.io_pending.add(job)
+        for signal, callback in (
+            (job.finished, finished),
+            (job.failed, failed),
+            (job.cancelled, cancelled),
+        ):
+            if callback:
+                signal.connect(callback)
+            signal.connect(lambda *_, job=job: self.io_ended(job))
+        if show:
+            self.shown_job = job
+            self.job_progress.setRange(0, 0)
+            self.job_progress.show()
+            self.job_cancel.show()
+            job.progress.connect(
+                lambda done, total, job=job: self.job_progressed(job, done, total)
             )
+        return self.io_jobs.submit(job)
+
+    def run_io_and_wait(self, function, label: str) -> tuple:
+        """Run function(job) in the I/O thread, processing events until it ends.
+
+        A cancellable progress dialog appears if it takes a while.
+
+        Returns:
+            (True, result) if it finished, (False, error message) if it
+            failed, or (False, None) if it was cancelled
+        """
+        loop = QtCore.QEventLoop()
+        outcome = [False, None]
+        dialog = QtWidgets.QProgressDialog(label, "Cancel", 0, 0, self)
+        dialog.setWindowModality(Qt.WindowModality.WindowModal)
+        dialog.setMinimumDuration(WAIT_DIALOG_MS)
+
+        def ended(ok, result=None):
+            outcome[:] = [ok, result]
+            loop.quit()
+
+        job = self.run_io(
+            function,
+            lambda result: ended(True, result),
+            lambda error: ended(False, error),
+            lambda: ended(False),
+        )
+        dialog.canceled.connect(job.cancel)
+        job.progress.connect(
+            lambda done, total: dialog.setLabelText(f"{label} ({done:,})")
+        )
+        loop.exec()
+        dialog.reset()
+        dialog.deleteLater()
+        return tuple(outcome)
+
+    def io_ended(self, job):
+        self.io_pending.discard(job)
+        if job is self.shown_job:
+            self.shown_job = None
+            self.job_progress.hide()
+            self.job_cancel.hide()
+
+    def job_progressed(self, job, done: int, total: int):
+        if job is not self.shown_job:
+            return
+        if total > 0:
+            self.job_progress.setRange(0, 1000)
+            self.job_progress.setValue(min(1000, 1000 * done // total))
+        else:
+            self.job_progress.setRange(0, 0)
 
-    def _load_from_access(self, filepath):
-        """Load data from MS Access database"""
-        try:
-            # Check if Access driver is available
-            available, msg = dbops.is_access_available()
-            if not available:
-                QtWidgets.QMessageBox.critical(self, "Access Driver Not Found", msg)
-                return
-
-            # Load from database
-            db = dbops.AccessDatabase(filepath)
-            if not db.connect():
-                QtWidgets.QMessageBox.critical(
-                    self, "Connection Error", "Failed to connect to Access database"
-                )
-                return
-
-            db.create_tables()  # Ensure tables exist
-            tabs_data = db.load_data()
-            db.close()
+    def cancel_job(self):
+        """Cancel the load or save shown in the status bar"""
+        if self.shown_job is not None:
+            self.shown_job.cancel()
+            self.statusBar().showMessage("Cancelling...")
 
-            if tabs_data is None:
-                QtWidgets.QMessageBox.critical(
-                    self, "Load Error", "Failed to load data from database"
-                )
-                return
+    def _load_from_yaml(self, filepath):
+        """Read and parse a YAML file in the background, then show it"""
+        self.statusBar().showMessage(f"Loading {filepath}")
+
+        def read(job):
+            stamp = filesync.file_stamp(filepath)
+            loaded = iojobs.load_yaml(filepath, job)
+            base = filesync.make_base(stamp, loaded.tabs or [], loaded.networks)
+            return loaded, base
+
+        self.run_io(
+            read,
+            lambda result: self._yaml_loaded(filepath, *result),
+            lambda error: QtWidgets.QMessageBox.critical(
+                self, "Load Error", f"Failed to load YAML file:\n{error}"
+            ),
+            lambda: self.statusBar().showMessage("Load cancelled"),
+            name="file.load",
+            args={"path": filepath},
+            show=True,
+        )
 
+    def _yaml_loaded(self, filepath, loaded, base):
+        """Swap in the tabs and networks of a parsed YAML file"""
+        self.close_database()
+        if loaded.tabs is not None:
+            # Multi-tab format
             # Clear existing tabs
             while self.tabWidget.count() > 0:
                 self.tabWidget.removeTab(0)
+            self.grid_cache.clear()
+
+            self.load_issues = loaded.issues
+            self.networks.replace(loaded.networks)
+
+            # Load each tab with its field configuration, sharing equal settings
+            pool = {}
+            for tab_data in loaded.tabs:
+                subnet_view = SubnetView(self, tab_data["name"])
+                subnet_view.load_data(tab_data["fields"], pool)
+                self.tabWidget.addTab(subnet_view, tab_data["name"])
+        else:
+            # Legacy single view format
+            self.load_issues = []
+            self.networks.replace(loaded.networks)
+            current_view = self.get_current_view()
+            if current_view:
+                current_view.load_data(loaded.fields)
+
+        self.openfile = filepath
+        self.backend_type = "json"
+        self.watch_file(filepath, base)
+        self.setWindowTitle(f"IP-Visualizer {filepath}")
+        self.statusBar().showMessage(f"Loaded from YAML: {filepath}")
+
+    def watch_file(self, path, base):
+        """Watch the open file, remembering it as it was read or written"""
+        self.unwatch_file()
+        self.file_base = base
+        self.file_watcher.addPath(path)
+
+    def unwatch_file(self):
+        self.reload_timer.stop()
+        self.file_base = None
+        if self.file_watcher.files():
+            self.file_watcher.removePaths(self.file_watcher.files())
+
+    def file_changed(self, path):
+        # Writers often touch a file several times; wait until they are done
+        self.reload_timer.start()
+
+    def reload_file(self):
+        """Read the watched file again and merge what changed on disk"""
+        path, base = self.openfile, self.file_base
+        if base is None:
+            return
+        if self.save_job is not None:
+            # Likely our own save; check once it has ended
+            self.reload_timer.start()
+            return
+        self.run_io(
+            lambda job: filesync.read_changes(path, base, job),
+            lambda changes: self.apply_file_changes(path, base, changes),
+            lambda error: logging.warning(f"Could not reread {path}: {error}"),
+        )
 
-            # Merge all networks from all tabs into global networks
-            self.networks = {}
-            if tabs_data:
-                for tab_data in tabs_data:
-                    tab_networks = tab_data.get("networks", {})
-                    self.networks.update(tab_networks)
-
-                # Load tabs with field configurations
-                for tab_data in tabs_data:
-                    subnet_view = SubnetView(self, tab_data.get("name", "Subnet"))
-                    subnet_view.load_data(tab_data["fields"])
-                    tab_name = tab_data.get("name", "Subnet")
-                    self.tabWidget.addTab(subnet_view, tab_name)
+    def apply_file_changes(self, path, base, changes):
+        """Apply records and fields changed on disk since base.
+
+        Only the changed keys are updated, as one undoable step, so views
+        refresh just those cells. Where a local edit made since base
+        meets a change on disk, the local version is kept and flagged.
+        """
+        if path == self.openfile and path not in self.file_watcher.files():
+            # Saving by renaming a new file over the old one ends the watch
+            self.file_watcher.addPath(path)
+        if changes is None or base is not self.file_base:
+            return  # Unchanged, or another file was opened or saved meanwhile
+
+        updates, removed, conflicts = {}, [], []
+        for key, record in changes.changed.items():
+            mine = filesync.record_digest(self.networks.get(key))
+            if mine == changes.base.digests[key]:
+                continue
+            if mine != base.digests.get(key):
+                conflicts.append(key)
+            else:
+                updates[key] = record
+        for key in changes.removed:
+            mine = filesync.record_digest(self.networks.get(key))
+            if mine is None:
+                continue
+            if mine != base.digests.get(key):
+                conflicts.append(key)
             else:
-                # Empty database, create default tab
-                self.new_tab()
+                removed.append(key)
+
+        field_updates, field_conflicts = [], []
+        for i, tab in enumerate(changes.tabs[: len(base.tabs)]):
+            view = self.tabWidget.widget(i)
+            if view is None:
+                break
+            apply, clashes = filesync.field_changes(
+                base.tabs[i]["fields"], tab["fields"], view.fields
+            )
+            if apply:
+                field_updates.append((view, apply))
+            field_conflicts.extend(f"{tab['name']}: {name}" for name in clashes)
+
+        if updates or removed or field_updates:
+            with self.history.step("Reload changes from file"):
+                for view, apply in field_updates:
+                    for name, settings in apply.items():
+                        self.history.record_field(view, name)
+                        if settings is None:
+                            view.fields.pop(name, None)
+                        else:
+                            view.fields[name] = settings
+                self.networks.update(updates)
+                for key in removed:
+                    del self.networks[key]
+            for view, _ in field_updates:
+                view.fields_restored()
+        self.file_base = changes.base
+
+        name = os.path.basename(path)
+        flagged = [
+            validation.Issue(
+                validation.DUPLICATE,
+                key,
+                key,
+                f"{key} was changed here and in {name}; the local version is kept",
+                key,
+            )
+            for key in conflicts
+        ]
+        flagged = [issue for issue in flagged if issue not in self.load_issues]
+        if flagged:
+            self.load_issues = self.load_issues + flagged
+            self.revalidate()
+            self.issues_dock.show()
+        message = (
+            f"Reloaded {len(updates) + len(removed)} changed networks "
+            f"and {sum(len(apply) for _, apply in field_updates)} fields from {name}"
+        )
+        if conflicts or field_conflicts:
+            message += f"; kept {len(conflicts) + len(field_conflicts)} local edits"
+        if [tab["name"] for tab in changes.tabs] != [tab["name"] for tab in base.tabs]:
+            message += "; tabs were added or renamed there, open the file to see them"
+        self.statusBar().showMessage(message)
+        if field_conflicts:
+            QtWidgets.QMessageBox.warning(
+                self,
+                "Reload Conflicts",
+                f"These fields were changed here and in {name}. "
+                "The local settings are kept:\n" + "\n".join(field_conflicts),
+            )
 
-            self.openfile = filepath
-            self.backend_type = "access"
-            self.setWindowTitle(f"IP-Visualizer [DB] {filepath}")
-            self.statusBar().showMessage(f"Loaded from Access DB: {filepath}")
+    def _load_from_access(self, filepath):
+        """Open an Access or SQLite database, reading networks as needed.
 
-        except Exception as e:
+        Tabs and their fields are read first so the first tab shows at once.
+        Networks are read for each block a view shows and, page by page,
+        in the background until all are loaded.
+        """
+        session = dbops.DatabaseSession(filepath)
+
+        def open_session(job):
+            available, msg = session.db.available()
+            if not available:
+                raise dbops.DatabaseError(msg)
+            return session.open()
+
+        def failed(error):
+            self.run_io(lambda job: session.close())
             QtWidgets.QMessageBox.critical(
-                self, "Load Error", f"Failed to load Access database:\n{e}"
+                self, "Load Error", f"Failed to load data from database:\n{error}"
             )
 
+        self.statusBar().showMessage(f"Opening {filepath}")
+        self.run_io(
+            open_session,
+            lambda tabs_data: self._database_opened(session, tabs_data),
+            failed,
+            name="file.load",
+            args={"path": filepath},
+            show=True,
+        )
+
+    def _database_opened(self, session, tabs_data):
+        """Show the tabs of a newly opened database and start reading it"""
+        self.close_database()
+        self.unwatch_file()
+        self.db_session = session
+
+        # Clear existing tabs
+        while self.tabWidget.count() > 0:
+            self.tabWidget.removeTab(0)
+        self.grid_cache.clear()
+
+        # Only networks that are not CIDRs are read up front
+        self.load_issues = session.take_conflicts()
+        self.networks.replace(tabs_data[0]["networks"] if tabs_data else {})
+        if tabs_data:
+
+            # Load tabs with field configurations, sharing equal settings
+            pool = {}
+            for tab_data in tabs_data:
+                subnet_view = SubnetView(self, tab_data.get("name", "Subnet"))
+                subnet_view.load_data(tab_data["fields"], pool)
+                tab_name = tab_data.get("name", "Subnet")
+                self.tabWidget.addTab(subnet_view, tab_name)
+        else:
+            # Empty database, create default tab
+            self.new_tab()
+
+        self.openfile = session.path
+        self.backend_type = "access"
+        self.setWindowTitle(f"IP-Visualizer [DB] {session.path}")
+        if session.windowed:
+            # Too large to hold: only blocks that are viewed are read
+            self.statusBar().showMessage(f"Opened Access DB: {session.path}")
+        else:
+            self.statusBar().showMessage(f"Loading from Access DB: {session.path}")
+            self.paging = True
+            self.load_next_page()
+
+    def close_database(self):
+        """Stop reading from and disconnect the open database, if any"""
+        self.paging = False
+        session = self.db_session
+        if session is not None:
+            self.db_session = None
+            self.run_io(lambda job: session.close())
+
+    def _fill_from_database(self, session, records):
+        if session is not self.db_session:
+            return  # Read for a database that has since been closed
+        conflicts = session.take_conflicts()
+        if conflicts:
+            self.load_issues = self.load_issues + conflicts
+        self._syncing = True
+        try:
+            self.networks.fill(records)
+        finally:
+            self._syncing = False
+
+    def _drop_database_blocks(self, session, dropped):
+        """Drop the least recently viewed blocks of a windowed database"""
+        if session is not self.db_session:
+            return
+        for start, prefixlen in dropped:
+            keys = [
+                key
+                for key in self.networks.keys_within(start, prefixlen)
+                if key not in session.dirty
+            ]
+            self._syncing = True
+            try:
+                self.networks.evict(keys)
+            finally:
+                self._syncing = False
+
+    def database_failed(self, error):
+        self.paging = False
+        QtWidgets.QMessageBox.critical(
+            self, "Database Error", f"Failed to read from the database:\n{error}"
+        )
+
+    def ensure_networks(self, network: str, wait: bool = False):
+        """Read the networks inside a block from the open database.
+
+        The read runs in the background and views update when it arrives,
+        unless wait is True, e.g. before computing on the block. The blocks
+        on either side are read afterwards, so moving to a neighbouring
+        block is immediate.
+        """
+        session = self.db_session
+        if session is None or session.complete():
+            return
+        parsed = cidrutil.parse_cidr(network)
+        if parsed is None:
+            return
+
+        def read_block(job):
+            return session.load_block(*parsed), session.blocks_to_drop()
+
+        if not wait:
+            self.run_io(
+                read_block,
+                lambda result: self._block_read(session, parsed, result),
+                self.database_failed,
+            )
+            return
+        ok, result = self.run_io_and_wait(read_block, f"Reading {network}")
+        if ok:
+            self._block_read(session, parsed, result)
+        elif result:
+            self.database_failed(result)
+
+    def _block_read(self, session, parsed, result):
+        records, dropped = result
+        self._fill_from_database(session, records)
+        self._drop_database_blocks(session, dropped)
+        if session is self.db_session:
+            self.prefetch_neighbours(session, *parsed)
+
+    def prefetch_neighbours(self, session, address: int, prefixlen: int):
+        """Read the blocks before and after a block ahead of need"""
+        start, end = cidrutil.network_range(address, prefixlen)
+        size = end - start
+
+        def read_neighbours(job):
+            records = {}
+            for neighbour in (start - size, end):
+                if 0 <= neighbour <= cidrutil.ALL_ONES:
+                    records.update(
+                        session.load_block(neighbour, prefixlen, prefetch=True)
+                    )
+            return records, session.blocks_to_drop()
+
+        def read(result):
+            records, dropped = result
+            self._fill_from_database(session, records)
+            self._drop_database_blocks(session, dropped)
+
+        self.run_io(
+            read_neighbours,
+            read,
+            lambda error: logging.warning(
+                f"Prefetch of neighbouring block failed: {error}"
+            ),
+        )
+
+    def load_next_page(self):
+        """Read one more page of networks from the open database, and then
+        the next until all are read or paging stops"""
+        session = self.db_session
+        if not self.paging or session is None or session.complete():
+            self.paging = False
+            return
+        self.run_io(
+            lambda job: session.load_next_page(),
+            lambda records: self._page_read(session, records),
+            self.database_failed,
+        )
+
+    def _page_read(self, session, records):
+        if session is not self.db_session:
+            return
+        self._fill_from_database(session, records)
+        if not session.complete():
+            self.load_next_page()
+        elif self.paging:
+            self.paging = False
+            self.statusBar().showMessage(
+                f"Loaded {len(self.networks)} networks from {session.path}"
+            )
+
+    def finish_loading(self) -> bool:
+        """Read all remaining networks before a whole-dataset operation.
+
+        Events are processed meanwhile, and the read can be cancelled.
+
+        Returns:
+            False if the database could not be read completely
+        """
+        session = self.db_session
+        if session is None or session.complete():
+            return True
+        self.paging = False
+
+        def read_rest(job):
+            records = {}
+            try:
+                session.load_rest(records, job.progress.emit, job.is_cancelled)
+            except dbops.DatabaseError as e:
+                return records, str(e)
+            return records, None
+
+        ok, result = self.run_io_and_wait(
+            read_rest, "Reading all networks from the database"
+        )
+        if not ok:
+            if result:
+                self.database_failed(result)
+            return False
+        records, error = result
+        # Keep what was read, even if reading stopped early
+        self._fill_from_database(session, records)
+        if error:
+            self.database_failed(error)
+        return session.complete()
+
+    def search_networks(self, text: str) -> list:
+        """Keys of networks with a field value containing text, ignoring case.
+
+        An indexed database is searched in SQL and only the candidates are
+        read; otherwise all remaining networks are read first.
+        """
+        session = self.db_session
+        if not (text and session and session.normalized) or session.complete():
+            self.finish_loading()
+            return bulkedit.select_matching(self.networks, text)
+
+        def find(job):
+            candidates = session.find(text)
+            return candidates, session.load_keys(candidates)
+
+        ok, result = self.run_io_and_wait(find, f"Searching for {text!r}")
+        if not ok:
+            if result:
+                self.database_failed(result)
+            return []
+        candidates, records = result
+        self._fill_from_database(session, records)
+        return bulkedit.select_matching(self.networks, text, keys=candidates)
+
+    def index_database(self):
+        """Add the field value index to the open database"""
+        session = self.db_session
+        if session is None:
+            QtWidgets.QMessageBox.information(
+                self, "Index Fields", "Open an Access database to index its fields."
+            )
+            return
+        if session.normalized:
+            self.statusBar().showMessage(f"{session.path} is already indexed")
+            return
+        self.statusBar().showMessage(f"Indexing field values in {session.path}")
+        self.run_io(
+            lambda job: session.normalize(),
+            lambda result: self.statusBar().showMessage(
+                f"Indexed field values in {session.path}"
+            ),
+            lambda error: QtWidgets.QMessageBox.critical(
+                self, "Database Error", f"Failed to index field values:\n{error}"
+            ),
+            show=True,
+        )
+
+    def import_files(self):
+        """Merge networks and fields from many files into the session"""
+        self.finish_loading()
+        files, selected_filter = QtWidgets.QFileDialog.getOpenFileNames(
+            self,
+            "Import files",
+            "",
+            "All Supported (*.yaml *.yml *.accdb *.mdb);;YAML Files (*.yaml *.yml);;Access Database (*.accdb *.mdb)",
+        )
+        if not files:
+            return
+        labels = {
+            "Flag conflicts and keep existing": importer.FLAG,
+            "Keep existing": importer.KEEP,
+            "Overwrite with imported": importer.OVERWRITE,
+        }
+        choice, ok = QtWidgets.QInputDialog.getItem(
+            self, "Import", "When a network already exists:", list(labels), 0, False
+        )
+        if not ok:
+            return
+
+        known_fields = {}
+        for i in range(self.tabWidget.count()):
+            known_fields.update(self.tabWidget.widget(i).fields)
+
+        # Files are parsed in a process pool driven from a thread, and
+        # merged against a snapshot so the thread never reads the live store
+        self.import_version = self.networks.version
+        self.import_thread = QtCore.QThread(self)
+        self.import_worker = importer.ImportWorker(
+            files, self.networks.to_dict(), known_fields, labels[choice]
+        )
+        self.import_worker.moveToThread(self.import_thread)
+        self.import_thread.started.connect(self.import_worker.run)
+        self.import_worker.progress.connect(
+            lambda done, total: self.statusBar().showMessage(
+                f"Importing: {done} of {total} files read"
+            )
+        )
+        self.import_worker.finished.connect(self.apply_import)
+        self.import_worker.failed.connect(
+            lambda error: QtWidgets.QMessageBox.critical(
+                self, "Import Error", f"Failed to import files:\n{error}"
+            )
+        )
+        self.import_worker.finished.connect(self.import_thread.quit)
+        self.import_worker.failed.connect(self.import_thread.quit)
+        self.import_thread.start()
+
+    def apply_import(self, result):
+        """Apply a finished import as one undoable step and report it"""
+        if self.networks.version != self.import_version:
+            QtWidgets.QMessageBox.warning(
+                self,
+                "Import Cancelled",
+                "Networks were edited while the files were read. "
+                "Please import again.",
+            )
+            return
+
+        with self.history.step("Import"):
+            for i in range(self.tabWidget.count()):
+                view = self.tabWidget.widget(i)
+                for name, field_data in result.fields.items():
+                    self.history.record_field(view, name)
+                    view.fields[name] = field_data
+            self.networks.update(result.changes)
+        for i in range(self.tabWidget.count()):
+            self.tabWidget.widget(i).fields_restored()
+
+        flagged = [
+            validation.Issue(
+                validation.DUPLICATE,
+                conflict.key,
+                conflict.key,
+                f"{conflict.key} from {conflict.source} differs from the "
+                "existing record",
+                conflict.key,
+            )
+            for conflict in result.conflicts
+            if conflict.resolution == importer.FLAG
+        ]
+        if flagged:
+            self.load_issues = self.load_issues + flagged
+            self.revalidate()
+            self.issues_dock.show()
+
+        report = importer.format_report(result)
+        self.statusBar().showMessage(report.splitlines()[0])
+        if result.conflicts or result.errors:
+            box = QtWidgets.QMessageBox(self)
+            box.setWindowTitle("Import Report")
+            box.setText(report.splitlines()[0])
+            box.setDetailedText(report)
+            box.exec()
+
+    def _load_from_csv(self, filepath):
+        """Read a CSV file in the background, then swap in its networks.
+
+        The open tabs are kept. The current networks stay untouched until
+        the whole file has been read.
+        """
+        self.statusBar().showMessage(f"Loading {filepath}")
+        self.run_io(
+            lambda job: iojobs.load_csv(filepath, job),
+            lambda result: self._csv_loaded(filepath, *result),
+            lambda error: QtWidgets.QMessageBox.critical(
+                self, "Load Error", f"Failed to load CSV file:\n{error}"
+            ),
+            lambda: self.statusBar().showMessage("Load cancelled"),
+            name="file.load",
+            args={"path": filepath},
+            show=True,
+        )
+
+    def _csv_loaded(self, filepath, networks, summary):
+        """Swap in the networks, create fields for the CSV columns and
+        report skipped rows"""
+        self.close_database()
+        self.unwatch_file()
+        self.load_issues = []
+        self.networks.replace(networks)
+        for i in range(self.tabWidget.count()):
+            view = self.tabWidget.widget(i)
+            view.check_field(summary.fields)
+            view.fields_restored()
+        self.openfile = filepath
+        self.backend_type = "csv"
+        self.setWindowTitle(f"IP-Visualizer {filepath}")
+        message = (
+            f"Loaded {summary.loaded} networks from {summary.rows} CSV rows "
+            f"({summary.normalized} normalized, {summary.invalid} invalid)"
+        )
+        self.statusBar().showMessage(message)
+        self.revalidate()
+        if summary.errors:
+            box = QtWidgets.QMessageBox(self)
+            box.setWindowTitle("CSV Load")
+            box.setText(message)
+            box.setDetailedText("\n".join(summary.errors))
+            box.exec()
+
     def write(self, name):
-        """Save all tabs to file (JSON or Access)"""
+        """Save all tabs to file (JSON or Access), or the networks to CSV.
+
+        The file is written in the background. Edits made meanwhile stay
+        in memory for the next save, and a save asked for meanwhile runs
+        once the current one ends.
+        """
+        if self.save_job is not None:
+            self.queued_save = name
+            self.statusBar().showMessage(
+                f"Will save to {name} when the current save ends"
+            )
+            return
+        # Saving back to the open database writes only what changed
+        incremental = self.db_session is not None and self.db_session.path == name
+        if not incremental and not self.finish_loading():
+            # Saving now would drop the networks not read yet
+            return
+        if name.lower().endswith(".csv"):
+            self._write_to_csv(name)
+            return
+
         # Collect tab data - each tab saves the same global networks
         tabs_data = []
+        networks = {} if incremental else self.networks.to_dict()
         for i in range(self.tabWidget.count()):
             subnet_view = self.tabWidget.widget(i)
             tab_name = self.tabWidget.tabText(i)
@@ -1056,83 +2433,180 @@ class MainWindow(QtWidgets.QMainWindow):
             tabs_data.append(
                 {
                     "name": tab_name,
-                    "fields": view_data["fields"],
-                    "networks": self.networks,  # Global networks
+                    # A copy, as the file is written while editing goes on
+                    "fields": dict(view_data["fields"]),
+                    "networks": networks,  # Global networks
                 }
             )
 
         # Determine backend from extension
-        if name.lower().endswith((".accdb", ".mdb")):
+        if name.lower().endswith(dbops.DATABASE_EXTENSIONS):
             self._write_to_access(name, tabs_data)
         else:
             self._write_to_yaml(name, tabs_data)
 
+    def start_save(self, filepath, function, saved, failed, cancelled=None):
+        """Run a save job, noting the edits made while it runs"""
+
+        def save_cancelled():
+            if cancelled:
+                cancelled()
+            self.save_ended("Save cancelled")
+
+        self.edited_while_saving = set()
+        self.save_job = self.run_io(
+            function,
+            saved,
+            failed,
+            save_cancelled,
+            name="file.save",
+            args={"path": filepath},
+            show=True,
+        )
+
+    def save_ended(self, message=None):
+        """Report how a save ended, then run a save queued meanwhile"""
+        self.save_job = None
+        edited = self.edited_while_saving
+        self.edited_while_saving = set()
+        if message:
+            if edited is None or edited:
+                message += " (edits made while saving are not saved yet)"
+            self.statusBar().showMessage(message)
+        if self.queued_save:
+            name, self.queued_save = self.queued_save, None
+            self.write(name)
+
     def _write_to_yaml(self, filepath, tabs_data):
-        """Write data to YAML file"""
-        try:
-            with open(filepath, "w") as F1:
-                save_data = {"tabs": tabs_data}
-                yaml.dump(save_data, F1)
+        """Write data to YAML file in the background"""
+
+        def write(job):
+            iojobs.save_yaml(filepath, tabs_data, job)
+            networks = tabs_data[0]["networks"] if tabs_data else {}
+            return filesync.make_base(filesync.file_stamp(filepath), tabs_data, networks)
+
+        def saved(base):
             self.openfile = filepath
             self.backend_type = "json"
-            self.statusBar().showMessage(f"Saved to YAML: {filepath}")
-        except Exception as e:
+            self.setWindowTitle(f"IP-Visualizer {filepath}")
+            self.watch_file(filepath, base)
+            self.save_ended(f"Saved to YAML: {filepath}")
+
+        def failed(error):
+            self.save_ended()
             QtWidgets.QMessageBox.critical(
-                self, "Save Error", f"Failed to save YAML file:\n{e}"
+                self, "Save Error", f"Failed to save YAML file:\n{error}"
             )
 
-    def _write_to_access(self, filepath, tabs_data):
-        """Write data to MS Access database"""
-        try:
-            # Check if Access driver is available
-            available, msg = dbops.is_access_available()
-            if not available:
-                QtWidgets.QMessageBox.critical(self, "Access Driver Not Found", msg)
-                return
+        self.start_save(filepath, write, saved, failed)
 
-            # Create database if it doesn't exist
-            import os
+    def _write_to_csv(self, filepath):
+        """Write networks to CSV row by row in the background.
 
-            if not os.path.exists(filepath):
-                if not dbops.create_new_database(filepath):
-                    QtWidgets.QMessageBox.critical(
-                        self, "Create Error", "Failed to create new Access database"
-                    )
-                    return
+        CSV holds networks only; field colors and tabs are not saved.
+        """
+        # A snapshot, as the file is written while editing goes on
+        networks = self.networks.to_dict()
+        fields = self.networks.field_names()
 
-            # Save to database
-            db = dbops.AccessDatabase(filepath)
-            if not db.connect():
-                QtWidgets.QMessageBox.critical(
-                    self, "Connection Error", "Failed to connect to Access database"
-                )
-                return
+        def saved(path):
+            self.openfile = filepath
+            self.backend_type = "csv"
+            self.setWindowTitle(f"IP-Visualizer {filepath}")
+            self.unwatch_file()
+            self.save_ended(f"Saved to CSV: {filepath}")
 
-            db.create_tables()  # Ensure tables exist
-            if db.save_data(tabs_data):
-                self.openfile = filepath
-                self.backend_type = "access"
-                self.statusBar().showMessage(f"Saved to Access DB: {filepath}")
-            else:
-                QtWidgets.QMessageBox.critical(
-                    self, "Save Error", "Failed to save to database"
-                )
+        def failed(error):
+            self.save_ended()
+            QtWidgets.QMessageBox.critical(
+                self, "Save Error", f"Failed to save CSV file:\n{error}"
+            )
+
+        self.start_save(
+            filepath,
+            lambda job: iojobs.save_csv(filepath, networks, fields, job),
+            saved,
+            failed,
+        )
 
-            db.close()
+    def _write_to_access(self, filepath, tabs_data):
+        """Write data to an Access or SQLite database in the background.
 
-        except Exception as e:
+        Saving back to the open database writes only the networks changed
+        since the last save. Saving anywhere else writes everything, and
+        the saved database becomes the open one.
+        """
+        session = self.db_session
+        if session is not None and session.path == filepath:
+            changes = session.take_changes(self.networks)
+
+            def write(job):
+                session.save_changes(tabs_data, changes)
+
+            def cancelled():
+                session.restore_changes(changes)
+
+        else:
+            # The backend follows the extension, as when opening a database
+            session = dbops.DatabaseSession(filepath)
+
+            def cancelled():
+                self.run_io(lambda job: session.close())
+
+            def write(job):
+                # Check if the database driver is available
+                available, msg = session.db.available()
+                if not available:
+                    raise dbops.DatabaseError(msg)
+                # Create database if it doesn't exist
+                if not os.path.exists(filepath):
+                    if not session.db.create_database():
+                        raise dbops.DatabaseError(f"Failed to create {filepath}")
+                session.save(tabs_data, job.report)
+
+        def saved(result):
+            if session is not self.db_session:
+                # The saved file is now the open one
+                self.close_database()
+                edited = self.edited_while_saving
+                session.note_changes(self.networks.keys() if edited is None else edited)
+                self.db_session = session
+            self.openfile = filepath
+            self.backend_type = "access"
+            self.setWindowTitle(f"IP-Visualizer [DB] {filepath}")
+            self.unwatch_file()
+            self.save_ended(f"Saved to database: {filepath}")
+
+        def failed(error):
+            if session is not self.db_session:
+                self.run_io(lambda job: session.close())
+            self.save_ended()
             QtWidgets.QMessageBox.critical(
-                self, "Save Error", f"Failed to save Access database:\n{e}"
+                self, "Save Error", f"Failed to save to database:\n{error}"
             )
 
+        self.start_save(filepath, write, saved, failed, cancelled)
+
+    def closeEvent(self, event):
+        """Let queued saves finish, then stop the I/O thread"""
+        self.close_database()
+        if self.save_job is not None:
+            self.statusBar().showMessage("Finishing the save before closing...")
+        # Jobs run in order, so this quits after everything already queued
+        self.io_jobs.submit(iojobs.Job(lambda job: self.io_thread.quit()))
+        self.io_thread.wait()
+        super().closeEvent(event)
+
     def saveAs(self):
         fileToSave, selected_filter = QtWidgets.QFileDialog.getSaveFileName(
-            self, "Save As", "", "YAML Files (*.yaml);;Access Database (*.accdb)"
+            self,
+            "Save As",
+            "",
+            "YAML Files (*.yaml);;Access Database (*.accdb);;SQLite Database (*.sqlite);;CSV Files (*.csv)",
         )
         if fileToSave:
+            # openfile follows once the save has succeeded
             self.write(fileToSave)
-            self.openfile = fileToSave
-            self.setWindowTitle(f"IP-Visualizer {fileToSave}")
 
     def save(self):
         if not self.openfile:
@@ -1140,6 +2614,192 @@ class MainWindow(QtWidgets.QMainWindow):
         else:
             self.write(self.openfile)
 
+    def networks_changed(self, keys=None):
+        """Network store listener: re-check changed keys and update all tabs.
+
+        Args:
+            keys: Keys that were edited, or None when everything changed
+        """
+        if self.db_session is not None and keys is not None and not self._syncing:
+            self.db_session.note_changes(keys)
+        if self.save_job is not None and not self._syncing:
+            if keys is None:
+                self.edited_while_saving = None
+            elif self.edited_while_saving is not None:
+                self.edited_while_saving.update(keys)
+        self.revalidate(keys)
+        for i in range(self.tabWidget.count()):
+            self.tabWidget.widget(i).networks_updated(keys)
+
+    def history_changed(self):
+        """Keep the Undo and Redo actions in step with the history"""
+        for action, label, name in (
+            (self.undoAction, self.history.undo_label(), "Undo"),
+            (self.redoAction, self.history.redo_label(), "Redo"),
+        ):
+            action.setEnabled(label is not None)
+            action.setText(f"{name} {label}" if label else name)
+
+    def undo(self):
+        if label := self.history.undo():
+            self.statusBar().showMessage(f"Undid {label}")
+
+    def redo(self):
+        if label := self.history.redo():
+            self.statusBar().showMessage(f"Redid {label}")
+
+    def tab_changed(self, index):
+        """Bring a tab's grid up to date when it is shown"""
+        view = self.tabWidget.widget(index)
+        if view is not None:
+            view.refresh()
+
+    def revalidate(self, keys=None):
+        """Re-check networks and refresh the validation panel and markers.
+
+        After an edit only the panel items of keys whose issues changed are
+        replaced.
+
+        Args:
+            keys: Keys that were edited, or None for a full check
+        """
+        if keys is None:
+            self.validator.validate(self.networks)
+            self.fill_issues_list()
+        elif self.load_issues is not self.shown_load_issues:
+            self.validator.check_keys(self.networks, keys)
+            self.fill_issues_list()
+        else:
+            for key in self.validator.check_keys(self.networks, keys):
+                self.replace_issue_items(key)
+        self.issues_dock.setWindowTitle(
+            f"Validation ({self.issues_list.count()} issues)"
+        )
+
+        current_view = self.get_current_view()
+        if current_view:
+            current_view.table.viewport().update()
+
+    def issue_item(self, issue) -> QtWidgets.QListWidgetItem:
+        item = QtWidgets.QListWidgetItem(f"{issue.kind}: {issue.message}")
+        item.setData(Qt.ItemDataRole.UserRole, issue.network)
+        return item
+
+    def fill_issues_list(self):
+        """Show the load issues, then every validator issue by key"""
+        self.issues_list.clear()
+        self.shown_load_issues = self.load_issues
+        for issue in self.load_issues:
+            self.issues_list.addItem(self.issue_item(issue))
+        self.issue_keys = []
+        self.issue_items = {}
+        for issue in self.validator.issues():
+            item = self.issue_item(issue)
+            self.issues_list.addItem(item)
+            if issue.key not in self.issue_items:
+                self.issue_keys.append(issue.key)
+                self.issue_items[issue.key] = []
+            self.issue_items[issue.key].append(item)
+
+    def replace_issue_items(self, key):
+        """Replace the panel items of one key, keeping the keys in order"""
+        for item in self.issue_items.pop(key, []):
+            self.issues_list.takeItem(self.issues_list.row(item))
+        keys = self.issue_keys
+        pos = bisect.bisect_left(keys, key)
+        listed = pos < len(keys) and keys[pos] == key
+        issues = self.validator.issues_for_key(key)
+        if not issues:
+            if listed:
+                del keys[pos]
+            return
+        if not listed:
+            keys.insert(pos, key)
+        if pos + 1 < len(keys):
+            row = self.issues_list.row(self.issue_items[keys[pos + 1]][0])
+        else:
+            row = self.issues_list.count()
+        items = [self.issue_item(issue) for issue in issues]
+        for offset, item in enumerate(items):
+            self.issues_list.insertItem(row + offset, item)
+        self.issue_items[key] = items
+
+    def toggle_tracing(self, on):
+        """Start recording timings afresh, or stop and show what was recorded"""
+        if on:
+            tracing.reset()
+        tracing.enable(on)
+        self.statusBar().showMessage(
+            "Tracing on" if on else f"Tracing off: {tracing.summary()}"
+        )
+
+    def memory_subsystems(self) -> tuple:
+        """Named roots for a memory snapshot, and what not to follow in them"""
+        subsystems = {"Networks": self.networks}
+        skip = {"Networks": ("_listeners", "recorder")}
+        for i in range(self.tabWidget.count()):
+            view = self.tabWidget.widget(i)
+            # Tabs may share a name, so the position keeps their rows apart
+            name = f"Tab {i + 1} ({self.tabWidget.tabText(i)})"
+            subsystems[f"{name}: grid"] = (view.data, view.span_info)
+            subsystems[f"{name}: fields"] = view.fields
+            subsystems[f"{name}: color rules"] = view.color_engine
+            if view.model is not None:
+                # The model shares the grid's rows; this is what it adds
+                subsystems[f"{name}: Qt model"] = view.model
+                skip[f"{name}: Qt model"] = ("issue_lookup",)
+        subsystems["Grid cache"] = self.grid_cache
+        subsystems["Validator"] = self.validator
+        return subsystems, skip
+
+    def memory_report(self):
+        """Show a memory breakdown and the changes since the last report"""
+        QtWidgets.QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
+        try:
+            subsystems, skip = self.memory_subsystems()
+            snapshot = memreport.take_snapshot(
+                subsystems, skip, {"Undo history": self.history.memory_used()}
+            )
+        finally:
+            QtWidgets.QApplication.restoreOverrideCursor()
+        report = memreport.format_report(snapshot, self.memory_snapshot)
+        self.memory_snapshot = snapshot
+        box = QtWidgets.QMessageBox(self)
+        box.setWindowTitle("Memory Report")
+        box.setText(report.split("\n\n")[0])
+        box.setDetailedText(report)
+        box.exec()
+
+    def export_trace(self):
+        """Save recorded spans for chrome://tracing or Perfetto"""
+        filename, selected_filter = QtWidgets.QFileDialog.getSaveFileName(
+            self, "Export Trace", "", "Chrome Trace (*.json)"
+        )
+        if not filename:
+            return
+        try:
+            count = tracing.export_chrome(filename)
+        except OSError as e:
+            QtWidgets.QMessageBox.critical(self, "Export Error", str(e))
+            return
+        self.statusBar().showMessage(f"Exported {count} trace events to {filename}")
+
+    def show_validation(self):
+        """Run a full validation and show the results panel"""
+        self.finish_loading()
+        self.revalidate()
+        self.issues_dock.show()
+        self.statusBar().showMessage(
+            f"Validation found {self.issues_list.count()} issues"
+        )
+
+    def issue_selected(self, item):
+        """Jump to the network an issue refers to"""
+        network = item.data(Qt.ItemDataRole.UserRole)
+        current_view = self.get_current_view()
+        if network and current_view:
+            current_view.show_network(network)
+
     def settings(self):
         """Open settings dialog for field and color configuration"""
         current_view = self.get_current_view()
@@ -1153,6 +2813,7 @@ class MainWindow(QtWidgets.QMainWindow):
         if dialog.exec() == QtWidgets.QDialog.DialogCode.Accepted:
             # Recompile patterns after settings change
             current_view.compile_field_patterns()
+            current_view.refresh()
             self.statusBar().showMessage("Settings updated")
 
     def print(self):
@@ -1174,51 +2835,145 @@ class MainWindow(QtWidgets.QMainWindow):
         if printDialog.exec() != QtWidgets.QDialog.DialogCode.Accepted:
             return
 
-        painter = QPainter(prn)
-
-        # Get page dimensions
-        page_rect = prn.pageRect(QPrinter.Unit.DevicePixel)
-        page_width = page_rect.width()
-        page_height = page_rect.height()
+        # Paint page-sized tiles from the grid data, not the widget
+        pages = printing.print_grid(prn, current_view.data)
 
-        # Add margins (0.5 inch margins = ~50 pixels at 96 DPI, scaled to printer)
-        margin = int(0.5 * prn.resolution())  # 0.5 inch margin
-        printable_width = page_width - (2 * margin)
-        printable_height = page_height - (2 * margin)
+        self.statusBar().showMessage(f"Printed {pages} pages")
 
-        # Get table widget
-        table = current_view.table
+    def export_grid(self):
+        """Export the current grid to a multi-page PDF or SVG pages"""
+        current_view = self.get_current_view()
+        if not current_view or not current_view.data:
+            QtWidgets.QMessageBox.warning(
+                self,
+                "Nothing to Export",
+                "Please generate a network visualization first.",
+            )
+            return
 
-        # Calculate table size needed
-        table_width = table.horizontalHeader().length()
-        table_height = table.verticalHeader().length()
+        filename, selected_filter = QtWidgets.QFileDialog.getSaveFileName(
+            self, "Export Grid", "", "PDF Files (*.pdf);;SVG Files (*.svg)"
+        )
+        if not filename:
+            return
 
-        # Calculate header sizes
-        header_height = table.horizontalHeader().height()
-        header_width = table.verticalHeader().width()
+        # Cells are edited in place on the GUI thread, so the I/O thread
+        # paints a copy; pages are written as they are painted
+        data = copy.deepcopy(current_view.data)
 
-        # Total size including headers
-        total_width = table_width + header_width
-        total_height = table_height + header_height
+        def export(job):
+            printing.export_grid(
+                data,
+                filename,
+                job.progress.emit,
+                job.is_cancelled,
+            )
+            job.check()
+            return filename
+
+        self.statusBar().showMessage(f"Exporting to {filename}")
+        self.run_io(
+            export,
+            lambda name: self.statusBar().showMessage(f"Exported to {name}"),
+            lambda error: QtWidgets.QMessageBox.critical(
+                self, "Export Error", f"Failed to export grid:\n{error}"
+            ),
+            lambda: self.statusBar().showMessage("Export cancelled"),
+            name="grid.export",
+            args={"path": filename},
+            show=True,
+        )
 
-        # Calculate scaling to fit on page while maintaining aspect ratio
-        scale_x = printable_width / total_width if total_width > 0 else 1
-        scale_y = printable_height / total_height if total_height > 0 else 1
-        scale = min(scale_x, scale_y, 1.0)  # Don't scale up, only down
+    def export_reports(self):
+        """Export reports for every tab or for listed networks in parallel"""
+        dialog = ReportDialog(self)
+        if dialog.exec() != QtWidgets.QDialog.DialogCode.Accepted:
+            return
+        formats = dialog.formats()
+        directory = dialog.directory_edit.text()
+        if not formats or not directory:
+            QtWidgets.QMessageBox.warning(
+                self, "Export Reports", "Choose at least one format and a directory."
+            )
+            return
+        if not self.finish_loading():
+            # Reports from the networks read so far would be incomplete
+            return
 
-        # Apply scaling and center on page
-        painter.translate(margin, margin)
-        painter.scale(scale, scale)
+        if dialog.all_tabs_radio.isChecked():
+            jobs = []
+            for i in range(self.tabWidget.count()):
+                view = self.tabWidget.widget(i)
+                if not view.displayNetwork.text():
+                    continue
+                jobs.append(
+                    {
+                        "name": self.tabWidget.tabText(i),
+                        "network": view.displayNetwork.text(),
+                        "start": int(view.displayStart.text()),
+                        "end": int(view.displayEnd.text()),
+                        # A copy, as fields may be edited while reports run
+                        "fields": dict(view.fields),
+                    }
+                )
+        else:
+            try:
+                jobs = dialog.specs()
+            except ValueError as e:
+                QtWidgets.QMessageBox.warning(self, "Invalid Spec", str(e))
+                return
+            fields = dict(self.get_current_view().fields)
+            for job in jobs:
+                job["fields"] = fields
+        if not jobs:
+            return
 
-        # Render the table view
-        table.render(painter)
+        # The pool is driven from a thread so the GUI keeps painting
+        self.report_thread = QtCore.QThread(self)
+        self.report_worker = reports.ReportWorker(
+            jobs, self.networks.to_dict(), directory, formats
+        )
+        self.report_worker.moveToThread(self.report_thread)
+        self.report_thread.started.connect(self.report_worker.run)
+        self.report_worker.progress.connect(
+            lambda done, total: self.statusBar().showMessage(
+                f"Reports: {done} of {total} done"
+            )
+        )
+        self.report_worker.finished.connect(
+            lambda result: self.reports_written(result, directory)
+        )
+        self.report_worker.failed.connect(
+            lambda error: QtWidgets.QMessageBox.critical(
+                self, "Report Error", f"Failed to export reports:\n{error}"
+            )
+        )
+        self.report_worker.finished.connect(self.report_thread.quit)
+        self.report_worker.failed.connect(self.report_thread.quit)
+        self.report_thread.finished.connect(self.report_worker.deleteLater)
+        self.report_thread.start()
+
+    def reports_written(self, result, directory):
+        """Report the written files and any jobs that failed"""
+        self.statusBar().showMessage(
+            f"Wrote {len(result.written)} report files to {directory}"
+        )
+        if result.errors:
+            QtWidgets.QMessageBox.warning(
+                self,
+                "Export Reports",
+                f"{len(result.errors)} of the reports could not be written:\n"
+                + "\n".join(result.errors[:20]),
+            )
 
-        painter.end()
 
-        self.statusBar().showMessage(f"Printed with {scale*100:.1f}% scaling")
+def main():
+    app = QtWidgets.QApplication([])
+    window = MainWindow()
+    window.show()
+    app.exec()
 
 
-app = QtWidgets.QApplication([])
-window = MainWindow()
-window.show()
-app.exec()
+# Report workers are spawned processes; they must not start the GUI
+if __name__ == "__main__":
+    main()
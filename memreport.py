@@ -0,0 +1,195 @@
+"""Memory accounting for the main data structures.
+
+A snapshot combines three measurements:
+
+* a structural estimate of each named subsystem, made by walking its
+  objects with ``sys.getsizeof``. Objects reachable from several
+  subsystems are counted once, under the first one measured;
+* Python heap totals and the top allocation sites from ``tracemalloc``,
+  when tracing is on, e.g. with ``PYTHONTRACEMALLOC=1``. A snapshot never
+  starts tracing itself, as every later allocation would pay for it;
+* the process resident set size, where the platform reports it.
+
+Qt's own C++ allocations are only visible in the resident size. Comparing
+two snapshots shows what grew between them.
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+import types
+from array import array
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+TOP_SITES = 10  # Allocation sites listed per snapshot
+
+# Not followed when walking objects: shared, immutable or owned elsewhere
+_ATOMIC = (str, bytes, int, float, bool, complex, type(None), range)
+_SKIPPED = (
+    type,
+    types.ModuleType,
+    types.FunctionType,
+    types.BuiltinFunctionType,
+    types.MethodType,
+)
+
+
+class MemorySnapshot(NamedTuple):
+    taken: float  # time.time()
+    subsystems: Dict[str, int]  # name -> estimated bytes
+    traced: Optional[int]  # Bytes allocated since tracing started, None if off
+    traced_peak: Optional[int]
+    rss: Optional[int]  # Resident set size in bytes, None if unknown
+    sites: List[Tuple[str, int]]  # (file:line, bytes) of top allocations
+
+
+def deep_sizeof(obj, seen: Optional[set] = None, skip: Iterable[str] = ()) -> int:
+    """Estimated bytes held by obj and everything it references.
+
+    Containers, arrays and plain objects are followed through their items,
+    ``__dict__`` and ``__slots__``. Modules, classes and functions are not.
+    Objects whose id is in ``seen`` are not counted again; ``seen`` is
+    updated so several calls can share it.
+
+    Args:
+        obj: Root object
+        seen: ids of objects already counted
+        skip: Attribute names of the root object not to follow
+    """
+    if seen is None:
+        seen = set()
+    skip = set(skip)
+    size = 0
+    stack = [(obj, True)]
+    while stack:
+        current, is_root = stack.pop()
+        if id(current) in seen or isinstance(current, _SKIPPED):
+            continue
+        seen.add(id(current))
+        size += sys.getsizeof(current, 0)
+        if isinstance(current, _ATOMIC) or isinstance(current, array):
+            continue
+        if isinstance(current, dict):
+            for key, value in current.items():
+                stack.append((key, False))
+                stack.append((value, False))
+        elif isinstance(current, (list, tuple, set, frozenset)):
+            stack.extend((item, False) for item in current)
+        else:
+            attributes = getattr(current, "__dict__", None)
+            if attributes is not None:
+                if is_root and skip:
+                    attributes = {k: v for k, v in attributes.items() if k not in skip}
+                    size += sys.getsizeof(attributes, 0)
+                    seen.add(id(attributes))
+                    stack.extend((v, False) for v in attributes.values())
+                else:
+                    stack.append((attributes, False))
+            for name in getattr(type(current), "__slots__", ()):
+                if hasattr(current, name) and not (is_root and name in skip):
+                    stack.append((getattr(current, name), False))
+    return size
+
+
+def resident_size() -> Optional[int]:
+    """Current resident set size of this process, or None if unknown"""
+    try:
+        with open("/proc/self/statm") as F1:
+            pages = int(F1.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import resource
+
+        # Peak rather than current, in KiB on Linux and bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    except (ImportError, OSError):
+        return None
+
+
+def take_snapshot(
+    subsystems: Dict[str, object],
+    skip: Optional[Dict[str, Iterable[str]]] = None,
+    known: Optional[Dict[str, int]] = None,
+) -> MemorySnapshot:
+    """Measure named subsystems and the whole process.
+
+    Args:
+        subsystems: {name: root object} in measuring order; objects shared
+            between subsystems are counted under the first
+        skip: Optional {name: attribute names of its root not to follow}
+        known: Optional {name: bytes} for subsystems that keep their own
+            estimate and should not be walked
+    """
+    traced = peak = None
+    sites = []
+    if tracemalloc.is_tracing():
+        # Python heap first, so walking the subsystems does not show up in it
+        traced, peak = tracemalloc.get_traced_memory()
+        statistics = tracemalloc.take_snapshot().filter_traces(
+            (
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, __file__),
+            )
+        ).statistics("lineno")
+        sites = [
+            (
+                f"{os.path.basename(s.traceback[0].filename)}:{s.traceback[0].lineno}",
+                s.size,
+            )
+            for s in statistics[:TOP_SITES]
+        ]
+    seen: set = set()
+    sizes = {}
+    for name, obj in subsystems.items():
+        sizes[name] = deep_sizeof(obj, seen, (skip or {}).get(name, ()))
+    sizes.update(known or {})
+    return MemorySnapshot(time.time(), sizes, traced, peak, resident_size(), sites)
+
+
+def _mb(size: Optional[int]) -> str:
+    return "?" if size is None else f"{size / (1024 * 1024):.1f} MB"
+
+
+def _delta(new: Optional[int], old: Optional[int]) -> str:
+    if new is None or old is None:
+        return ""
+    change = (new - old) / (1024 * 1024)
+    return f" ({change:+.1f} MB)"
+
+
+def format_report(
+    snapshot: MemorySnapshot, previous: Optional[MemorySnapshot] = None
+) -> str:
+    """Plain text report, with changes since previous when given"""
+    old = previous.subsystems if previous else {}
+    lines = [f"Resident size: {_mb(snapshot.rss)}"]
+    if previous:
+        lines[0] += _delta(snapshot.rss, previous.rss)
+        lines.append(f"Since snapshot {time.ctime(previous.taken)}")
+    if snapshot.traced is None:
+        lines.append("Python heap: not traced (run with PYTHONTRACEMALLOC=1)")
+    else:
+        lines.append(
+            f"Python heap (traced): {_mb(snapshot.traced)}, "
+            f"peak {_mb(snapshot.traced_peak)}"
+            + (_delta(snapshot.traced, previous.traced) if previous else "")
+        )
+    lines.append("")
+    lines.append("By subsystem (estimated):")
+    total = 0
+    for name, size in sorted(snapshot.subsystems.items(), key=lambda i: -i[1]):
+        total += size
+        change = _delta(size, old.get(name, 0)) if previous else ""
+        lines.append(f"  {name}: {_mb(size)}{change}")
+    for name in old.keys() - snapshot.subsystems.keys():
+        lines.append(f"  {name}: gone{_delta(0, old[name])}")
+    lines.append(f"  Total: {_mb(total)}")
+    if snapshot.sites:
+        lines.append("")
+        lines.append("Top allocation sites since tracing started:")
+        lines.extend(f"  {site}: {_mb(size)}" for site, size in snapshot.sites)
+    return "\n".join(lines)
@@ -0,0 +1,556 @@
+"""Observable, columnar store for the networks shared by all tabs.
+
+``NetworkStore`` behaves like the plain ``{cidr: {field: value}}`` dict it
+replaces, but every change bumps ``version`` and tells the subscribed
+listeners which keys changed. Changes made inside ``batch()`` are reported
+together, as one version step, when the outermost batch ends.
+
+Records are not kept as dicts. Each network is a row: its key is packed
+into one integer ``address << 6 | prefixlen``, the ordered tuple of its
+field names (its shape) is interned and shared by all rows with the same
+fields, and each field is a column of small integer codes into a pool of
+that field's distinct values. Values such as Location or Owner repeat
+across many networks, so each distinct value is stored once. Pools count
+the rows using each value and free it when the last one changes, so a
+long session of edits does not accumulate values no row holds any more.
+
+Reading a key builds a fresh dict from its row, so records must be
+replaced as a whole (``store[key] = record``) to change them. Changing a
+returned dict does not affect the store.
+
+The store also counts the rows using each field name, kept up to date as
+rows change shape, so the fields in use are known without a scan.
+
+For block queries the packed keys are also kept in a sorted array, built
+on first use. Keys added or removed later are held in small sets beside
+it and merged in once there are many, so ``keys_within`` bisects instead
+of scanning every row.
+
+An optional ``recorder`` callable is given ``(key, old record)`` before each
+key changes, with ``MISSING`` as the old record of a new key and ``None`` as
+the key when all records are replaced. The undo history uses it.
+"""
+
+import heapq
+from array import array
+from bisect import bisect_left
+from collections.abc import ItemsView, KeysView, MutableMapping, ValuesView
+from contextlib import contextmanager
+from functools import lru_cache
+from socket import inet_aton, inet_ntoa
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+import cidrutil
+
+# Listeners receive the changed keys, or None when everything changed
+Listener = Callable[[Optional[List[str]]], None]
+
+MISSING = object()  # Old record of a key that did not exist
+FREE = object()  # Pool slot whose value no row uses
+
+PREFIX_BITS = 6  # Enough for prefix lengths 0-32
+PREFIX_MASK = (1 << PREFIX_BITS) - 1
+DELETED = -1  # Shape id of a free row
+ORDER_PENDING = 1024  # Key changes held beside the sorted keys before merging
+
+
+@lru_cache(maxsize=1 << 15)
+def pack_key(key: str) -> Optional[int]:
+    """Pack ``a.b.c.d/n`` into one integer, or None if the key would not
+    be written back exactly the same way.
+
+    Grids look up the same keys on every rebuild, so results are cached.
+    """
+    address_text, sep, prefix_text = key.partition("/")
+    if not sep or not prefix_text.isascii() or not prefix_text.isdigit():
+        return None
+    if prefix_text[0] == "0" and len(prefix_text) > 1:
+        return None
+    try:
+        packed = inet_aton(address_text)
+    except (OSError, UnicodeError, ValueError):
+        return None
+    prefixlen = int(prefix_text)
+    if prefixlen > cidrutil.ADDRESS_BITS or inet_ntoa(packed) != address_text:
+        return None
+    return (int.from_bytes(packed, "big") << PREFIX_BITS) | prefixlen
+
+
+def unpack_key(packed: int) -> str:
+    return cidrutil.format_cidr(packed >> PREFIX_BITS, packed & PREFIX_MASK)
+
+
+class ValuePool:
+    """Distinct values of one field, each stored once and given a code.
+
+    ``intern`` counts a use of its value and ``release`` drops one; a value
+    nobody uses is freed and its code reused.
+    """
+
+    __slots__ = ("values", "codes", "uses", "free")
+
+    def __init__(self):
+        self.values: List[Any] = []  # code -> value, FREE if unused
+        self.codes: Dict[Any, int] = {}
+        self.uses: List[int] = []  # code -> rows using it
+        self.free: List[int] = []
+
+    def intern(self, value) -> int:
+        try:
+            code = self.codes[value]
+        except KeyError:
+            code = self.codes[value] = self._add(value)
+        except TypeError:
+            # Unhashable values (e.g. lists) are stored but not shared
+            code = self._add(value)
+        self.uses[code] += 1
+        return code
+
+    def _add(self, value) -> int:
+        if self.free:
+            code = self.free.pop()
+            self.values[code] = value
+        else:
+            code = len(self.values)
+            self.values.append(value)
+            self.uses.append(0)
+        return code
+
+    def release(self, code: int):
+        self.uses[code] -= 1
+        if self.uses[code]:
+            return
+        value, self.values[code] = self.values[code], FREE
+        try:
+            if self.codes.get(value) == code:
+                del self.codes[value]
+        except TypeError:
+            pass
+        self.free.append(code)
+
+    def live_values(self) -> Iterator[Tuple[int, Any]]:
+        """(code, value) of the values in use"""
+        for code, value in enumerate(self.values):
+            if value is not FREE:
+                yield code, value
+
+
+class NetworkStore(MutableMapping):
+    """Mapping of CIDR keys to field dicts with change notifications"""
+
+    def __init__(self, data: Optional[Dict[str, dict]] = None):
+        self.version = 0
+        self._listeners: List[Listener] = []
+        self._batch_depth = 0
+        self._pending: Optional[set] = set()  # None means a full reset
+        self.recorder: Optional[Callable] = None
+        self._reset()
+        for key, record in (data or {}).items():
+            self._store(key, record)
+
+    def _reset(self):
+        self._rows: Dict[int, int] = {}  # packed key -> row
+        self._odd_rows: Dict[str, int] = {}  # keys that cannot be packed
+        self._odd_keys: Dict[int, str] = {}  # row -> odd key
+        self._packed = array("q")  # row -> packed key
+        self._shape_of = array("i")  # row -> shape id, DELETED if free
+        self._shapes: List[tuple] = []  # shape id -> field names in order
+        self._shape_ids: Dict[tuple, int] = {}
+        # field -> rows using it; fields stay listed at 0 to keep their order
+        self._field_rows: Dict[str, int] = {}
+        self._columns: Dict[str, array] = {}  # field -> row -> value code
+        self._pools: Dict[str, ValuePool] = {}
+        self._free: List[int] = []
+        self._order: Optional[array] = None  # Sorted packed keys, built on demand
+        self._order_added: Set[int] = set()  # Packed keys not yet in _order
+        self._order_removed: Set[int] = set()  # Packed keys gone from _order
+
+    # Listeners
+
+    def subscribe(self, listener: Listener):
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener: Listener):
+        self._listeners.remove(listener)
+
+    def _changed(self, keys: Optional[Iterable[str]]):
+        if keys is None:
+            self._pending = None
+        elif self._pending is not None:
+            self._pending.update(keys)
+        if not self._batch_depth:
+            self._notify()
+
+    def _notify(self):
+        pending, self._pending = self._pending, set()
+        if pending is not None and not pending:
+            return
+        self.version += 1
+        changed = None if pending is None else sorted(pending)
+        for listener in list(self._listeners):
+            listener(changed)
+
+    @contextmanager
+    def batch(self):
+        """Report all changes made inside the block as one notification"""
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth:
+                self._notify()
+
+    # Rows
+
+    def _locate(self, key) -> tuple:
+        """Return (packed key or None, row or None) for a key"""
+        packed = pack_key(key) if isinstance(key, str) else None
+        if packed is None:
+            return None, self._odd_rows.get(key)
+        return packed, self._rows.get(packed)
+
+    def _row(self, key) -> Optional[int]:
+        return self._locate(key)[1]
+
+    def _key(self, row: int) -> str:
+        odd = self._odd_keys.get(row)
+        return odd if odd is not None else unpack_key(self._packed[row])
+
+    def _record(self, row: int) -> dict:
+        columns, pools = self._columns, self._pools
+        return {
+            field: pools[field].values[columns[field][row]]
+            for field in self._shapes[self._shape_of[row]]
+        }
+
+    def _count_shape(self, shape_id: int, change: int):
+        """Add change to the row counts of a shape's fields"""
+        if shape_id == DELETED:
+            return
+        field_rows = self._field_rows
+        for field in self._shapes[shape_id]:
+            field_rows[field] = field_rows.get(field, 0) + change
+
+    def _store(self, key: str, record: dict, located: Optional[tuple] = None):
+        packed, row = located or self._locate(key)
+        if row is None:
+            row = self._new_row(key, packed)
+        shape = tuple(record)
+        shape_id = self._shape_ids.get(shape)
+        if shape_id is None:
+            shape_id = self._shape_ids[shape] = len(self._shapes)
+            self._shapes.append(shape)
+            for field in shape:
+                if field not in self._columns:
+                    # Every column has a code, 0 if unused, for every row
+                    self._columns[field] = array("i", [0]) * len(self._packed)
+                    self._pools[field] = ValuePool()
+        old_shape_id = self._shape_of[row]
+        columns, pools = self._columns, self._pools
+        if old_shape_id == DELETED:
+            for field, value in record.items():
+                columns[field][row] = pools[field].intern(value)
+        else:
+            # Intern the new values before releasing the old ones, so a
+            # value kept by the edit is not freed on the way
+            codes = [
+                (field, pools[field].intern(value)) for field, value in record.items()
+            ]
+            self._release_values(row)
+            for field, code in codes:
+                columns[field][row] = code
+        if old_shape_id != shape_id:
+            self._count_shape(old_shape_id, -1)
+            self._count_shape(shape_id, 1)
+            self._shape_of[row] = shape_id
+
+    def _release_values(self, row: int):
+        """Drop the row's uses of its field values"""
+        shape_id = self._shape_of[row]
+        if shape_id == DELETED:
+            return
+        columns, pools = self._columns, self._pools
+        for field in self._shapes[shape_id]:
+            pools[field].release(columns[field][row])
+
+    def _new_row(self, key: str, packed: Optional[int]) -> int:
+        if self._free:
+            row = self._free.pop()
+            self._packed[row] = packed or 0
+        else:
+            row = len(self._packed)
+            self._packed.append(packed or 0)
+            self._shape_of.append(DELETED)
+            for column in self._columns.values():
+                column.append(0)
+        if packed is None:
+            self._odd_rows[key] = row
+            self._odd_keys[row] = key
+        else:
+            self._rows[packed] = row
+            if self._order is not None:
+                if packed in self._order_removed:
+                    self._order_removed.discard(packed)
+                else:
+                    self._order_added.add(packed)
+        return row
+
+    def _remove(self, key: str, row: int):
+        if self._odd_keys.pop(row, None) is not None:
+            del self._odd_rows[key]
+        else:
+            packed = self._packed[row]
+            del self._rows[packed]
+            if self._order is not None:
+                if packed in self._order_added:
+                    self._order_added.discard(packed)
+                else:
+                    self._order_removed.add(packed)
+        self._release_values(row)
+        self._count_shape(self._shape_of[row], -1)
+        self._shape_of[row] = DELETED
+        self._free.append(row)
+
+    def _live_rows(self) -> Iterator[int]:
+        shape_of = self._shape_of
+        for row in range(len(shape_of)):
+            if shape_of[row] != DELETED:
+                yield row
+
+    # Mapping interface
+
+    def __getitem__(self, key: str) -> dict:
+        row = self._row(key)
+        if row is None:
+            raise KeyError(key)
+        return self._record(row)
+
+    def __setitem__(self, key: str, record: dict):
+        located = self._locate(key)
+        if self.recorder:
+            row = located[1]
+            self.recorder(key, MISSING if row is None else self._record(row))
+        self._store(key, record, located)
+        self._changed((key,))
+
+    def __delitem__(self, key: str):
+        row = self._row(key)
+        if row is None:
+            raise KeyError(key)
+        if self.recorder:
+            self.recorder(key, self._record(row))
+        self._remove(key, row)
+        self._changed((key,))
+
+    def __iter__(self) -> Iterator[str]:
+        for row in self._live_rows():
+            yield self._key(row)
+
+    def __len__(self) -> int:
+        return len(self._shape_of) - len(self._free)
+
+    def __contains__(self, key) -> bool:
+        return self._row(key) is not None
+
+    def get(self, key, default=None):
+        row = self._row(key)
+        return default if row is None else self._record(row)
+
+    def keys(self):
+        return KeysView(self)
+
+    def values(self):
+        return _Values(self)
+
+    def items(self):
+        return _Items(self)
+
+    def update(self, other=(), **kwargs):
+        """Merge records, reported as a single change"""
+        with self.batch():
+            changes = dict(other, **kwargs)
+            for key, record in changes.items():
+                located = self._locate(key)
+                if self.recorder:
+                    row = located[1]
+                    self.recorder(key, MISSING if row is None else self._record(row))
+                self._store(key, record, located)
+            self._changed(changes)
+
+    def replace(self, data: Dict[str, dict]):
+        """Swap in a whole new set of networks, e.g. after loading a file"""
+        if self.recorder:
+            self.recorder(None, MISSING)
+        self._reset()
+        for key, record in data.items():
+            self._store(key, record)
+        self._changed(None)
+
+    def clear(self):
+        self.replace({})
+
+    def load(self, records: Dict[str, dict]):
+        """Add a chunk of records while loading a file.
+
+        Like replace(), loading is not recorded key by key; the recorder is
+        told all records are being replaced. Listeners get the chunk's keys.
+        """
+        if self.recorder:
+            self.recorder(None, MISSING)
+        for key, record in records.items():
+            self._store(key, record)
+        self._changed(records)
+
+    def fill(self, records: Dict[str, dict]):
+        """Add records read lazily from a database that is already open.
+
+        They were part of the file all along, so nothing is recorded for
+        undo, and keys already present, e.g. created since, are kept.
+        """
+        added = []
+        for key, record in records.items():
+            located = self._locate(key)
+            if located[1] is None:
+                self._store(key, record, located)
+                added.append(key)
+        self._changed(added)
+
+    def evict(self, keys: Iterable[str]):
+        """Drop records that can be read again from the open database.
+
+        Like fill(), this is not an edit and nothing is recorded for undo.
+        """
+        removed = []
+        for key in keys:
+            row = self._row(key)
+            if row is not None:
+                self._remove(key, row)
+                removed.append(key)
+        self._changed(removed)
+
+    def to_dict(self) -> Dict[str, dict]:
+        """Plain dict copy for serialisation"""
+        return dict(self.items())
+
+    # Column access
+
+    def field_names(self) -> List[str]:
+        """Every field name used by any network, in first-seen order"""
+        return [field for field, rows in self._field_rows.items() if rows]
+
+    def field_counts(self) -> Dict[str, int]:
+        """{field name: number of networks using it} for fields in use"""
+        return {field: rows for field, rows in self._field_rows.items() if rows}
+
+    def field_count(self, field: str) -> int:
+        return self._field_rows.get(field, 0)
+
+    def distinct_values(self, field: str) -> List[Any]:
+        """Distinct values networks hold for a field"""
+        pool = self._pools.get(field)
+        return [value for _, value in pool.live_values()] if pool else []
+
+    def packed_keys(self) -> array:
+        """Packed keys of all networks, except keys that cannot be packed"""
+        shape_of, packed, odd = self._shape_of, self._packed, self._odd_keys
+        return array(
+            "q",
+            (
+                packed[row]
+                for row in range(len(packed))
+                if shape_of[row] != DELETED and row not in odd
+            ),
+        )
+
+    def _sorted_keys(self) -> array:
+        """Sorted packed keys, except the pending changes beside them"""
+        pending = len(self._order_added) + len(self._order_removed)
+        if self._order is None:
+            self._order = array("q", sorted(self._rows))
+        elif pending > ORDER_PENDING:
+            removed = self._order_removed
+            self._order = array(
+                "q",
+                heapq.merge(
+                    (value for value in self._order if value not in removed),
+                    sorted(self._order_added),
+                ),
+            )
+        else:
+            return self._order
+        self._order_added, self._order_removed = set(), set()
+        return self._order
+
+    def keys_within(self, address: int, prefixlen: int) -> List[str]:
+        """Keys of networks inside a block, the block itself included.
+
+        Bisects the sorted packed keys; keys that could not be packed are
+        parsed individually.
+        """
+        start, end = cidrutil.network_range(address, prefixlen)
+        order = self._sorted_keys()
+        first = bisect_left(order, (start << PREFIX_BITS) | prefixlen)
+        last = bisect_left(order, end << PREFIX_BITS)
+        removed = self._order_removed
+        values = [
+            value
+            for value in order[first:last]
+            if (value & PREFIX_MASK) >= prefixlen and value not in removed
+        ]
+        if self._order_added:
+            values.extend(
+                value
+                for value in self._order_added
+                if (value & PREFIX_MASK) >= prefixlen
+                and start <= value >> PREFIX_BITS < end
+            )
+            values.sort()
+        keys = [unpack_key(value) for value in values]
+        mask = cidrutil.netmask(prefixlen)
+        for key in self._odd_rows:
+            parsed = cidrutil.parse_cidr(key) if isinstance(key, str) else None
+            if parsed and parsed[1] >= prefixlen and parsed[0] & mask == start:
+                keys.append(key)
+        return keys
+
+    def scan(self, field: str, predicate: Callable[[Any], bool]) -> List[str]:
+        """Keys of networks whose field value satisfies predicate.
+
+        The predicate runs once per distinct value, then the field's column
+        of codes is scanned.
+        """
+        pool = self._pools.get(field)
+        if pool is None:
+            return []
+        matching: Set[int] = {
+            code for code, value in pool.live_values() if predicate(value)
+        }
+        if not matching:
+            return []
+        having = {
+            shape_id
+            for shape_id, shape in enumerate(self._shapes)
+            if field in shape
+        }
+        column = self._columns[field]
+        shape_of = self._shape_of
+        return [
+            self._key(row)
+            for row in range(len(column))
+            if column[row] in matching and shape_of[row] in having
+        ]
+
+
+class _Values(ValuesView):
+    def __iter__(self):
+        store = self._mapping
+        for row in store._live_rows():
+            yield store._record(row)
+
+
+class _Items(ItemsView):
+    def __iter__(self):
+        store = self._mapping
+        for row in store._live_rows():
+            yield store._key(row), store._record(row)
@@ -0,0 +1,223 @@
+"""Paginated printing and export of subnet grids.
+
+Pages are painted from the grid data built by ``databuilder`` rather than
+from the on-screen widget. The grid is cut into page-sized tiles of rows
+and columns, every page repeats the column header, and pages are painted
+and written one at a time so memory does not grow with the grid.
+"""
+
+import os
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from PyQt6 import QtCore
+from PyQt6.QtCore import Qt, QMarginsF, QRect, QSize
+from PyQt6.QtGui import QColor, QFont, QPageLayout, QPageSize, QPainter, QPdfWriter
+from PyQt6.QtSvg import QSvgGenerator
+
+import databuilder
+
+# Layout in logical pixels at LOGICAL_DPI, scaled to the output device
+LOGICAL_DPI = 96
+COLUMN_WIDTH = 170
+ROW_HEIGHT = 36
+HEADER_HEIGHT = 24
+FONT_PIXELS = 11
+MARGIN_INCHES = 0.5
+
+# Letter landscape in logical pixels, used for SVG pages
+LETTER_LANDSCAPE = QSize(11 * LOGICAL_DPI, int(8.5 * LOGICAL_DPI))
+
+Page = Tuple[int, int, int, int]  # (first row, end row, first column, end column)
+
+
+class GridPaginator:
+    """Splits a grid into pages and paints them"""
+
+    def __init__(self, data: List[List[dict]], page_width: int, page_height: int):
+        """
+        Args:
+            data: Grid rows as built by databuilder.build_display_list
+            page_width: Usable page width in logical pixels
+            page_height: Usable page height in logical pixels
+        """
+        self.data = data
+        self.rows = len(data)
+        self.columns = len(data[0]) if data else 0
+        self.headers = databuilder.column_headers(data)
+        self.columns_per_page = max(1, page_width // COLUMN_WIDTH)
+        self.rows_per_page = max(1, (page_height - HEADER_HEIGHT) // ROW_HEIGHT)
+
+    def page_count(self) -> int:
+        row_pages = -(-self.rows // self.rows_per_page)
+        column_pages = -(-self.columns // self.columns_per_page)
+        return row_pages * column_pages
+
+    def pages(self) -> Iterator[Page]:
+        """Yield pages down each band of columns, then across"""
+        for first_col in range(0, self.columns, self.columns_per_page):
+            end_col = min(self.columns, first_col + self.columns_per_page)
+            for first_row in range(0, self.rows, self.rows_per_page):
+                end_row = min(self.rows, first_row + self.rows_per_page)
+                yield first_row, end_row, first_col, end_col
+
+    def span(self, column: int) -> int:
+        return 1 << (self.columns - 1 - column)
+
+    def paint_page(self, painter: QPainter, page: Page):
+        """Paint one page at the painter's origin in logical pixels"""
+        first_row, end_row, first_col, end_col = page
+        font = QFont(painter.font())
+        font.setPixelSize(FONT_PIXELS)
+        painter.setFont(font)
+        align_top = Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignTop
+        black = QColor("black")
+
+        for offset, column in enumerate(range(first_col, end_col)):
+            x = offset * COLUMN_WIDTH
+            header = QRect(x, 0, COLUMN_WIDTH, HEADER_HEIGHT)
+            painter.fillRect(header, QColor("lightgray"))
+            painter.setPen(black)
+            painter.drawRect(header)
+            painter.drawText(header, Qt.AlignmentFlag.AlignCenter, self.headers[column])
+
+            span = self.span(column)
+            row = first_row - first_row % span
+            while row < end_row:
+                # Merged cells are clipped to the page; the label is repeated
+                top = max(row, first_row)
+                bottom = min(row + span, end_row)
+                rect = QRect(
+                    x,
+                    HEADER_HEIGHT + (top - first_row) * ROW_HEIGHT,
+                    COLUMN_WIDTH,
+                    (bottom - top) * ROW_HEIGHT,
+                )
+                cell = self.data[row][column]
+                if color := cell.get("color"):
+                    painter.fillRect(rect, QColor(color))
+                painter.setPen(black)
+                painter.drawRect(rect)
+                painter.drawText(
+                    rect.adjusted(4, 2, -4, -2),
+                    align_top,
+                    databuilder.cell_text(cell).rstrip("\n"),
+                )
+                row += span
+
+
+def page_transform(
+    painter: QPainter, page_rect: QRect, dpi: int, margin_inches: float = MARGIN_INCHES
+) -> Tuple[int, int]:
+    """Set up the painter for logical pixels inside the page margins.
+
+    Args:
+        margin_inches: Margin to leave inside page_rect; 0 when page_rect is
+            already the paint rect of a device that keeps its own margins
+
+    Returns:
+        Usable (width, height) in logical pixels
+    """
+    margin = int(margin_inches * dpi)
+    scale = dpi / LOGICAL_DPI
+    painter.translate(margin, margin)
+    painter.scale(scale, scale)
+    return (
+        int((page_rect.width() - 2 * margin) / scale),
+        int((page_rect.height() - 2 * margin) / scale),
+    )
+
+
+def print_grid(printer, data: List[List[dict]], progress: Optional[Callable] = None):
+    """Print a grid on a QPrinter, one tile per page, inside its margins"""
+    painter = QPainter(printer)
+    page_rect = printer.pageRect(printer.Unit.DevicePixel).toRect()
+    width, height = page_transform(painter, page_rect, printer.resolution(), 0)
+    paginator = GridPaginator(data, width, height)
+    total = paginator.page_count()
+    for number, page in enumerate(paginator.pages()):
+        if number:
+            printer.newPage()
+        paginator.paint_page(painter, page)
+        if progress:
+            progress(number + 1, total)
+    painter.end()
+    return total
+
+
+def write_pdf(
+    data: List[List[dict]],
+    filename: str,
+    resolution: int = 300,
+    progress: Optional[Callable] = None,
+    cancelled: Optional[Callable] = None,
+):
+    """Write a grid to a multi-page Letter landscape PDF"""
+    writer = QPdfWriter(filename)
+    writer.setResolution(resolution)
+    writer.setPageSize(QPageSize(QPageSize.PageSizeId.Letter))
+    writer.setPageOrientation(QPageLayout.Orientation.Landscape)
+    margins = QMarginsF(MARGIN_INCHES, MARGIN_INCHES, MARGIN_INCHES, MARGIN_INCHES)
+    writer.setPageMargins(margins, QPageLayout.Unit.Inch)
+    painter = QPainter(writer)
+    # The painter starts at the paint rect, which already leaves the margins
+    page_rect = writer.pageLayout().paintRectPixels(resolution)
+    width, height = page_transform(painter, page_rect, resolution, 0)
+    paginator = GridPaginator(data, width, height)
+    total = paginator.page_count()
+    for number, page in enumerate(paginator.pages()):
+        if cancelled and cancelled():
+            break
+        if number:
+            writer.newPage()
+        paginator.paint_page(painter, page)
+        if progress:
+            progress(number + 1, total)
+    painter.end()
+
+
+def write_svg(
+    data: List[List[dict]],
+    filename: str,
+    resolution: int = LOGICAL_DPI,
+    progress: Optional[Callable] = None,
+    cancelled: Optional[Callable] = None,
+):
+    """Write a grid as one SVG file per page, numbered when there are several"""
+    base, ext = os.path.splitext(filename)
+    page_rect = QRect(QtCore.QPoint(0, 0), LETTER_LANDSCAPE)
+    margin = int(MARGIN_INCHES * LOGICAL_DPI)
+    paginator = GridPaginator(
+        data,
+        page_rect.width() - 2 * margin,
+        page_rect.height() - 2 * margin,
+    )
+    total = paginator.page_count()
+    for number, page in enumerate(paginator.pages()):
+        if cancelled and cancelled():
+            break
+        generator = QSvgGenerator()
+        generator.setFileName(
+            filename if total == 1 else f"{base}_{number + 1:03d}{ext}"
+        )
+        generator.setSize(page_rect.size())
+        generator.setViewBox(page_rect)
+        generator.setResolution(LOGICAL_DPI)
+        painter = QPainter(generator)
+        page_transform(painter, page_rect, LOGICAL_DPI)
+        paginator.paint_page(painter, page)
+        painter.end()
+        if progress:
+            progress(number + 1, total)
+
+
+def export_grid(
+    data: List[List[dict]],
+    filename: str,
+    progress: Optional[Callable] = None,
+    cancelled: Optional[Callable] = None,
+):
+    """Write a grid to a PDF, or to SVG pages when filename ends in .svg"""
+    if filename.lower().endswith(".svg"):
+        write_svg(data, filename, progress=progress, cancelled=cancelled)
+    else:
+        write_pdf(data, filename, progress=progress, cancelled=cancelled)
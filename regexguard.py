@@ -0,0 +1,251 @@
+"""Checks that keep a bad colour pattern from freezing the grid.
+
+Python's ``re`` backtracks, so a pattern such as ``(a+)+$`` can take
+exponential time on a value that almost matches. Patterns are checked in
+three ways:
+
+* ``analyze`` parses a pattern and reports an unbounded quantifier inside
+  another repeat whose run could end at more than one place, the usual
+  cause of catastrophic backtracking, without running it. ``(a+)+`` and
+  ``(.*a)*`` are refused; ``(ab+)*c`` is not, since each run of ``b``
+  must end where an ``a`` or the ``c`` begins.
+* ``probe`` runs patterns against near-miss inputs in a spawned process
+  that is killed if it takes too long, so a hang cannot reach the GUI.
+* ``TimedPattern`` wraps a compiled pattern at evaluation time and
+  disables it once a single match has been slow.
+"""
+
+import multiprocessing
+import queue
+import re
+import time
+from typing import Dict, List, Optional
+
+try:
+    import re._parser as _parser
+    import re._constants as _constants
+except ImportError:  # Python < 3.11
+    import sre_parse as _parser
+    import sre_constants as _constants
+
+PROBE_TIMEOUT = 1.0  # Seconds one pattern may take over all probe inputs
+PROBE_LENGTHS = (16, 24, 32)  # Long enough to expose exponential growth
+SLOW_MATCH = 0.05  # Seconds one match may take before the pattern is disabled
+
+_REPEATS = {_constants.MAX_REPEAT, _constants.MIN_REPEAT}
+_MAXREPEAT = _constants.MAXREPEAT
+
+# Character sets are approximated by the sample characters they contain
+_SAMPLE = frozenset(chr(code) for code in range(256)) | frozenset("\u0100\u4e2d")
+_NOTHING: frozenset = frozenset()
+_CATEGORIES = {
+    _constants.CATEGORY_DIGIT: re.compile(r"\d"),
+    _constants.CATEGORY_NOT_DIGIT: re.compile(r"\D"),
+    _constants.CATEGORY_SPACE: re.compile(r"\s"),
+    _constants.CATEGORY_NOT_SPACE: re.compile(r"\S"),
+    _constants.CATEGORY_WORD: re.compile(r"\w"),
+    _constants.CATEGORY_NOT_WORD: re.compile(r"\W"),
+}
+
+
+def _items(node):
+    """Child subpatterns of one parsed (op, argument) node"""
+    op, av = node
+    if op in _REPEATS:
+        yield av[2]
+    elif op is _constants.SUBPATTERN:
+        yield av[-1]
+    elif op is _constants.BRANCH:
+        yield from av[1]
+    elif op in (_constants.ASSERT, _constants.ASSERT_NOT):
+        yield av[1]
+
+
+def _literal(code: int) -> frozenset:
+    char = chr(code)
+    return frozenset((char, char.lower(), char.upper()))
+
+
+def _class_chars(items) -> frozenset:
+    """Sample characters matched by a parsed [...] class"""
+    negate = False
+    chars = set()
+    for op, av in items:
+        if op is _constants.NEGATE:
+            negate = True
+        elif op is _constants.LITERAL:
+            chars |= _literal(av)
+        elif op is _constants.RANGE:
+            chars |= {c for c in _SAMPLE if av[0] <= ord(c) <= av[1]}
+        elif op is _constants.CATEGORY and av in _CATEGORIES:
+            chars |= {c for c in _SAMPLE if _CATEGORIES[av].match(c)}
+        else:
+            return _SAMPLE  # Unknown item: assume it matches anything
+    return _SAMPLE - chars if negate else frozenset(chars)
+
+
+def _first(subpattern) -> tuple:
+    """(characters a subpattern can start with, whether it can match empty)"""
+    chars = _NOTHING
+    for node in subpattern:
+        node_chars, nullable = _node_first(node)
+        chars |= node_chars
+        if not nullable:
+            return chars, False
+    return chars, True
+
+
+def _node_first(node) -> tuple:
+    op, av = node
+    if op is _constants.LITERAL:
+        return _literal(av), False
+    if op is _constants.IN:
+        return _class_chars(av), False
+    if op in (_constants.ANY, _constants.NOT_LITERAL):
+        return _SAMPLE, False
+    if op in _REPEATS:
+        chars, nullable = _first(av[2])
+        return chars, nullable or av[0] == 0
+    if op is _constants.SUBPATTERN:
+        return _first(av[-1])
+    if op is _constants.BRANCH:
+        firsts = [_first(branch) for branch in av[1]]
+        chars = frozenset().union(*(chars for chars, _ in firsts))
+        return chars, any(nullable for _, nullable in firsts)
+    if op in (_constants.AT, _constants.ASSERT, _constants.ASSERT_NOT):
+        return _NOTHING, True  # Zero width
+    return _SAMPLE, True  # Back references and the like: assume anything
+
+
+def _ambiguous(subpattern, follow: frozenset, repeated: bool) -> bool:
+    """True if an unbounded repeat inside another repeat can end early.
+
+    ``follow`` holds the characters that can come after the subpattern.
+    An unbounded repeat whose body can start with one of the characters
+    that follow it can split the same text in several ways, and inside
+    another repeat those choices multiply. Possessive quantifiers and
+    atomic groups never backtrack and are not followed into, since the
+    parser does not report them as MAX/MIN_REPEAT or SUBPATTERN.
+    """
+    for i, node in enumerate(subpattern):
+        rest, rest_nullable = _first(subpattern[i + 1 :])
+        after = rest | follow if rest_nullable else rest
+        op, av = node
+        if op in _REPEATS:
+            body_first, _ = _first(av[2])
+            if repeated and av[1] == _MAXREPEAT and body_first & after:
+                return True
+            # Another pass through the body may follow the body
+            inner = after | body_first if av[1] > 1 else after
+            if _ambiguous(av[2], inner, repeated or av[1] > 1):
+                return True
+        elif op is _constants.SUBPATTERN:
+            if _ambiguous(av[-1], after, repeated):
+                return True
+        elif op is _constants.BRANCH:
+            if any(_ambiguous(branch, after, repeated) for branch in av[1]):
+                return True
+        elif op in (_constants.ASSERT, _constants.ASSERT_NOT):
+            if _ambiguous(av[1], _NOTHING, repeated):
+                return True
+    return False
+
+
+def analyze(pattern: str) -> Optional[str]:
+    """Return why a pattern is unsafe or invalid, or None if it looks fine"""
+    try:
+        parsed = _parser.parse(pattern)
+    except Exception as e:
+        return f"invalid regex: {e}"
+    if _ambiguous(list(parsed), _NOTHING, False):
+        return "nested quantifier can backtrack exponentially"
+    return None
+
+
+def probe_inputs(pattern: str) -> List[str]:
+    """Near-miss values built from the characters a pattern mentions.
+
+    Each is a run of one or two of those characters followed by a
+    character that is unlikely to match, which forces a backtracking
+    engine to try every way of splitting the run.
+    """
+    chars = sorted({c for c in pattern if c.isalnum() or c in " -_.:/@"}) or ["a"]
+    runs = list(chars) + [a + b for a, b in zip(chars, chars[1:])]
+    return [run * (length // len(run)) + "\x00" for run in runs for length in PROBE_LENGTHS]
+
+
+def _probe_worker(patterns: List[str], progress):
+    import re
+
+    for index, pattern in enumerate(patterns):
+        progress.put(index)
+        compiled = re.compile(pattern)
+        for value in probe_inputs(pattern):
+            compiled.match(value)
+            compiled.search(value)
+    progress.put(len(patterns))
+
+
+def probe(patterns: List[str], timeout: float = PROBE_TIMEOUT) -> Dict[str, str]:
+    """Run patterns on near-miss inputs in a separate process.
+
+    Returns {pattern: problem} for patterns that did not finish within
+    ``timeout`` seconds each. Invalid patterns should be filtered out with
+    ``analyze`` first.
+    """
+    problems: Dict[str, str] = {}
+    remaining = list(patterns)
+    context = multiprocessing.get_context("spawn")
+    while remaining:
+        progress = context.Queue()
+        process = context.Process(
+            target=_probe_worker, args=(remaining, progress), daemon=True
+        )
+        process.start()
+        current = None
+        try:
+            while True:
+                # The first message waits for the interpreter to start up
+                wait = timeout if current is not None else timeout + 10
+                try:
+                    current = progress.get(timeout=wait)
+                except queue.Empty:
+                    break
+                if current == len(remaining):
+                    break
+        finally:
+            if process.is_alive():
+                process.terminate()
+            process.join()
+        if current is None or current == len(remaining):
+            break
+        problems[remaining[current]] = (
+            f"took over {timeout:g}s on a {max(PROBE_LENGTHS)}-character value"
+        )
+        remaining = remaining[current + 1 :]
+    return problems
+
+
+class TimedPattern:
+    """Compiled pattern that disables itself after one slow match.
+
+    A single match cannot be interrupted, but once the pattern has been
+    slow it is no longer run, so it costs at most one slow match for the
+    life of the colour engine. Many fast matches never disable it.
+    """
+
+    __slots__ = ("pattern", "limit", "disabled")
+
+    def __init__(self, pattern, limit: float = SLOW_MATCH):
+        self.pattern = pattern
+        self.limit = limit
+        self.disabled: Optional[str] = None
+
+    def match(self, value: str):
+        if self.disabled:
+            return None
+        start = time.perf_counter()
+        result = self.pattern.match(value)
+        if time.perf_counter() - start > self.limit:
+            self.disabled = f"took over {self.limit:g}s on one value"
+        return result
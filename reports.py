@@ -0,0 +1,229 @@
+"""Batch report export.
+
+A report job is one supernet grid: it is built with ``databuilder``,
+coloured with a field configuration and written as CSV, static HTML and/or
+PDF. Jobs are independent, so they are spread over a process pool.
+"""
+
+import csv
+import html
+import os
+import re
+from bisect import bisect_left
+from ipaddress import IPv4Network
+from typing import Dict, List, NamedTuple
+
+from PyQt6 import QtCore
+
+import cidrutil
+import colorrules
+import databuilder
+import printing
+import workers
+
+FORMATS = ("csv", "html", "pdf")
+
+_gui_app = None  # Per-process QGuiApplication needed to paint PDFs
+
+
+class ReportResult(NamedTuple):
+    written: List[str]  # Paths of all written files
+    errors: List[str]  # "name: error" for each job that failed
+
+
+def parse_spec(line: str) -> dict:
+    """Parse a report spec such as ``10.0.0.0/16 16-24`` or ``10.0.0.0/16 16 24``.
+
+    Raises:
+        ValueError: If the spec is malformed
+    """
+    parts = line.replace("-", " ").split()
+    if len(parts) != 3:
+        raise ValueError(f"Expected 'network start end', got {line!r}")
+    network = IPv4Network(parts[0], strict=False)
+    return {
+        "name": str(network).replace("/", "_"),
+        "network": str(network),
+        "start": int(parts[1]),
+        "end": int(parts[2]),
+    }
+
+
+def networks_within(networks, jobs: List[dict]) -> List[Dict[str, dict]]:
+    """Return, per job, only the networks inside its block.
+
+    Workers then receive a small slice each instead of the whole dataset.
+    """
+    index = []
+    for key in networks.keys():
+        parsed = cidrutil.parse_cidr(key)
+        if parsed is not None:
+            index.append((cidrutil.network_range(*parsed)[0], key))
+    index.sort()
+    starts = [start for start, key in index]
+
+    slices = []
+    for job in jobs:
+        network = databuilder.check_cidr(
+            IPv4Network(job["network"], strict=False), job["start"]
+        )
+        first = int(network.network_address)
+        last = first + network.num_addresses
+        inside = index[bisect_left(starts, first) : bisect_left(starts, last)]
+        slices.append({key: networks[key] for start, key in inside})
+    return slices
+
+
+def build_grid(job: dict, networks: Dict[str, dict]) -> List[List[dict]]:
+    """Build and colour the grid for a job"""
+    network = IPv4Network(job["network"], strict=False)
+    network = databuilder.check_cidr(network, job["start"])
+    data, spans = databuilder.build_display_list(network, job["start"], job["end"])
+    colorrules.ColorEngine(job["fields"]).apply(data, networks)
+    return data
+
+
+def write_csv(path: str, data: List[List[dict]]):
+    """Write one row per block: network, colour and every field value"""
+    field_names = []
+    for row in data:
+        for cell in row:
+            for key in cell:
+                if key not in ("network", "spansize", "color", *field_names):
+                    field_names.append(key)
+    with open(path, "w", newline="") as F1:
+        writer = csv.writer(F1)
+        writer.writerow(["Network", "Color"] + field_names)
+        for row in data:
+            for cell in row:
+                if "network" in cell:
+                    writer.writerow(
+                        [cell["network"], cell.get("color") or ""]
+                        + [cell.get(name, "") for name in field_names]
+                    )
+
+
+def write_html(path: str, data: List[List[dict]], title: str):
+    """Write a static HTML table with merged cells and colours"""
+    with open(path, "w") as F1:
+        F1.write(
+            f"<!DOCTYPE html>\n<html><head><meta charset='utf-8'>"
+            f"<title>{html.escape(title)}</title>"
+            "<style>table{border-collapse:collapse;font:12px sans-serif}"
+            "td,th{border:1px solid #999;padding:2px 4px;vertical-align:top}"
+            "</style></head><body>\n"
+            f"<h1>{html.escape(title)}</h1>\n<table>\n<tr>"
+        )
+        for header in databuilder.column_headers(data):
+            F1.write(f"<th>{html.escape(header)}</th>")
+        F1.write("</tr>\n")
+        for row in data:
+            F1.write("<tr>")
+            for cell in row:
+                if "network" not in cell:
+                    continue  # Covered by a rowspan above
+                style = ""
+                if color := cell.get("color"):
+                    style = f" style='background:{html.escape(color)}'"
+                text = html.escape(databuilder.cell_text(cell).rstrip("\n"))
+                F1.write(
+                    f"<td rowspan='{cell['spansize']}'{style}>"
+                    f"{text.replace(chr(10), '<br>')}</td>"
+                )
+            F1.write("</tr>\n")
+        F1.write("</table></body></html>\n")
+
+
+def write_pdf(path: str, data: List[List[dict]]):
+    """Write a paginated PDF using the print layout"""
+    printing.write_pdf(data, path)
+
+
+def _init_worker(need_gui: bool):
+    """Process pool initializer; painting text needs a GUI application"""
+    global _gui_app
+    if need_gui and _gui_app is None:
+        from PyQt6.QtGui import QGuiApplication
+
+        _gui_app = QGuiApplication(["reports", "-platform", "offscreen"])
+
+
+def run_job(job: dict, networks: Dict[str, dict], directory: str, formats) -> List[str]:
+    """Build one report and write it in each requested format"""
+    data = build_grid(job, networks)
+    base = os.path.join(directory, re.sub(r"[^\w.-]+", "_", job["name"]))
+    written = []
+    if "csv" in formats:
+        write_csv(base + ".csv", data)
+        written.append(base + ".csv")
+    if "html" in formats:
+        write_html(base + ".html", data, job["name"])
+        written.append(base + ".html")
+    if "pdf" in formats:
+        write_pdf(base + ".pdf", data)
+        written.append(base + ".pdf")
+    return written
+
+
+def export_reports(
+    jobs: List[dict],
+    networks,
+    directory: str,
+    formats=FORMATS,
+    max_workers=None,
+    progress=None,
+) -> ReportResult:
+    """Run all jobs in a process pool.
+
+    Args:
+        jobs: Dicts with name, network, start, end and fields
+        networks: Networks dictionary shared by all jobs
+        directory: Output directory
+        formats: Any of "csv", "html", "pdf"
+        max_workers: Pool size, defaults to the number of CPUs
+        progress: Optional callable(done, total)
+
+    Returns:
+        ReportResult with the written files and the jobs that failed
+    """
+    written = []
+    errors = []
+    slices = networks_within(networks, jobs)
+    arguments = [
+        (job, subset, directory, tuple(formats)) for job, subset in zip(jobs, slices)
+    ]
+    with workers.spawn_pool(max_workers, _init_worker, ("pdf" in formats,)) as pool:
+        for index, future in workers.run_all(pool, run_job, arguments, progress):
+            if future.exception() is None:
+                written.extend(future.result())
+            else:
+                errors.append(f"{jobs[index]['name']}: {future.exception()}")
+    return ReportResult(written, errors)
+
+
+class ReportWorker(QtCore.QObject):
+    """Runs export_reports from a QThread so the GUI stays responsive"""
+
+    progress = QtCore.pyqtSignal(int, int)
+    finished = QtCore.pyqtSignal(object)
+    failed = QtCore.pyqtSignal(str)
+
+    def __init__(self, jobs, networks, directory, formats):
+        super().__init__()
+        self.jobs = jobs
+        self.networks = networks
+        self.directory = directory
+        self.formats = formats
+
+    def run(self):
+        try:
+            result = export_reports(
+                self.jobs,
+                self.networks,
+                self.directory,
+                self.formats,
+                progress=self.progress.emit,
+            )
+            self.finished.emit(result)
+        except Exception as e:
+            self.failed.emit(str(e))
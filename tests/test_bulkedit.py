@@ -0,0 +1,25 @@
+import pytest
+
+import bulkedit
+import netstore
+from bulkedit import REPLACE, SET, FieldEdit
+
+
+@pytest.mark.parametrize("template", [r"\1", r"\g<x>", r"\g<1", "\\"])
+def test_bad_replacement_is_rejected_before_any_record(template):
+    store = netstore.NetworkStore({"10.0.0.0/24": {"Name": "abc"}})
+    edits = [
+        FieldEdit("Site", SET, "B"),
+        FieldEdit("Name", REPLACE, template, "b"),
+    ]
+    with pytest.raises(ValueError):
+        bulkedit.bulk_changes(store, list(store), edits)
+    assert store["10.0.0.0/24"] == {"Name": "abc"}
+
+
+def test_group_references_in_replacements():
+    store = netstore.NetworkStore({"10.0.0.0/24": {"Name": "abc"}})
+    edits = [FieldEdit("Name", REPLACE, r"<\1>", "(b)")]
+    assert bulkedit.bulk_changes(store, list(store), edits) == {
+        "10.0.0.0/24": {"Name": "a<b>c"}
+    }
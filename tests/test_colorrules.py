@@ -0,0 +1,31 @@
+import colorrules
+
+
+def field(colormap):
+    return {"controlType": "lineEdit", "colorMap": colormap, "show": False}
+
+
+def test_colormap_order_keeps_engines_apart():
+    first = {"Name": field({"a": "red", "ab": "blue"})}
+    second = {"Name": field({"ab": "blue", "a": "red"})}
+    red = colorrules.shared_engine(first)
+    blue = colorrules.shared_engine(second)
+    assert red is not blue
+    assert red.network_color({"Name": "abc"}) == "red"
+    assert blue.network_color({"Name": "abc"}) == "blue"
+
+
+def test_equal_fields_share_an_engine():
+    first = {"Name": field({"a": "red"}), "Site": field({})}
+    second = {"Site": field({}), "Name": field({"a": "red"})}
+    assert colorrules.shared_engine(first) is colorrules.shared_engine(second)
+
+
+def test_share_fields_keeps_colormap_order():
+    pool = {}
+    a = colorrules.share_fields({"Name": field({"a": "red", "ab": "blue"})}, pool)
+    b = colorrules.share_fields({"Name": field({"ab": "blue", "a": "red"})}, pool)
+    assert a["Name"] is not b["Name"]
+    assert list(b["Name"]["colorMap"]) == ["ab", "a"]
+    c = colorrules.share_fields({"Name": field({"a": "red", "ab": "blue"})}, pool)
+    assert c["Name"] is a["Name"]
@@ -0,0 +1,144 @@
+import sqlite3
+
+import pytest
+
+import cidrutil
+import dbops
+
+FIELDS = {"Name": {"controlType": "lineEdit", "colorWeight": 1, "show": True}}
+
+
+def networks(count, third=0):
+    return {
+        f"10.{third}.{i}.0/24": {"Name": f"net{i}", "Site": "A" if i % 2 else "B"}
+        for i in range(count)
+    }
+
+
+def saved_session(tmp_path, data, **options):
+    path = str(tmp_path / "networks.db")
+    writer = dbops.DatabaseSession(path)
+    writer.save([{"name": "Main", "fields": FIELDS, "networks": data}])
+    writer.close()
+    session = dbops.DatabaseSession(path, **options)
+    session.open()
+    return session
+
+
+def block(cidr):
+    return cidrutil.parse_cidr(cidr)
+
+
+def test_backend_follows_the_extension():
+    assert dbops.backend_for("a.sqlite") is dbops.SqliteDatabase
+    assert dbops.backend_for("A.DB") is dbops.SqliteDatabase
+    assert dbops.backend_for("a.accdb") is dbops.AccessDatabase
+    assert isinstance(dbops.DatabaseSession("a.db").db, dbops.SqliteDatabase)
+
+
+def test_pages_read_every_network_once(tmp_path):
+    data = networks(23)
+    data["10.0.3.128/25"] = {"Name": "same address as 10.0.3.0/24"}
+    session = saved_session(tmp_path, data, page_rows=5)
+    assert session.open()[0]["fields"]["Name"]["show"] is True
+    read = {}
+    pages = 0
+    while page := session.load_next_page():
+        assert not set(page) & set(read)
+        read.update(page)
+        pages += 1
+    assert read == data
+    assert pages > 1
+    assert session.complete()
+
+
+def test_operations_reconnect_after_the_connection_drops(tmp_path):
+    session = saved_session(tmp_path, networks(10))
+    session.db.conn.close()
+    assert session.load_range(*cidrutil.network_range(*block("10.0.0.0/16"))) == (
+        networks(10)
+    )
+
+    calls = []
+
+    def flaky(db):
+        calls.append(db.conn)
+        if len(calls) == 1:
+            raise sqlite3.OperationalError("disk I/O error")
+        return db.count_networks()
+
+    assert session.run(flaky) == 10
+    assert calls[0] is not calls[1]
+
+    def broken(db):
+        raise sqlite3.OperationalError("still failing")
+
+    with pytest.raises(dbops.DatabaseError):
+        session.run(broken)
+
+
+def test_windowed_sessions_drop_the_least_recently_used_blocks(tmp_path):
+    data = {**networks(4, 0), **networks(4, 1), **networks(4, 2)}
+    session = saved_session(tmp_path, data, window_threshold=5, window_rows=8)
+    assert session.windowed
+    assert len(session.load_block(*block("10.0.0.0/16"))) == 4
+    assert len(session.load_block(*block("10.1.0.0/16"))) == 4
+    assert session.blocks_to_drop() == []
+    assert len(session.load_block(*block("10.2.0.0/16"))) == 4
+    assert session.blocks_to_drop() == [block("10.0.0.0/16")]
+    # A dropped block is read again, a kept one is not
+    assert session.load_block(*block("10.1.0.0/16")) == {}
+    assert len(session.load_block(*block("10.0.0.0/16"))) == 4
+    assert session.blocks_to_drop() == [block("10.2.0.0/16")]
+
+
+def test_save_changes_writes_only_changed_networks(tmp_path):
+    data = networks(6)
+    session = saved_session(tmp_path, data)
+    session.load_rest({})
+    tabs = [{"name": "Renamed", "fields": FIELDS}]
+    current = dict(data)
+    current["10.0.1.0/24"] = {"Name": "edited"}
+    del current["10.0.2.0/24"]
+    current["10.9.0.0/16"] = {"Name": "new"}
+    session.note_changes(["10.0.1.0/24", "10.0.2.0/24", "10.9.0.0/16"])
+
+    changes = session.take_changes(current)
+    assert changes["10.0.2.0/24"] is None
+    session.save_changes(tabs, changes)
+    assert not session.dirty and not session.saving
+    session.close()
+
+    reopened = dbops.DatabaseSession(session.path)
+    assert reopened.open()[0]["name"] == "Renamed"
+    loaded = {}
+    reopened.load_rest(loaded)
+    assert loaded == current
+
+
+def test_failed_save_changes_keeps_the_keys_dirty(tmp_path):
+    session = saved_session(tmp_path, networks(3))
+    session.note_changes(["10.0.0.0/24"])
+    changes = session.take_changes({"10.0.0.0/24": {"Name": "edited"}})
+    with pytest.raises(dbops.DatabaseError):
+        session.save_changes([], changes)
+    assert session.dirty == {"10.0.0.0/24"}
+    assert not session.saving
+
+
+def test_normalized_find_and_value_counts(tmp_path):
+    session = saved_session(tmp_path, networks(6))
+    with pytest.raises(dbops.DatabaseError):
+        session.find("net")
+    session.normalize()
+    assert session.normalized
+    assert sorted(session.find("NET3")) == ["10.0.3.0/24"]
+    assert sorted(session.find("b", field="Site")) == [
+        "10.0.0.0/24",
+        "10.0.2.0/24",
+        "10.0.4.0/24",
+    ]
+    assert session.find("%") == []
+    assert session.value_counts("Site") == {"A": 3, "B": 3}
+    session.note_changes(["10.0.5.0/24"])
+    assert "10.0.5.0/24" in session.find("nothing like this")
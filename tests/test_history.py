@@ -0,0 +1,37 @@
+import history
+import netstore
+
+
+def edit(store, hist, key, value):
+    with hist.step(f"Set {key}"):
+        store[key] = {"Name": value}
+
+
+def test_redo_steps_are_trimmed_before_undo_steps():
+    store = netstore.NetworkStore()
+    hist = history.History(store, max_memory=10**9)
+    for i in range(6):
+        edit(store, hist, f"10.0.{i}.0/24", "x" * 1000)
+    for _ in range(3):
+        hist.undo()
+    sizes = [step.size for step in hist._undo] + [step.size for step in hist._redo]
+    hist.max_memory = sum(sizes) - 1
+    hist.undo()
+    assert len(hist._undo) == 2
+    assert len(hist._redo) == 3
+    assert hist.redo_label() == "Set 10.0.2.0/24"
+    assert hist.memory_used() <= hist.max_memory
+
+
+def test_a_step_over_the_budget_clears_the_history_and_is_reported():
+    store = netstore.NetworkStore()
+    dropped = []
+    hist = history.History(store, max_memory=5000, on_too_large=dropped.append)
+    edit(store, hist, "10.0.0.0/24", "small")
+    assert hist.can_undo()
+    with hist.step("Bulk edit"):
+        for i in range(200):
+            store[f"10.1.{i}.0/24"] = {"Name": "x" * 100}
+    assert dropped == ["Bulk edit"]
+    assert not hist.can_undo()
+    assert not hist.can_redo()
@@ -0,0 +1,24 @@
+import tracemalloc
+
+import memreport
+
+
+def test_snapshot_does_not_leave_tracing_on():
+    assert not tracemalloc.is_tracing()
+    snapshot = memreport.take_snapshot({"data": {"a": [1, 2, 3]}})
+    assert not tracemalloc.is_tracing()
+    assert snapshot.traced is None and snapshot.sites == []
+    assert snapshot.subsystems["data"] > 0
+    assert "not traced" in memreport.format_report(snapshot)
+
+
+def test_snapshot_reads_the_heap_while_tracing():
+    tracemalloc.start()
+    try:
+        kept = [bytearray(1000) for _ in range(100)]
+        snapshot = memreport.take_snapshot({"kept": kept})
+    finally:
+        tracemalloc.stop()
+    assert snapshot.traced >= 100_000
+    assert snapshot.sites
+    assert "Top allocation sites" in memreport.format_report(snapshot, snapshot)
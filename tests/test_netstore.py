@@ -0,0 +1,113 @@
+import random
+from collections import Counter
+
+import cidrutil
+import netstore
+
+
+def brute_within(keys, cidr):
+    address, prefixlen = cidrutil.parse_cidr(cidr)
+    start, end = cidrutil.network_range(address, prefixlen)
+    found = []
+    for key in keys:
+        parsed = cidrutil.parse_cidr(key)
+        if parsed and parsed[1] >= prefixlen and start <= parsed[0] < end:
+            found.append(key)
+    return sorted(found)
+
+
+def random_key(rng):
+    prefixlen = rng.choice([8, 16, 20, 24, 24, 28, 32])
+    address = rng.randrange(1 << 32) & cidrutil.netmask(prefixlen)
+    return cidrutil.format_cidr(address, prefixlen)
+
+
+def test_keys_within_follows_edits():
+    rng = random.Random(7)
+    store = netstore.NetworkStore({random_key(rng): {} for _ in range(3000)})
+    queries = ["10.0.0.0/8", "0.0.0.0/0", "192.168.0.0/16"] + [
+        random_key(rng) for _ in range(20)
+    ]
+    for step in range(3000):
+        key = random_key(rng)
+        if key in store and rng.random() < 0.5:
+            del store[key]
+        else:
+            store[key] = {"Name": str(step)}
+        if step % 500 == 0:
+            for cidr in queries:
+                result = store.keys_within(*cidrutil.parse_cidr(cidr))
+                assert sorted(result) == brute_within(store.keys(), cidr)
+
+
+def test_keys_within_includes_keys_that_cannot_be_packed():
+    store = netstore.NetworkStore({"10.0.0.0/24": {}, "10.0.0.010/32": {}})
+    assert sorted(store.keys_within(*cidrutil.parse_cidr("10.0.0.0/8"))) == [
+        "10.0.0.0/24"
+    ]
+    store.replace({"10.1.0.0/16": {}})
+    assert store.keys_within(*cidrutil.parse_cidr("10.0.0.0/8")) == ["10.1.0.0/16"]
+
+
+def test_field_counts_follow_edits():
+    rng = random.Random(1)
+    store = netstore.NetworkStore()
+    records = {}
+    for i in range(2000):
+        key = f"10.{rng.randrange(4)}.{rng.randrange(50)}.0/24"
+        if key in records and rng.random() < 0.3:
+            del store[key]
+            del records[key]
+        else:
+            record = {field: i for field in rng.sample("ABCDE", rng.randrange(4))}
+            store[key] = record
+            records[key] = record
+    expected = Counter(field for record in records.values() for field in record)
+    assert store.field_counts() == dict(expected)
+
+
+def test_value_pools_free_values_no_row_uses():
+    store = netstore.NetworkStore({"10.0.0.0/24": {"Name": "a", "Tags": ["x"]}})
+    for step in range(1000):
+        store["10.0.0.0/24"] = {"Name": f"name {step}", "Tags": [step]}
+    pools = store._pools
+    assert len(pools["Name"].values) <= 2
+    assert len(pools["Tags"].values) <= 2
+    assert store["10.0.0.0/24"] == {"Name": "name 999", "Tags": [999]}
+
+    store["10.0.1.0/24"] = {"Name": "shared"}
+    store["10.0.2.0/24"] = {"Name": "shared"}
+    store["10.0.0.0/24"] = {"Name": "shared"}
+    assert store.distinct_values("Name") == ["shared"]
+    del store["10.0.1.0/24"]
+    store.evict(["10.0.2.0/24"])
+    assert store.distinct_values("Name") == ["shared"]
+    store["10.0.3.0/24"] = {"Name": "new"}
+    assert sorted(store.distinct_values("Name")) == ["new", "shared"]
+    assert store.scan("Name", lambda value: value == "shared") == ["10.0.0.0/24"]
+    assert store.to_dict() == {
+        "10.0.0.0/24": {"Name": "shared"},
+        "10.0.3.0/24": {"Name": "new"},
+    }
+
+
+def test_value_pools_match_a_fresh_store_under_edits():
+    rng = random.Random(11)
+    store = netstore.NetworkStore()
+    records = {}
+    for step in range(3000):
+        key = f"10.0.{rng.randrange(60)}.0/24"
+        if key in records and rng.random() < 0.3:
+            del store[key]
+            del records[key]
+        else:
+            record = {"Site": rng.choice("ABCDEFGH")}
+            if rng.random() < 0.5:
+                record["Owner"] = f"owner {rng.randrange(20)}"
+            store[key] = record
+            records[key] = record
+    assert store.to_dict() == records
+    for field in ("Site", "Owner"):
+        expected = {r[field] for r in records.values() if field in r}
+        assert sorted(store.distinct_values(field)) == sorted(expected)
+        assert sum(store._pools[field].uses) == store.field_count(field)
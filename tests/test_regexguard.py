@@ -0,0 +1,33 @@
+import re
+
+import pytest
+
+import regexguard
+
+
+@pytest.mark.parametrize(
+    "pattern", [r"(a+)+$", r"(.*a)*", r"(\w+\s?)*$", r"(a*)*", r"(x+x+)+y"]
+)
+def test_analyze_refuses_ambiguous_nested_repeats(pattern):
+    assert regexguard.analyze(pattern)
+
+
+@pytest.mark.parametrize(
+    "pattern", [r"(ab+)*c", r"(\d+\.)+", r"([a-z]+-)*[a-z]+", r"^\w", r"(a|b)+c"]
+)
+def test_analyze_accepts_safe_patterns(pattern):
+    assert regexguard.analyze(pattern) is None
+
+
+def test_many_fast_matches_keep_a_pattern_enabled():
+    pattern = regexguard.TimedPattern(re.compile(r"\w"))
+    for i in range(100000):
+        assert pattern.match(f"value{i}")
+    assert pattern.disabled is None
+
+
+def test_one_slow_match_disables_a_pattern():
+    pattern = regexguard.TimedPattern(re.compile(r"(a+)+$"), limit=0.001)
+    pattern.match("a" * 22 + "!")
+    assert pattern.disabled
+    assert pattern.match("a") is None
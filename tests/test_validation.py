@@ -0,0 +1,65 @@
+import random
+
+import pytest
+
+import cidrutil
+import validation
+
+
+def random_key(rng):
+    prefixlen = rng.choice([8, 16, 24, 24, 26, 28])
+    address = rng.randrange(1 << 16) << 16 | rng.randrange(4) << 8
+    if rng.random() < 0.9:
+        address &= cidrutil.netmask(prefixlen)
+    return cidrutil.format_cidr(address, prefixlen)
+
+
+def test_check_keys_matches_a_full_validation():
+    rng = random.Random(3)
+    locations = ["London", "Paris", None]
+    networks = {}
+    validator = validation.NetworkValidator()
+    validator.validate(networks)
+    before = {}
+    for step in range(1500):
+        key = random_key(rng) if rng.random() < 0.98 else f"bogus{step % 7}"
+        if key in networks and rng.random() < 0.4:
+            del networks[key]
+        else:
+            location = rng.choice(locations)
+            networks[key] = {"Location": location} if location else {}
+        changed = validator.check_keys(networks, [key])
+        after = {k: validator.issues_for_key(k) for k in networks}
+        assert changed == {
+            k for k in set(before) | set(after) if before.get(k, []) != after.get(k, [])
+        }
+        before = {k: issues for k, issues in after.items() if issues}
+        if step % 100 == 0:
+            incremental = validator.issues()
+            assert validation.NetworkValidator().validate(networks) == incremental
+            assert list(validator._sorted) == sorted(validator._sorted)
+
+
+@pytest.mark.parametrize("share", [0.0, 1.0])  # Full check, incremental
+def test_bulk_change_matches_a_full_validation(monkeypatch, share):
+    monkeypatch.setattr(validation, "FULL_CHECK_SHARE", share)
+    rng = random.Random(5)
+    networks = {random_key(rng): {"Location": "London"} for _ in range(2000)}
+    validator = validation.NetworkValidator()
+    validator.validate(networks)
+    before = {key: validator.issues_for_key(key) for key in networks}
+    keys = rng.sample(sorted(networks), 600)
+    for key in keys[:300]:
+        networks[key] = {"Location": "Paris"}
+    for key in keys[300:400]:
+        del networks[key]
+    added = [random_key(rng) for _ in range(200)]
+    for key in added:
+        networks[key] = {"Location": rng.choice(["London", "Paris"])}
+
+    changed = validator.check_keys(networks, keys[:400] + added)
+    assert validator.issues() == validation.NetworkValidator().validate(networks)
+    after = {key: validator.issues_for_key(key) for key in networks}
+    assert changed == {
+        k for k in set(before) | set(after) if before.get(k, []) != after.get(k, [])
+    }
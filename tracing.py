@@ -0,0 +1,158 @@
+"""Lightweight timing spans for finding out where time goes.
+
+Wrap an operation in ``with tracing.span("name"):`` or decorate a function
+with ``@tracing.traced("name")``. While tracing is off a span is a shared
+no-op object, so instrumentation can stay in hot paths. While it is on,
+each span adds to a per-name total and, unless it was created with
+``event=False``, records an event that ``export_chrome`` writes in the
+Chrome trace format (open it in chrome://tracing or Perfetto).
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+MAX_EVENTS = 200_000  # Oldest events are dropped beyond this
+
+enabled = False
+_events: deque = deque(maxlen=MAX_EVENTS)
+_totals: Dict[str, List[float]] = {}  # name -> [count, total, last] seconds
+_lock = threading.Lock()
+_clock = time.perf_counter
+_origin = _clock()
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("name", "args", "event", "start")
+
+    def __init__(self, name: str, args: Optional[dict], event: bool):
+        self.name = name
+        self.args = args
+        self.event = event
+
+    def __enter__(self):
+        self.start = _clock()
+        return self
+
+    def __exit__(self, *exc):
+        _finish(self.name, self.start, _clock(), self.args, self.event)
+        return False
+
+
+def _finish(name: str, start: float, end: float, args, event: bool):
+    duration = end - start
+    with _lock:
+        total = _totals.get(name)
+        if total is None:
+            _totals[name] = [1, duration, duration]
+        else:
+            total[0] += 1
+            total[1] += duration
+            total[2] = duration
+    if event:
+        record = {
+            "name": name,
+            "ph": "X",
+            "ts": (start - _origin) * 1e6,
+            "dur": duration * 1e6,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+        }
+        if args:
+            record["args"] = args
+        _events.append(record)
+
+
+def span(name: str, args: Optional[dict] = None, event: bool = True):
+    """Context manager timing the enclosed block under name.
+
+    Args:
+        name: Operation name, dotted by area, e.g. "grid.build"
+        args: Optional details shown with the event in trace viewers
+        event: False to only add to the totals, for very frequent calls
+    """
+    if not enabled:
+        return _NULL
+    return _Span(name, args, event)
+
+
+def traced(name: str, event: bool = True):
+    """Decorator timing every call of a function as a span"""
+
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return function(*args, **kwargs)
+            start = _clock()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                _finish(name, start, _clock(), None, event)
+
+        return wrapper
+
+    return decorate
+
+
+def enable(on: bool = True):
+    global enabled
+    enabled = on
+
+
+def reset():
+    """Forget all recorded events and totals"""
+    with _lock:
+        _events.clear()
+        _totals.clear()
+
+
+def totals() -> Dict[str, tuple]:
+    """{name: (count, total seconds, last seconds)}"""
+    with _lock:
+        return {name: tuple(value) for name, value in _totals.items()}
+
+
+def summary(names: Optional[List[str]] = None, limit: int = 6) -> str:
+    """One-line timing summary, e.g. for the status bar.
+
+    Shows the last duration of each named operation, or of the operations
+    with the most total time when no names are given.
+    """
+    recorded = totals()
+    if names is None:
+        names = sorted(recorded, key=lambda n: recorded[n][1], reverse=True)
+    parts = []
+    for name in names[:limit]:
+        if name in recorded:
+            count, total, last = recorded[name]
+            text = f"{name} {last * 1000:.1f} ms"
+            if count > 1:
+                text += f" (x{count}, {total * 1000:.0f} ms total)"
+            parts.append(text)
+    return " | ".join(parts) or "No spans recorded"
+
+
+def export_chrome(path: str) -> int:
+    """Write recorded events as a Chrome trace file; returns the count"""
+    events = list(_events)
+    with open(path, "w") as F1:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, F1)
+    return len(events)
@@ -0,0 +1,370 @@
+"""Lazy tree of networks nested under their closest covering network.
+
+``NetworkIndex`` keeps the packed keys (``address << 6 | prefixlen``, see
+``netstore``) of all networks in one sorted array. In that order every
+network comes after the networks covering it and before the ones it
+covers, so the children of a block are found by bisecting: the first
+network inside the block with a longer prefix is a child, and the next
+child is the first network after the end of that one. No nesting is
+worked out in advance.
+
+``NetworkTreeModel`` creates nodes only when the view fetches them, a
+batch of rows at a time, so expanding a node costs time and memory in
+proportion to the rows shown, whatever the size of the dataset. Keys that
+cannot be packed are left out; validation reports them.
+"""
+
+from array import array
+from bisect import bisect_left
+from typing import Callable, Iterable, List, Optional
+
+from PyQt6 import QtCore, QtWidgets
+from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QColor
+
+import cidrutil
+import netstore
+from netstore import PREFIX_BITS, PREFIX_MASK
+
+FETCH_ROWS = 256  # Children created per fetch
+REBUILD_KEYS = 1000  # More changed keys than this re-sort the whole index
+COLUMNS = ("Network", "Name", "Subnets")
+
+
+def _block(value: int) -> tuple:
+    """(start, end, prefixlen) of a packed key, ignoring host bits"""
+    prefixlen = value & PREFIX_MASK
+    start, end = cidrutil.network_range(value >> PREFIX_BITS, prefixlen)
+    return start, end, prefixlen
+
+
+class NetworkIndex:
+    """Sorted packed keys of the defined networks"""
+
+    def __init__(self, packed: Iterable[int] = ()):
+        self.keys = array("q", sorted(packed))
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __contains__(self, value: int) -> bool:
+        i = bisect_left(self.keys, value)
+        return i < len(self.keys) and self.keys[i] == value
+
+    def add(self, value: int):
+        i = bisect_left(self.keys, value)
+        if i == len(self.keys) or self.keys[i] != value:
+            self.keys.insert(i, value)
+
+    def discard(self, value: int):
+        i = bisect_left(self.keys, value)
+        if i < len(self.keys) and self.keys[i] == value:
+            del self.keys[i]
+
+    def first_child(self, start: int, end: int, prefixlen: int) -> Optional[int]:
+        """First network in [start, end) with a prefix longer than prefixlen"""
+        keys = self.keys
+        i = bisect_left(keys, start << PREFIX_BITS)
+        while i < len(keys):
+            value = keys[i]
+            if value >> PREFIX_BITS >= end:
+                return None
+            if value & PREFIX_MASK > prefixlen:
+                return value
+            i += 1  # The block itself or a network covering it
+        return None
+
+    def children(self, start: int, end: int, prefixlen: int, limit: int) -> List[int]:
+        """Up to limit networks directly inside a block, from address start"""
+        found = []
+        while len(found) < limit:
+            value = self.first_child(start, end, prefixlen)
+            if value is None:
+                break
+            found.append(value)
+            start = _block(value)[1]
+        return found
+
+    def count_inside(self, start: int, end: int, prefixlen: int) -> int:
+        """Number of networks in [start, end) with a longer prefix"""
+        keys = self.keys
+        first = bisect_left(keys, (start << PREFIX_BITS) | (prefixlen + 1))
+        return bisect_left(keys, end << PREFIX_BITS) - first
+
+    def parent_of(self, value: int) -> Optional[int]:
+        """Closest network covering a packed key, or None"""
+        address, prefixlen = value >> PREFIX_BITS, value & PREFIX_MASK
+        for shorter in range(prefixlen - 1, -1, -1):
+            candidate = ((address & cidrutil.netmask(shorter)) << PREFIX_BITS) | shorter
+            if candidate in self:
+                return candidate
+        return None
+
+
+class _Node:
+    """A fetched network; the root stands for the whole address space"""
+
+    __slots__ = (
+        "value",
+        "parent",
+        "row",
+        "children",
+        "start",
+        "end",
+        "prefixlen",
+        "next",
+    )
+
+    def __init__(self, value: Optional[int], parent: Optional["_Node"], row: int):
+        self.value = value
+        self.parent = parent
+        self.row = row
+        self.children: List[_Node] = []
+        if value is None:
+            self.start, self.end, self.prefixlen = 0, cidrutil.ALL_ONES + 1, -1
+        else:
+            self.start, self.end, self.prefixlen = _block(value)
+        self.next: Optional[int] = self.start  # Next address to fetch from
+
+
+class NetworkTreeModel(QtCore.QAbstractItemModel):
+    """Defined networks nested under their closest covering network.
+
+    The index is built by ``load()`` and dropped by ``release()``; while
+    released the model is empty.
+    """
+
+    def __init__(
+        self, networks, color: Optional[Callable[[dict], Optional[str]]] = None
+    ):
+        """
+        Args:
+            networks: NetworkStore shown by the tree
+            color: Optional callable(record) giving a background colour
+        """
+        super().__init__()
+        self.networks = networks
+        self.color = color
+        self._index: Optional[NetworkIndex] = None
+        self._root = _Node(None, None, 0)
+        self._nodes = {}  # packed key -> fetched node
+
+    # Loading
+
+    def is_loaded(self) -> bool:
+        return self._index is not None
+
+    def load(self):
+        """Index the networks again and show the top level"""
+        self.beginResetModel()
+        self._index = NetworkIndex(self.networks.packed_keys())
+        self._clear_nodes()
+        self.endResetModel()
+
+    def release(self):
+        """Drop the index and every node, e.g. while the tree is hidden"""
+        if self._index is None:
+            return
+        self.beginResetModel()
+        self._index = None
+        self._clear_nodes()
+        self.endResetModel()
+
+    def _clear_nodes(self):
+        self._root = _Node(None, None, 0)
+        self._nodes = {}
+
+    def networks_changed(self, keys: Optional[List[str]]):
+        """Follow the network store.
+
+        Edited networks are redrawn where they are shown. Networks being
+        added or removed move others between parents, so the nodes are
+        dropped and fetched again.
+        """
+        if self._index is None:
+            return
+        if keys is None or len(keys) > REBUILD_KEYS:
+            self.load()
+            return
+        moved = False
+        for key in keys:
+            value = netstore.pack_key(key)
+            if value is None:
+                continue
+            if key in self.networks:
+                if value not in self._index:
+                    self._index.add(value)
+                    moved = True
+            elif value in self._index:
+                self._index.discard(value)
+                moved = True
+        if moved:
+            self.beginResetModel()
+            self._clear_nodes()
+            self.endResetModel()
+            return
+        for key in keys:
+            node = self._nodes.get(netstore.pack_key(key))
+            if node is not None:
+                self.dataChanged.emit(
+                    self.createIndex(node.row, 0, node),
+                    self.createIndex(node.row, len(COLUMNS) - 1, node),
+                )
+
+    # Lookup
+
+    def _node(self, index: QtCore.QModelIndex) -> _Node:
+        return index.internalPointer() if index.isValid() else self._root
+
+    def key(self, index: QtCore.QModelIndex) -> Optional[str]:
+        """CIDR key of a row, None for an invalid index"""
+        if not index.isValid():
+            return None
+        return netstore.unpack_key(self._node(index).value)
+
+    def index_of(self, key: str) -> QtCore.QModelIndex:
+        """Index of a network, fetching the rows leading to it"""
+        value = netstore.pack_key(key)
+        if self._index is None or value is None or value not in self._index:
+            return QtCore.QModelIndex()
+        path = [value]
+        while (parent := self._index.parent_of(path[-1])) is not None:
+            path.append(parent)
+        node, index = self._root, QtCore.QModelIndex()
+        for value in reversed(path):
+            while node.next is not None and node.next <= value >> PREFIX_BITS:
+                self.fetchMore(index)
+            rows = [child.value for child in node.children]
+            row = bisect_left(rows, value)
+            if row == len(rows) or rows[row] != value:
+                return QtCore.QModelIndex()
+            node = node.children[row]
+            index = self.createIndex(row, 0, node)
+        return index
+
+    # Model interface
+
+    def index(self, row, column, parent=QtCore.QModelIndex()):
+        node = self._node(parent)
+        if 0 <= row < len(node.children) and 0 <= column < len(COLUMNS):
+            return self.createIndex(row, column, node.children[row])
+        return QtCore.QModelIndex()
+
+    def parent(self, index):
+        if not index.isValid():
+            return QtCore.QModelIndex()
+        parent = self._node(index).parent
+        if parent is None or parent is self._root:
+            return QtCore.QModelIndex()
+        return self.createIndex(parent.row, 0, parent)
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        if parent.column() > 0:
+            return 0
+        return len(self._node(parent).children)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return len(COLUMNS)
+
+    def hasChildren(self, parent=QtCore.QModelIndex()):
+        if parent.column() > 0 or self._index is None:
+            return False
+        node = self._node(parent)
+        if node.children:
+            return True
+        first = self._index.first_child(node.start, node.end, node.prefixlen)
+        return first is not None
+
+    def canFetchMore(self, parent):
+        return self._index is not None and self._node(parent).next is not None
+
+    def fetchMore(self, parent):
+        node = self._node(parent)
+        if self._index is None or node.next is None:
+            return
+        values = self._index.children(node.next, node.end, node.prefixlen, FETCH_ROWS)
+        if len(values) < FETCH_ROWS:
+            node.next = None
+        else:
+            node.next = _block(values[-1])[1]
+        if not values:
+            return
+        first = len(node.children)
+        self.beginInsertRows(parent, first, first + len(values) - 1)
+        for row, value in enumerate(values, first):
+            child = _Node(value, node, row)
+            node.children.append(child)
+            self._nodes[value] = child
+        self.endInsertRows()
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        node = self._node(index)
+        column = index.column()
+        if role == Qt.ItemDataRole.DisplayRole:
+            if column == 0:
+                return netstore.unpack_key(node.value)
+            if column == 1:
+                record = self.networks.get(netstore.unpack_key(node.value)) or {}
+                return str(record.get("Name", ""))
+            if column == 2:
+                return self._index.count_inside(node.start, node.end, node.prefixlen)
+        elif role == Qt.ItemDataRole.BackgroundRole and self.color:
+            record = self.networks.get(netstore.unpack_key(node.value))
+            color = self.color(record) if record else None
+            if color:
+                return QColor(color)
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if (
+            orientation == Qt.Orientation.Horizontal
+            and role == Qt.ItemDataRole.DisplayRole
+        ):
+            return COLUMNS[section]
+        return None
+
+
+class NetworkTreeView(QtWidgets.QTreeView):
+    """Tree of a NetworkTreeModel that keeps nodes expanded across resets"""
+
+    networkActivated = QtCore.pyqtSignal(str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.expanded_keys = set()
+        self.setUniformRowHeights(True)
+        self.setAlternatingRowColors(True)
+        self.expanded.connect(self._expanded)
+        self.collapsed.connect(self._collapsed)
+        self.doubleClicked.connect(self._activated)
+
+    def setModel(self, model):
+        super().setModel(model)
+        model.modelReset.connect(self.restore_expanded)
+
+    def _expanded(self, index):
+        self.expanded_keys.add(self.model().key(index))
+
+    def _collapsed(self, index):
+        self.expanded_keys.discard(self.model().key(index))
+
+    def _activated(self, index):
+        if key := self.model().key(index):
+            self.networkActivated.emit(key)
+
+    def restore_expanded(self):
+        """Expand again, outermost first, the nodes that were expanded"""
+        model = self.model()
+        if not model.is_loaded():
+            return
+        outermost_first = sorted(
+            self.expanded_keys, key=lambda key: netstore.pack_key(key) & PREFIX_MASK
+        )
+        for key in outermost_first:
+            index = model.index_of(key)
+            if index.isValid():
+                self.expand(index)
+            else:
+                self.expanded_keys.discard(key)
@@ -0,0 +1,397 @@
+"""Consistency checks for the shared networks dictionary.
+
+Every key is parsed once into integers. A sort by (address, prefixlen)
+followed by a single sweep with a stack of open blocks finds duplicates
+and each network's closest defined ancestor in O(n log n).
+
+After an edit only the keys around it are checked again. The defined
+networks stay sorted in an array of packed integers, the same
+``address << 6 | prefixlen`` as ``netstore``, so finding the children of
+a block is a bisect. ``check_keys`` returns the keys whose issues changed,
+so a panel can update just those.
+"""
+
+from array import array
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+import cidrutil
+from netstore import PREFIX_BITS, PREFIX_MASK
+
+INVALID = "invalid"
+NON_CANONICAL = "non-canonical"
+DUPLICATE = "duplicate"
+OVERLAP = "overlap"
+ORPHAN = "orphan"
+
+# Fields that describe where a block lives or who owns it. A network
+# nested in another should not disagree with it on these.
+DEFAULT_CONFLICT_FIELDS = ("Location", "Department", "Region", "Owner")
+
+# Re-checking one key and its neighbours costs several times a network's
+# share of a full check, so larger change sets run a full check instead
+FULL_CHECK_SHARE = 0.1
+
+
+class Issue(NamedTuple):
+    kind: str
+    key: str  # Key as written in the networks dictionary
+    network: str  # Canonical CIDR, empty if the key could not be parsed
+    message: str
+    other: str = ""  # Related key for duplicates and overlaps
+
+
+class NetworkValidator:
+    """Finds invalid, duplicate, overlapping and orphaned networks"""
+
+    def __init__(self, conflict_fields=DEFAULT_CONFLICT_FIELDS, orphan_prefix=24):
+        """
+        Args:
+            conflict_fields: Fields that must agree between a network and its
+                closest defined ancestor
+            orphan_prefix: Networks longer than this without any defined
+                ancestor are reported as orphans
+        """
+        self.conflict_fields = tuple(conflict_fields)
+        self.orphan_prefix = orphan_prefix
+        self._parsed: Dict[str, Optional[Tuple[int, int]]] = {}
+        self._keys_by_net: Dict[Tuple[int, int], List[str]] = {}
+        self._sorted = array("q")  # Packed defined networks, in order
+        self._issues: Dict[str, List[Issue]] = {}
+        self._by_network: Dict[str, List[Issue]] = {}
+        self._changed: Set[str] = set()  # Keys whose issues were replaced
+
+    # Parsing and indexing
+
+    def _parse(self, key: str) -> Optional[Tuple[int, int]]:
+        """Return the canonical (start, prefixlen) of a key, cached"""
+        try:
+            return self._parsed[key]
+        except KeyError:
+            pass
+        parsed = cidrutil.parse_cidr(key)
+        if parsed is not None:
+            parsed = (parsed[0] & cidrutil.netmask(parsed[1]), parsed[1])
+        self._parsed[key] = parsed
+        return parsed
+
+    def _index_key(self, key: str):
+        net = self._parse(key)
+        if net is None:
+            return
+        keys = self._keys_by_net.setdefault(net, [])
+        if key not in keys:
+            keys.append(key)
+        if len(keys) == 1:
+            insort(self._sorted, (net[0] << PREFIX_BITS) | net[1])
+
+    def _unindex_key(self, key: str):
+        net = self._parsed.pop(key, None)
+        if net is None or net not in self._keys_by_net:
+            return
+        keys = self._keys_by_net[net]
+        if key in keys:
+            keys.remove(key)
+        if not keys:
+            del self._keys_by_net[net]
+            packed = (net[0] << PREFIX_BITS) | net[1]
+            del self._sorted[bisect_left(self._sorted, packed)]
+
+    def _closest_ancestor(self, net: Tuple[int, int]) -> Optional[Tuple[int, int]]:
+        start, prefixlen = net
+        for parent_len in range(prefixlen - 1, -1, -1):
+            parent = (start & cidrutil.netmask(parent_len), parent_len)
+            if parent in self._keys_by_net:
+                return parent
+        return None
+
+    def _direct_children(self, net: Tuple[int, int]) -> Iterable[Tuple[int, int]]:
+        """Yield defined networks whose closest ancestor is net"""
+        start, end = cidrutil.network_range(*net)
+        order = self._sorted
+        pos = bisect_left(order, (start << PREFIX_BITS) | (net[1] + 1))
+        while pos < len(order) and order[pos] >> PREFIX_BITS < end:
+            child = (order[pos] >> PREFIX_BITS, order[pos] & PREFIX_MASK)
+            yield child
+            # Skip everything nested inside this child
+            child_end = cidrutil.network_range(*child)[1]
+            pos = bisect_left(order, child_end << PREFIX_BITS, pos + 1)
+
+    def _primary(self, net: Tuple[int, int]) -> str:
+        """Key reported as the original when several keys share a network"""
+        keys = self._keys_by_net[net]
+        if len(keys) == 1:
+            return keys[0]
+        canonical = cidrutil.format_cidr(*net)
+        return canonical if canonical in keys else min(keys)
+
+    # Issue bookkeeping
+
+    def _set_issues(self, key: str, issues: List[Issue]):
+        old = self._issues.pop(key, [])
+        if old != issues:
+            self._changed.add(key)
+        for issue in old:
+            entries = self._by_network.get(issue.network)
+            if entries and issue in entries:
+                entries.remove(issue)
+                if not entries:
+                    del self._by_network[issue.network]
+        if issues:
+            self._issues[key] = issues
+            for issue in issues:
+                self._by_network.setdefault(issue.network, []).append(issue)
+
+    def _conflicts(self, networks, key, parent_key, canonical) -> List[Issue]:
+        issues = []
+        details = networks.get(key) or {}
+        parent_details = networks.get(parent_key) or {}
+        for field in self.conflict_fields:
+            value = details.get(field)
+            parent_value = parent_details.get(field)
+            if value and parent_value and value != parent_value:
+                issues.append(
+                    Issue(
+                        OVERLAP,
+                        key,
+                        canonical,
+                        f"{key} is inside {parent_key} but {field} is "
+                        f"{value!r} instead of {parent_value!r}",
+                        parent_key,
+                    )
+                )
+        return issues
+
+    def _evaluate(
+        self, networks, key: str, ancestor: Optional[Tuple[int, int]], has_children
+    ) -> List[Issue]:
+        """Return the issues for which key is the subject"""
+        net = self._parse(key)
+        if net is None:
+            return [Issue(INVALID, key, "", f"{key!r} is not a valid IPv4 CIDR")]
+
+        issues = []
+        canonical = cidrutil.format_cidr(*net)
+        if canonical != key:
+            issues.append(
+                Issue(NON_CANONICAL, key, canonical, f"{key} should be {canonical}")
+            )
+
+        primary = self._primary(net)
+        if primary != key:
+            issues.append(
+                Issue(DUPLICATE, key, canonical, f"{key} duplicates {primary}", primary)
+            )
+
+        if ancestor is not None:
+            issues.extend(
+                self._conflicts(networks, key, self._primary(ancestor), canonical)
+            )
+        elif net[1] > self.orphan_prefix and not has_children:
+            issues.append(
+                Issue(ORPHAN, key, canonical, f"{key} is not inside any network")
+            )
+        return issues
+
+    # Public API
+
+    def validate(self, networks) -> List[Issue]:
+        """Run a full check of the networks dictionary"""
+        parse = cidrutil.parse_cidr
+        masks = cidrutil.MASKS
+        self._parsed = parsed = {}
+        self._keys_by_net = keys_by_net = {}
+        self._issues = {}
+        self._by_network = {}
+        self._changed = set()
+
+        suspects = []  # Keys that are invalid or not written canonically
+        for key in networks.keys():
+            result = parse(key)
+            if result is None:
+                parsed[key] = None
+                suspects.append(key)
+                continue
+            address, prefixlen = result
+            net = (address & masks[prefixlen], prefixlen)
+            parsed[key] = net
+            keys = keys_by_net.get(net)
+            if keys is None:
+                keys_by_net[net] = [key]
+            else:
+                keys.append(key)
+            if address != net[0] or key.count("/") != 1 or "/0" in key:
+                suspects.append(key)
+        ordered = sorted(keys_by_net)
+        self._sorted = array("q", [(start << PREFIX_BITS) | n for start, n in ordered])
+
+        # Sweep: the stack holds the chain of open blocks enclosing the cursor
+        ancestors = {}
+        top_level = []
+        stack: List[Tuple[int, Tuple[int, int]]] = []
+        for net in ordered:
+            start = net[0]
+            while stack and stack[-1][0] <= start:
+                stack.pop()
+            if stack:
+                ancestors[net] = stack[-1][1]
+            else:
+                top_level.append(net)
+            stack.append((start + cidrutil.block_size(net[1]), net))
+        has_children = set(ancestors.values())
+
+        # Only build issue lists for networks that fail a cheap test
+        checked = set()
+        conflict_fields = self.conflict_fields
+        for net, parent in ancestors.items():
+            keys = keys_by_net[net]
+            if len(keys) == 1 and len(keys_by_net[parent]) == 1:
+                details = networks.get(keys[0]) or {}
+                parent_details = networks.get(keys_by_net[parent][0]) or {}
+                for field in conflict_fields:
+                    value = details.get(field)
+                    if value and value != parent_details.get(field, value):
+                        break
+                else:
+                    continue
+            for key in keys:
+                self._set_issues(key, self._evaluate(networks, key, parent, True))
+                checked.add(key)
+        for net in top_level:
+            keys = keys_by_net[net]
+            if len(keys) > 1 or (
+                net[1] > self.orphan_prefix and net not in has_children
+            ):
+                for key in keys:
+                    self._set_issues(
+                        key,
+                        self._evaluate(networks, key, None, net in has_children),
+                    )
+                    checked.add(key)
+
+        # Invalid and non-canonical keys not already covered above
+        for key in suspects:
+            if key not in checked:
+                net = parsed[key]
+                self._set_issues(
+                    key,
+                    self._evaluate(
+                        networks, key, ancestors.get(net), net in has_children
+                    ),
+                )
+        self._changed = set()
+        return self.issues()
+
+    def check_keys(self, networks, keys: Iterable[str]) -> Set[str]:
+        """Re-check after the given keys were added, edited or removed.
+
+        Only the keys themselves, their duplicates, their closest ancestor
+        and their direct children are re-evaluated, unless the keys are
+        more than FULL_CHECK_SHARE of the networks.
+
+        Returns:
+            Keys whose issues changed; ``issues_for_key`` gives the new ones
+        """
+        keys = list(keys)
+        if len(keys) > FULL_CHECK_SHARE * len(networks):
+            old = self._issues
+            self.validate(networks)
+            new = self._issues
+            return {
+                key for key in old.keys() | new.keys() if old.get(key) != new.get(key)
+            }
+        affected = set()
+        for key in keys:
+            # A key always stands for the same network, so the index only
+            # changes when a key is added or removed, not when it is edited
+            indexed = key in self._parsed
+            net = self._parsed.get(key)
+            if key in networks:
+                if not indexed:
+                    self._index_key(key)
+                    net = self._parsed[key]
+            else:
+                if indexed:
+                    self._unindex_key(key)
+                self._set_issues(key, [])
+            affected.add(key)
+            if net is None:
+                continue
+            affected.update(self._keys_by_net.get(net, []))
+            ancestor = self._closest_ancestor(net)
+            if ancestor is not None:
+                affected.update(self._keys_by_net[ancestor])
+            for child in self._direct_children(net):
+                affected.update(self._keys_by_net[child])
+
+        for key in affected:
+            if key not in networks:
+                continue
+            net = self._parse(key)
+            ancestor = self._closest_ancestor(net) if net else None
+            has_children = net is not None and any(
+                True for _ in self._direct_children(net)
+            )
+            self._set_issues(key, self._evaluate(networks, key, ancestor, has_children))
+        changed, self._changed = self._changed, set()
+        return changed
+
+    def issues(self) -> List[Issue]:
+        """Return all current issues ordered by key"""
+        return [issue for key in sorted(self._issues) for issue in self._issues[key]]
+
+    def issues_for_key(self, key: str) -> List[Issue]:
+        """Return the issues for which key is the subject"""
+        return self._issues.get(key, [])
+
+    def issues_for_network(self, network: str) -> List[Issue]:
+        """Return issues attached to a canonical CIDR, for cell markers"""
+        return self._by_network.get(network, [])
+
+
+def find_tab_conflicts(tabs_data: List[dict]) -> List[Issue]:
+    """Report keys defined by more than one tab with different field values.
+
+    Loading merges all tab networks into one dictionary, so without this
+    check the last tab silently wins.
+    """
+    seen: Dict[str, Tuple[str, dict]] = {}
+    issues = []
+    for tab_data in tabs_data:
+        tab_name = tab_data.get("name", "Subnet")
+        for key, details in (tab_data.get("networks") or {}).items():
+            if key not in seen:
+                seen[key] = (tab_name, details)
+                continue
+            first_tab, first_details = seen[key]
+            if details != first_details:
+                net = cidrutil.parse_cidr(key)
+                canonical = (
+                    cidrutil.format_cidr(net[0] & cidrutil.netmask(net[1]), net[1])
+                    if net
+                    else ""
+                )
+                issues.append(
+                    Issue(
+                        DUPLICATE,
+                        key,
+                        canonical,
+                        f"{key} differs between tabs {first_tab!r} and {tab_name!r}",
+                        key,
+                    )
+                )
+    return issues
+
+
+if __name__ == "__main__":
+    sample = {
+        "10.0.0.0/16": {"Location": "London"},
+        "10.0.1.0/24": {"Location": "Paris"},
+        "10.0.1.5/24": {},
+        "10.0.2.0/24": {"Location": "London"},
+        "192.168.7.0/27": {},
+        "bogus": {},
+    }
+    validator = NetworkValidator()
+    for issue in validator.validate(sample):
+        print(f"{issue.kind}: {issue.message}")
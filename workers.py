@@ -0,0 +1,48 @@
+"""Process pool helpers shared by batch jobs.
+
+Workers are spawned rather than forked: forking a process that is running
+a Qt application is unsafe. Spawned workers import only the modules their
+job needs, never ``main``.
+"""
+
+import logging
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from typing import Callable, Iterable, Iterator, Optional, Tuple
+
+
+def spawn_pool(max_workers=None, initializer=None, initargs=()) -> ProcessPoolExecutor:
+    """Return a process pool whose workers are spawned"""
+    return ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=initializer,
+        initargs=initargs,
+    )
+
+
+def run_all(
+    pool: ProcessPoolExecutor,
+    function: Callable,
+    argument_lists: Iterable[tuple],
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> Iterator[Tuple[int, Future]]:
+    """Submit one call per argument tuple and yield (index, future) as each
+    finishes, so a slow job never holds up the results of faster ones.
+
+    Args:
+        pool: Pool to run in
+        function: Picklable module-level function
+        argument_lists: Positional arguments for each call
+        progress: Optional callable(done, total), called after each job
+    """
+    futures = {
+        pool.submit(function, *arguments): index
+        for index, arguments in enumerate(argument_lists)
+    }
+    for done, future in enumerate(as_completed(futures), start=1):
+        if future.exception() is not None:
+            logging.error(f"{function.__name__} failed: {future.exception()}")
+        yield futures[future], future
+        if progress:
+            progress(done, len(futures))